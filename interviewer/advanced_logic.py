@@ -7,14 +7,31 @@ Questions are dynamically generated via AI with static fallbacks.
 """
 from __future__ import annotations
 
+import asyncio
+import logging
+import os
+import threading
 import time
 import random
+import uuid
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from statistics import mean
-from typing import Dict, List, Optional
-
-from .ai_service import evaluate_code_with_ai, evaluate_with_ai
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import ai_service
+from .ai_service import (
+    aevaluate_code_with_ai,
+    aevaluate_with_ai,
+    astream_answer_evaluation,
+    astream_code_evaluation,
+    evaluate_code_with_ai,
+    evaluate_with_ai,
+)
 from .ai_question_generator import (
+    _pick_difficulty,
+    agenerate_debug_question,
+    agenerate_logical_question,
     generate_debug_question,
     generate_coding_question,
     generate_logical_question,
@@ -22,11 +39,126 @@ from .ai_question_generator import (
     get_fallback_coding,
     get_fallback_logical,
 )
-
+from .deadline import Deadline
+from .prefetch import PREFETCH_MAX_WAIT, PREFETCHER
+from .question_bank import BankCursor
+from .question_corpus import sample_question
+from .question_pool import QUESTION_POOL
+from .question_store import QUESTION_REFS, SESSION_KEYS, get_question_store
+from .quota_scheduler import PRIORITY_GENERATION
+from .routing import QUESTION_ROUTER, SOURCE_LIVE, local_question
+from .state_codec import KIND_ADVANCED, decode_state, encode_state
+
+logger = logging.getLogger(__name__)
 
 QUESTIONS_PER_ROUND = 5
 INTERVIEW_DURATION = 30 * 60  # 30 minutes
 
+# Threads generating the next question alongside a synchronous evaluation.
+ADVANCE_WORKERS = int(os.environ.get("ADV_ADVANCE_WORKERS", "4"))
+
+# Response fields copied from the question; with refs they are saved only in the question store.
+_QUESTION_FIELDS = {
+    "debug": ("buggy_code", "fixed_code", "bug_explanation", "description"),
+    "logical": ("description", "correct_answer"),
+}
+_STUB_KEYS = frozenset(SESSION_KEYS)
+
+_ADVANCE_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_ADVANCE_LOCK = threading.Lock()
+
+
+def _advance_executor() -> ThreadPoolExecutor:
+    global _ADVANCE_EXECUTOR
+    with _ADVANCE_LOCK:
+        if _ADVANCE_EXECUTOR is None:
+            _ADVANCE_EXECUTOR = ThreadPoolExecutor(
+                max_workers=ADVANCE_WORKERS, thread_name_prefix="adv-advance"
+            )
+        return _ADVANCE_EXECUTOR
+
+
+def _generate_question(
+    mode: str,
+    lang: str,
+    used_topics: List[str],
+    qnum: int,
+    total: int,
+    deadline: Optional[Deadline] = None,
+    priority: int = PRIORITY_GENERATION,
+    seen_titles: Iterable[str] = (),
+    cursor: Optional[BankCursor] = None,
+) -> Optional[Dict]:
+    """
+    Question ``qnum`` from the warm pool or the corpus, else generated live
+    unless the router predicts that would overrun ``deadline``, else from the
+    local banks.
+    """
+    difficulty = _pick_difficulty(qnum, total)
+    q = QUESTION_POOL.take(mode, lang, difficulty, used_topics) or sample_question(
+        mode, lang, difficulty, used_topics
+    )
+    if q is not None:
+        return q
+    if QUESTION_ROUTER.choose(deadline) == SOURCE_LIVE:
+        started = time.monotonic()
+        if mode == "debug":
+            q = generate_debug_question(
+                lang, used_topics, qnum, total,
+                priority=priority, deadline=deadline, difficulty=difficulty,
+            )
+        else:
+            # Logical mode
+            q = generate_logical_question(
+                used_topics, qnum, total,
+                priority=priority, deadline=deadline, difficulty=difficulty,
+            )
+        _record_live(started, q)
+    return q or local_question(mode, lang, difficulty, used_topics, seen_titles, cursor)
+
+
+async def _agenerate_question(
+    mode: str,
+    lang: str,
+    used_topics: List[str],
+    qnum: int,
+    total: int,
+    deadline: Optional[Deadline] = None,
+    seen_titles: Iterable[str] = (),
+    cursor: Optional[BankCursor] = None,
+) -> Optional[Dict]:
+    """Async counterpart of ``_generate_question``."""
+    difficulty = _pick_difficulty(qnum, total)
+    q = QUESTION_POOL.take(mode, lang, difficulty, used_topics) or sample_question(
+        mode, lang, difficulty, used_topics
+    )
+    if q is not None:
+        return q
+    if QUESTION_ROUTER.choose(deadline) == SOURCE_LIVE:
+        started = time.monotonic()
+        if mode == "debug":
+            q = await agenerate_debug_question(
+                lang, used_topics, qnum, total, deadline=deadline, difficulty=difficulty
+            )
+        else:
+            q = await agenerate_logical_question(
+                used_topics, qnum, total, deadline=deadline, difficulty=difficulty
+            )
+        _record_live(started, q)
+    return q or local_question(mode, lang, difficulty, used_topics, seen_titles, cursor)
+
+
+def _record_live(started: float, q: Optional[Dict]) -> None:
+    # Without a provider nothing went upstream, so there is nothing to learn.
+    if ai_service.provider_ready():
+        QUESTION_ROUTER.record(time.monotonic() - started, q is not None)
+
+
+def _prefetch_wait(deadline: Optional[Deadline]) -> float:
+    if deadline is None:
+        return PREFETCH_MAX_WAIT
+    return deadline.upstream_timeout() or 0.0
+
 
 class AdvancedSession:
     """
@@ -46,6 +178,8 @@ class AdvancedSession:
         ended: bool = False,
         used_topics: Optional[List[str]] = None,
         fallback_idx: int = 0,
+        session_id: Optional[str] = None,
+        bank_cursor: Optional[Dict[str, List[int]]] = None,
     ):
         self.mode = mode  # "debug" or "logical"
         self.lang = lang
@@ -57,46 +191,153 @@ class AdvancedSession:
         self.used_topics: List[str] = used_topics or []
         self.fallback_idx = fallback_idx
         self.total_questions = QUESTIONS_PER_ROUND
+        self.session_id = session_id or uuid.uuid4().hex
+        # Position in the local banks' shuffled order, kept across requests.
+        self.bank_cursor = BankCursor(bank_cursor)
+
+    def _generate_next_question(self, deadline: Optional[Deadline] = None) -> Optional[Dict]:
+        """Get the next question: prefetched, else from the warm pool or AI, else the static bank."""
+        return self._accept_question(self._fetch_question(self.index + 1, deadline))
+
+    async def _agenerate_next_question(self, deadline: Optional[Deadline] = None) -> Optional[Dict]:
+        """Async counterpart of ``_generate_next_question``."""
+        return self._accept_question(await self._afetch_question(self.index + 1, deadline))
+
+    def _fetch_question(self, qnum: int, deadline: Optional[Deadline] = None) -> Optional[Dict]:
+        """Question ``qnum`` from the prefetcher, else generated; None on failure. No state changes."""
+        return self._fetcher(qnum, self.bank_cursor)(deadline)
+
+    def _fetcher(self, qnum: int, cursor: BankCursor) -> Callable[[Optional[Deadline]], Optional[Dict]]:
+        """
+        ``_fetch_question`` bound to the session's state as of now. Apart from
+        drawing from ``cursor`` it never touches the session, so it can run on
+        another thread while the session moves on.
+        """
+        session_id, mode, lang, total = self.session_id, self.mode, self.lang, self.total_questions
+        used, seen = list(self.used_topics), self._seen_titles()
+
+        def fetch(deadline: Optional[Deadline]) -> Optional[Dict]:
+            q = PREFETCHER.take(session_id, qnum, _prefetch_wait(deadline))
+            if q is None:
+                q = _generate_question(
+                    mode, lang, used, qnum, total, deadline, seen_titles=seen, cursor=cursor,
+                )
+            return q
 
-    def _generate_next_question(self) -> Optional[Dict]:
-        """Generate the next question using AI, falling back to static bank."""
-        qnum = self.index + 1
+        return fetch
 
-        if self.mode == "debug":
-            q = generate_debug_question(
-                self.lang, self.used_topics, qnum, self.total_questions
+    async def _afetch_question(self, qnum: int, deadline: Optional[Deadline] = None) -> Optional[Dict]:
+        """Async counterpart of ``_fetch_question``; snapshots the session before its first await."""
+        used, seen = list(self.used_topics), self._seen_titles()
+        q = await PREFETCHER.atake(self.session_id, qnum, _prefetch_wait(deadline))
+        if q is None:
+            q = await _agenerate_question(
+                self.mode, self.lang, used, qnum, self.total_questions, deadline,
+                seen_titles=seen, cursor=self.bank_cursor,
             )
-            if not q:
+        return q
+
+    def _seen_titles(self) -> List[str]:
+        titles = [r.get("title", "") for r in self.responses]
+        for i in range(self.index, len(self.questions)):
+            q = self.question_at(i)
+            if q:
+                titles.append(q.get("title", ""))
+        return titles
+
+    def question_at(self, i: int) -> Optional[Dict]:
+        """
+        Question ``i``, loaded from the question store if state held only its
+        ref. A ref unknown here drops that question and the ones after it, so
+        the next request generates a replacement.
+        """
+        q = self.questions[i] if i < len(self.questions) else None
+        if q and "ref" in q and q.keys() <= _STUB_KEYS:
+            full = get_question_store().get(q["ref"])
+            if full is None:
+                logger.warning("Question %s is not in the question store; replacing it", q["ref"])
+                del self.questions[i:]
+                return None
+            full.update(q)
+            self.questions[i] = q = full
+        return q
+
+    def _needs_next_question(self) -> bool:
+        """True if answering the current question will require a freshly fetched one."""
+        return (
+            len(self.questions) == self.index + 1
+            and self.index + 1 < self.total_questions
+            and not self.is_finished()
+        )
+
+    def _prefetch_next(self) -> None:
+        """Start generating the question after the current one in the background."""
+        qnum = self.index + 2
+        if qnum > self.total_questions or self.is_finished() or not ai_service.provider_ready():
+            return
+        mode, lang, used, total = self.mode, self.lang, list(self.used_topics), self.total_questions
+        seen = self._seen_titles()
+        PREFETCHER.schedule(
+            self.session_id, qnum,
+            lambda: _generate_question(
+                mode, lang, used, qnum, total, priority=PRIORITY_GENERATION, seen_titles=seen
+            ),
+        )
+
+    def _accept_question(self, q: Optional[Dict]) -> Optional[Dict]:
+        """Fill in a fallback if generation failed and append the question."""
+        qnum = self.index + 1
+
+        if not q:
+            if self.mode == "debug":
                 q = get_fallback_debug(self.lang, list(range(self.fallback_idx)))
-                self.fallback_idx += 1
-        else:
-            # Logical mode
-            q = generate_logical_question(
-                self.used_topics, qnum, self.total_questions
-            )
-            if not q:
+            else:
                 q = get_fallback_logical(list(range(self.fallback_idx)))
-                self.fallback_idx += 1
+            self.fallback_idx += 1
 
         if q:
             q["q_index"] = qnum
             q["q_start"] = time.time()
+            if QUESTION_REFS:
+                q["ref"] = get_question_store().put(q)
             self.used_topics.append(q.get("topic", ""))
             self.questions.append(q)
 
         return q
 
-    def get_current_question(self) -> Optional[Dict]:
-        """Get the current question, generating it if needed."""
-        if self.index < len(self.questions):
-            q = self.questions[self.index]
+    def _stored_current_question(self) -> Optional[Dict]:
+        q = self.question_at(self.index)
+        if q is not None:
             q["q_start"] = time.time()
-            return q
-        return self._generate_next_question()
+        return q
+
+    def get_current_question(self, deadline: Optional[Deadline] = None) -> Optional[Dict]:
+        """Get the current question, generating it if needed, and prefetch the next one."""
+        q = self._stored_current_question()
+        if q is None:
+            q = self._generate_next_question(deadline)
+        self._prefetch_next()
+        return q
 
-    def get_current_question_for_client(self) -> Optional[Dict]:
+    async def aget_current_question(self, deadline: Optional[Deadline] = None) -> Optional[Dict]:
+        """Async counterpart of ``get_current_question``."""
+        q = self._stored_current_question()
+        if q is None:
+            q = await self._agenerate_next_question(deadline)
+        self._prefetch_next()
+        return q
+
+    def get_current_question_for_client(self, deadline: Optional[Deadline] = None) -> Optional[Dict]:
         """Return a sanitized question dict safe for the client (no solutions)."""
-        q = self.get_current_question()
+        return self._client_view(self.get_current_question(deadline))
+
+    async def aget_current_question_for_client(
+        self, deadline: Optional[Deadline] = None
+    ) -> Optional[Dict]:
+        """Async counterpart of ``get_current_question_for_client``."""
+        return self._client_view(await self.aget_current_question(deadline))
+
+    def _client_view(self, q: Optional[Dict]) -> Optional[Dict]:
         if not q:
             return None
 
@@ -134,24 +375,19 @@ class AdvancedSession:
     def is_finished(self) -> bool:
         return self.ended or self.index >= self.total_questions or self.is_time_up()
 
-    def evaluate_answer(self, submitted_code: str) -> Dict:
+    def evaluate_answer(self, submitted_code: str, deadline: Optional[Deadline] = None) -> Dict:
         """Evaluate the candidate's submitted answer using AI."""
-        if self.index >= len(self.questions):
+        question = self.question_at(self.index)
+        if question is None:
             return {"score": 0, "feedback": "No question to evaluate."}
 
-        question = self.questions[self.index]
         q_start = question.get("q_start", time.time())
         time_taken = round(time.time() - q_start, 1)
 
         if self.mode == "debug":
             # Debug mode: AI code evaluation
             ai_result = evaluate_code_with_ai(
-                problem_description=question.get("description", ""),
-                language=self.lang,
-                submitted_code=submitted_code,
-                test_cases=question.get("test_cases", []),
-                original_code=question.get("buggy_code", ""),
-                question_type="debug",
+                **self._code_eval_args(question, submitted_code), deadline=deadline
             )
         else:
             # Logical mode: AI text-based evaluation
@@ -159,8 +395,125 @@ class AdvancedSession:
                 question.get("topic", "Logic"),
                 question.get("description", ""),
                 submitted_code,
+                deadline,
+            )
+        return self._record_evaluation(question, submitted_code, ai_result, time_taken)
+
+    async def aevaluate_answer(
+        self, submitted_code: str, deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """Async counterpart of ``evaluate_answer``."""
+        question = self.question_at(self.index)
+        if question is None:
+            return {"score": 0, "feedback": "No question to evaluate."}
+
+        q_start = question.get("q_start", time.time())
+        time_taken = round(time.time() - q_start, 1)
+
+        if self.mode == "debug":
+            ai_result = await aevaluate_code_with_ai(
+                **self._code_eval_args(question, submitted_code), deadline=deadline
+            )
+        else:
+            ai_result = await aevaluate_with_ai(
+                question.get("topic", "Logic"),
+                question.get("description", ""),
+                submitted_code,
+                deadline,
             )
+        return self._record_evaluation(question, submitted_code, ai_result, time_taken)
+
+    def evaluate_and_advance(
+        self, submitted_code: str, deadline: Optional[Deadline] = None
+    ) -> Tuple[Dict, Optional[Dict]]:
+        """
+        Evaluate the current answer and fetch the next question at the same time.
+        The next question depends only on ``used_topics``, so the two calls share
+        the request deadline instead of running back to back. Returns the
+        evaluation and the client view of the next question (None once finished).
+        """
+        if not self._needs_next_question():
+            result = self.evaluate_answer(submitted_code, deadline)
+            if self.is_finished():
+                return result, None
+            return result, self.get_current_question_for_client(deadline)
+
+        # The worker gets a snapshot and its own cursor copy while evaluation mutates the session.
+        cursor = BankCursor(self.bank_cursor.to_dict())
+        pending = _advance_executor().submit(self._fetcher(self.index + 2, cursor), deadline)
+        try:
+            result = self.evaluate_answer(submitted_code, deadline)
+        except BaseException:
+            pending.cancel()
+            raise
+        if self.is_finished():
+            pending.cancel()
+            return result, None
+        fetched = pending.result()
+        self.bank_cursor.state.update(cursor.state)
+        q = self._accept_question(fetched)
+        self._prefetch_next()
+        return result, self._client_view(q)
+
+    async def aevaluate_and_advance(
+        self, submitted_code: str, deadline: Optional[Deadline] = None
+    ) -> Tuple[Dict, Optional[Dict]]:
+        """Async counterpart of ``evaluate_and_advance``."""
+        if not self._needs_next_question():
+            result = await self.aevaluate_answer(submitted_code, deadline)
+            if self.is_finished():
+                return result, None
+            return result, await self.aget_current_question_for_client(deadline)
+
+        pending = asyncio.ensure_future(self._afetch_question(self.index + 2, deadline))
+        try:
+            result = await self.aevaluate_answer(submitted_code, deadline)
+        except BaseException:
+            pending.cancel()
+            raise
+        if self.is_finished():
+            pending.cancel()
+            return result, None
+        q = self._accept_question(await pending)
+        self._prefetch_next()
+        return result, self._client_view(q)
+
+    def astream_evaluation(
+        self, submitted_code: str, deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Tuple[str, object]]:
+        """
+        Stream AI evaluation fields for the current question as they are produced.
+        Nothing is recorded here; ``aevaluate_answer`` picks the result up from the cache.
+        """
+        question = self.question_at(self.index)
+        if self.mode == "debug":
+            return astream_code_evaluation(
+                **self._code_eval_args(question, submitted_code), deadline=deadline
+            )
+        return astream_answer_evaluation(
+            question.get("topic", "Logic"),
+            question.get("description", ""),
+            submitted_code,
+            deadline,
+        )
 
+    def _code_eval_args(self, question: Dict, submitted_code: str) -> Dict:
+        return {
+            "problem_description": question.get("description", ""),
+            "language": self.lang,
+            "submitted_code": submitted_code,
+            "test_cases": question.get("test_cases", []),
+            "original_code": question.get("buggy_code", ""),
+            "question_type": "debug",
+        }
+
+    def _record_evaluation(
+        self,
+        question: Dict,
+        submitted_code: str,
+        ai_result: Optional[Dict],
+        time_taken: float,
+    ) -> Dict:
         if ai_result:
             score = ai_result.get("score", 0)
             feedback = ai_result.get("feedback", "")
@@ -200,6 +553,8 @@ class AdvancedSession:
             "time_taken": time_taken,
             "skipped": False,
         }
+        if "ref" in question:
+            payload["ref"] = question["ref"]
 
         # Add question-specific data
         if self.mode == "debug":
@@ -236,10 +591,10 @@ class AdvancedSession:
 
     def skip_question(self) -> Dict:
         """Skip the current question."""
-        if self.index >= len(self.questions):
+        question = self.question_at(self.index)
+        if question is None:
             return {"score": 0, "feedback": "No question to skip."}
 
-        question = self.questions[self.index]
         payload = {
             "q_index": question.get("q_index", self.index + 1),
             "topic": question.get("topic", ""),
@@ -255,6 +610,8 @@ class AdvancedSession:
             "time_taken": 0,
             "skipped": True,
         }
+        if "ref" in question:
+            payload["ref"] = question["ref"]
         if self.mode == "debug":
             payload["buggy_code"] = question.get("buggy_code", "")
             payload["fixed_code"] = question.get("fixed_code", "")
@@ -270,6 +627,7 @@ class AdvancedSession:
 
     def end_interview(self):
         self.ended = True
+        PREFETCHER.cancel(self.session_id)
 
     def compile_report(self) -> Dict:
         if not self.responses:
@@ -313,13 +671,26 @@ class AdvancedSession:
                 "total_time": round(self.elapsed_seconds()),
             },
             "topic_breakdown": topic_breakdown,
-            "responses": self.responses,
+            "responses": [self._full_response(r) for r in self.responses],
         }
 
+    def _full_response(self, r: Dict) -> Dict:
+        """``r`` with the question fields that state saved only by ref filled back in."""
+        fields = [f for f in _QUESTION_FIELDS.get(self.mode, ()) if f not in r]
+        if not fields or "ref" not in r:
+            return r
+        question = get_question_store().get(r["ref"])
+        if question is None:
+            return r
+        return {**r, **{f: question.get(f, "") for f in fields}}
+
     def to_dict(self) -> Dict:
         active_questions = []
         for i, q in enumerate(self.questions):
             if i >= self.index:
+                if "ref" in q:
+                    active_questions.append({k: q[k] for k in SESSION_KEYS if k in q})
+                    continue
                 q_copy = dict(q)
                 q_copy.pop("test_cases", None)
                 active_questions.append(q_copy)
@@ -329,7 +700,8 @@ class AdvancedSession:
             mini_r = dict(r)
             mini_r.pop("description", None)
             mini_r.pop("complexity_analysis", None)
-            if mini_r.get("skipped", False):
+            # Skipped answers don't need them; with a ref they are in the question store.
+            if mini_r.get("skipped", False) or "ref" in mini_r:
                 mini_r.pop("buggy_code", None)
                 mini_r.pop("fixed_code", None)
                 mini_r.pop("bug_explanation", None)
@@ -346,6 +718,8 @@ class AdvancedSession:
             "ended": self.ended,
             "used_topics": self.used_topics,
             "fallback_idx": self.fallback_idx,
+            "session_id": self.session_id,
+            "bank_cursor": self.bank_cursor.to_dict(),
         }
 
     @classmethod
@@ -363,4 +737,14 @@ class AdvancedSession:
             ended=bool(data.get("ended", False)),
             used_topics=list(data.get("used_topics", [])),
             fallback_idx=int(data.get("fallback_idx", 0)),
+            session_id=data.get("session_id"),
+            bank_cursor=data.get("bank_cursor"),
         )
+
+    def to_bytes(self) -> bytes:
+        """``to_dict()`` in the compact ``state_codec`` form."""
+        return encode_state(KIND_ADVANCED, self.to_dict())
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "AdvancedSession":
+        return cls.from_dict(decode_state(blob, KIND_ADVANCED))
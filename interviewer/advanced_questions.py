@@ -2,7 +2,8 @@
 Advanced DSA questions with code snippets and debugging tasks.
 """
 from dataclasses import dataclass, field
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 import random
 
 
@@ -21,7 +22,13 @@ class AdvancedQuestion:
 
 
 def get_advanced_bank() -> List[AdvancedQuestion]:
-    return [
+    return list(_advanced_bank())
+
+
+@lru_cache(maxsize=1)
+def _advanced_bank() -> Tuple[AdvancedQuestion, ...]:
+    # Built once per process; the items are frozen dataclasses.
+    return (
         # ─── ARRAYS ───
         AdvancedQuestion(101, "Arrays", "Easy", "snippet",
             "What will this code print? Explain why.",
@@ -171,19 +178,19 @@ def get_advanced_bank() -> List[AdvancedQuestion]:
             "cpp", "Length of LCS",
             ["Strings are 0-indexed but dp is 1-indexed"],
             "Bug: a[i] and b[j] should be a[i-1] and b[j-1] because the dp table is 1-indexed but string indexing is 0-based. a[m] would be out of bounds."),
-    ]
+    )
 
 
 def get_full_advanced_bank() -> List[AdvancedQuestion]:
     """Return the built-in bank PLUS all JSON snippet questions."""
     from .snippet_loader import load_snippet_questions
-    return get_advanced_bank() + load_snippet_questions()
+    return list(_advanced_bank()) + list(load_snippet_questions())
 
 
 def get_snippet_bank(language: Optional[str] = None) -> List[AdvancedQuestion]:
     """Return ONLY the JSON snippet questions, optionally filtered by language."""
     from .snippet_loader import load_snippet_questions
-    bank = load_snippet_questions()
+    bank = list(load_snippet_questions())
     if language:
         bank = [q for q in bank if q.language.lower() == language.lower()]
     return bank
@@ -5,13 +5,25 @@ Falls back to static question bank if API is unavailable.
 """
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
 import random
-from typing import Dict, List, Optional
-
-from .ai_service import _call_gemini
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .ai_service import _acall_gemini, _call_gemini
+from .code_validation import acheck_question, check_question, check_questions
+from .deadline import Deadline
+from .json_repair import parse_model_json
+from .question_corpus import remember_question
+from .quota_scheduler import PRIORITY_GENERATION
 from .prompts import (
+    CODING_QUESTION_SCHEMA,
+    DEBUG_QUESTION_SCHEMA,
+    LOGICAL_QUESTION_SCHEMA,
+    batch_schema,
+    GENERATE_CODING_BATCH_USER,
+    GENERATE_DEBUG_BATCH_USER,
+    GENERATE_LOGICAL_BATCH_USER,
     GENERATE_DEBUG_QUESTION_SYSTEM,
     GENERATE_DEBUG_QUESTION_USER,
     GENERATE_CODING_QUESTION_SYSTEM,
@@ -55,175 +67,596 @@ def _pick_difficulty(question_number: int, total: int) -> str:
     return random.choices(DSA_DIFFICULTIES, weights=weights, k=1)[0]
 
 
+def _debug_prompt(
+    language: str,
+    used_topics: List[str],
+    question_number: int,
+    total_questions: int,
+    topic: Optional[str] = None,
+    difficulty: Optional[str] = None,
+) -> Tuple[str, str]:
+    """Return (user_prompt, difficulty) for a debugging question."""
+    difficulty = difficulty or _pick_difficulty(question_number, total_questions)
+    topic = topic or _pick_topic(used_topics)
+
+    user_prompt = GENERATE_DEBUG_QUESTION_USER.format(
+        difficulty=difficulty,
+        language=language,
+        topic=topic,
+        used_topics=", ".join(used_topics[-5:]) if used_topics else "none",
+    )
+    return user_prompt, difficulty
+
+
+# Fields every generated question needs; the rest is checked per type.
+_CORE_FIELDS = ("topic", "title", "description")
+
+
+def _parse_debug_question(raw: Optional[str], difficulty: str, language: str) -> Optional[Dict]:
+    if not raw:
+        logger.warning("AI question generation failed, using fallback")
+        return None
+
+    data = parse_model_json(raw, "debug_question", required=_CORE_FIELDS)
+    if data is None:
+        return None
+    try:
+        return _debug_from_data(data, difficulty, language)
+    except (ValueError, TypeError, KeyError) as exc:
+        logger.warning("Failed to parse AI debug question: %s", exc)
+        return None
+
+
+def _debug_from_data(data: Dict, difficulty: str, language: str) -> Optional[Dict]:
+    # Validate required fields
+    required = ["topic", "title", "difficulty", "description", "buggy_code"]
+    if not all(data.get(k) for k in required):
+        logger.warning("AI response missing required fields: %s", data.keys())
+        return None
+
+    return {
+        "type": "debug",
+        "topic": str(data["topic"]),
+        "title": str(data["title"]),
+        "difficulty": str(data.get("difficulty", difficulty)),
+        "description": str(data["description"]),
+        "buggy_code": str(data["buggy_code"]),
+        "bug_explanation": str(data.get("bug_explanation", "")),
+        "fixed_code": str(data.get("fixed_code", "")),
+        "hints": list(data.get("hints", [])),
+        "test_cases": list(data.get("test_cases", [])),
+        "language": language,
+    }
+
+
 def generate_debug_question(
     language: str,
     used_topics: List[str],
     question_number: int = 1,
     total_questions: int = 5,
+    priority: int = PRIORITY_GENERATION,
+    deadline: Optional[Deadline] = None,
+    topic: Optional[str] = None,
+    difficulty: Optional[str] = None,
 ) -> Optional[Dict]:
     """
     Generate a debugging question using AI.
     Returns a dict with topic, title, difficulty, description, buggy_code, etc.
     """
-    difficulty = _pick_difficulty(question_number, total_questions)
-    topic = _pick_topic(used_topics)
-
-    user_prompt = GENERATE_DEBUG_QUESTION_USER.format(
-        difficulty=difficulty,
-        language=language,
-        topic=topic,
-        used_topics=", ".join(used_topics[-5:]) if used_topics else "none",
+    user_prompt, difficulty = _debug_prompt(
+        language, used_topics, question_number, total_questions, topic, difficulty
     )
-
     raw = _call_gemini(
         GENERATE_DEBUG_QUESTION_SYSTEM,
         user_prompt,
         max_tokens=1024,
         temperature=0.8,
+        priority=priority,
+        deadline=deadline,
+        schema=DEBUG_QUESTION_SCHEMA,
+    )
+    question = check_question(_parse_debug_question(raw, difficulty, language))
+    remember_question(question)
+    return question
+
+
+async def agenerate_debug_question(
+    language: str,
+    used_topics: List[str],
+    question_number: int = 1,
+    total_questions: int = 5,
+    priority: int = PRIORITY_GENERATION,
+    deadline: Optional[Deadline] = None,
+    topic: Optional[str] = None,
+    difficulty: Optional[str] = None,
+) -> Optional[Dict]:
+    """Async counterpart of ``generate_debug_question``."""
+    user_prompt, difficulty = _debug_prompt(
+        language, used_topics, question_number, total_questions, topic, difficulty
+    )
+    raw = await _acall_gemini(
+        GENERATE_DEBUG_QUESTION_SYSTEM,
+        user_prompt,
+        max_tokens=1024,
+        temperature=0.8,
+        priority=priority,
+        deadline=deadline,
+        schema=DEBUG_QUESTION_SCHEMA,
     )
+    question = await acheck_question(_parse_debug_question(raw, difficulty, language))
+    remember_question(question)
+    return question
 
+
+def _coding_prompt(
+    language: str,
+    used_topics: List[str],
+    question_number: int,
+    total_questions: int,
+    topic: Optional[str] = None,
+    difficulty: Optional[str] = None,
+) -> Tuple[str, str]:
+    """Return (user_prompt, difficulty) for a coding question."""
+    difficulty = difficulty or _pick_difficulty(question_number, total_questions)
+    topic = topic or _pick_topic(used_topics)
+
+    user_prompt = GENERATE_CODING_QUESTION_USER.format(
+        difficulty=difficulty,
+        language=language,
+        topic=topic,
+        used_topics=", ".join(used_topics[-5:]) if used_topics else "none",
+    )
+    return user_prompt, difficulty
+
+
+def _parse_coding_question(raw: Optional[str], difficulty: str, language: str) -> Optional[Dict]:
     if not raw:
-        logger.warning("AI question generation failed, using fallback")
+        logger.warning("AI coding question generation failed, using fallback")
         return None
 
+    data = parse_model_json(raw, "coding_question", required=_CORE_FIELDS)
+    if data is None:
+        return None
     try:
-        text = raw.strip().replace("```json", "").replace("```", "").strip()
-        data = json.loads(text)
-
-        # Validate required fields
-        required = ["topic", "title", "difficulty", "description", "buggy_code"]
-        if not all(data.get(k) for k in required):
-            logger.warning("AI response missing required fields: %s", data.keys())
-            return None
-
-        return {
-            "type": "debug",
-            "topic": str(data["topic"]),
-            "title": str(data["title"]),
-            "difficulty": str(data.get("difficulty", difficulty)),
-            "description": str(data["description"]),
-            "buggy_code": str(data["buggy_code"]),
-            "bug_explanation": str(data.get("bug_explanation", "")),
-            "fixed_code": str(data.get("fixed_code", "")),
-            "hints": list(data.get("hints", [])),
-            "test_cases": list(data.get("test_cases", [])),
-            "language": language,
-        }
-    except (json.JSONDecodeError, ValueError, KeyError) as exc:
-        logger.warning("Failed to parse AI debug question: %s", exc)
+        return _coding_from_data(data, difficulty, language)
+    except (ValueError, TypeError, KeyError) as exc:
+        logger.warning("Failed to parse AI coding question: %s", exc)
+        return None
+
+
+def _coding_from_data(data: Dict, difficulty: str, language: str) -> Optional[Dict]:
+    required = ["topic", "title", "description", "starter_code"]
+    if not all(data.get(k) for k in required):
+        logger.warning("AI coding response missing fields: %s", data.keys())
         return None
 
+    return {
+        "type": "coding",
+        "topic": str(data["topic"]),
+        "title": str(data["title"]),
+        "difficulty": str(data.get("difficulty", difficulty)),
+        "description": str(data["description"]),
+        "examples": list(data.get("examples", [])),
+        "constraints": list(data.get("constraints", [])),
+        "starter_code": str(data["starter_code"]),
+        "solution_code": str(data.get("solution_code", "")),
+        "test_cases": list(data.get("test_cases", [])),
+        "time_complexity": str(data.get("time_complexity", "")),
+        "space_complexity": str(data.get("space_complexity", "")),
+        "language": language,
+    }
+
 
 def generate_coding_question(
     language: str,
     used_topics: List[str],
     question_number: int = 1,
     total_questions: int = 5,
+    priority: int = PRIORITY_GENERATION,
+    deadline: Optional[Deadline] = None,
+    topic: Optional[str] = None,
+    difficulty: Optional[str] = None,
 ) -> Optional[Dict]:
     """
     Generate a coding challenge using AI.
     Returns a dict with topic, title, description, starter_code, solution, test_cases, etc.
     """
-    difficulty = _pick_difficulty(question_number, total_questions)
-    topic = _pick_topic(used_topics)
-
-    user_prompt = GENERATE_CODING_QUESTION_USER.format(
-        difficulty=difficulty,
-        language=language,
-        topic=topic,
-        used_topics=", ".join(used_topics[-5:]) if used_topics else "none",
+    user_prompt, difficulty = _coding_prompt(
+        language, used_topics, question_number, total_questions, topic, difficulty
     )
-
     raw = _call_gemini(
         GENERATE_CODING_QUESTION_SYSTEM,
         user_prompt,
         max_tokens=1500,
         temperature=0.8,
+        priority=priority,
+        deadline=deadline,
+        schema=CODING_QUESTION_SCHEMA,
+    )
+    question = check_question(_parse_coding_question(raw, difficulty, language))
+    remember_question(question)
+    return question
+
+
+async def agenerate_coding_question(
+    language: str,
+    used_topics: List[str],
+    question_number: int = 1,
+    total_questions: int = 5,
+    priority: int = PRIORITY_GENERATION,
+    deadline: Optional[Deadline] = None,
+    topic: Optional[str] = None,
+    difficulty: Optional[str] = None,
+) -> Optional[Dict]:
+    """Async counterpart of ``generate_coding_question``."""
+    user_prompt, difficulty = _coding_prompt(
+        language, used_topics, question_number, total_questions, topic, difficulty
+    )
+    raw = await _acall_gemini(
+        GENERATE_CODING_QUESTION_SYSTEM,
+        user_prompt,
+        max_tokens=1500,
+        temperature=0.8,
+        priority=priority,
+        deadline=deadline,
+        schema=CODING_QUESTION_SCHEMA,
     )
+    question = await acheck_question(_parse_coding_question(raw, difficulty, language))
+    remember_question(question)
+    return question
+
 
+def _logical_prompt(
+    used_topics: List[str],
+    question_number: int,
+    total_questions: int,
+    topic: Optional[str] = None,
+    difficulty: Optional[str] = None,
+) -> Tuple[str, str]:
+    """Return (user_prompt, difficulty) for a logical question."""
+    difficulty = difficulty or _pick_difficulty(question_number, total_questions)
+    topic = topic or _pick_logical_topic(used_topics)
+
+    user_prompt = GENERATE_LOGICAL_QUESTION_USER.format(
+        difficulty=difficulty,
+        topic=topic,
+        used_topics=", ".join(used_topics[-5:]) if used_topics else "none",
+    )
+    return user_prompt, difficulty
+
+
+def _parse_logical_question(raw: Optional[str], difficulty: str) -> Optional[Dict]:
     if not raw:
-        logger.warning("AI coding question generation failed, using fallback")
+        logger.warning("AI logical question generation failed, using fallback")
         return None
 
+    data = parse_model_json(raw, "logical_question", required=_CORE_FIELDS)
+    if data is None:
+        return None
     try:
-        text = raw.strip().replace("```json", "").replace("```", "").strip()
-        data = json.loads(text)
-
-        required = ["topic", "title", "description", "starter_code"]
-        if not all(data.get(k) for k in required):
-            logger.warning("AI coding response missing fields: %s", data.keys())
-            return None
-
-        return {
-            "type": "coding",
-            "topic": str(data["topic"]),
-            "title": str(data["title"]),
-            "difficulty": str(data.get("difficulty", difficulty)),
-            "description": str(data["description"]),
-            "examples": list(data.get("examples", [])),
-            "constraints": list(data.get("constraints", [])),
-            "starter_code": str(data["starter_code"]),
-            "solution_code": str(data.get("solution_code", "")),
-            "test_cases": list(data.get("test_cases", [])),
-            "time_complexity": str(data.get("time_complexity", "")),
-            "space_complexity": str(data.get("space_complexity", "")),
-            "language": language,
-        }
-    except (json.JSONDecodeError, ValueError, KeyError) as exc:
-        logger.warning("Failed to parse AI coding question: %s", exc)
+        return _logical_from_data(data, difficulty)
+    except (ValueError, TypeError, KeyError) as exc:
+        logger.warning("Failed to parse AI logical question: %s", exc)
+        return None
+
+
+def _logical_from_data(data: Dict, difficulty: str) -> Optional[Dict]:
+    required = ["topic", "title", "description", "correct_answer"]
+    if not all(data.get(k) for k in required):
+        logger.warning("AI logical response missing fields: %s", data.keys())
         return None
 
+    return {
+        "type": "logical",
+        "topic": str(data["topic"]),
+        "title": str(data["title"]),
+        "difficulty": str(data.get("difficulty", difficulty)),
+        "description": str(data["description"]),
+        "hints": list(data.get("hints", [])),
+        "correct_answer": str(data["correct_answer"]),
+    }
+
 
 def generate_logical_question(
     used_topics: List[str],
     question_number: int = 1,
     total_questions: int = 5,
+    priority: int = PRIORITY_GENERATION,
+    deadline: Optional[Deadline] = None,
+    topic: Optional[str] = None,
+    difficulty: Optional[str] = None,
 ) -> Optional[Dict]:
     """
     Generate a logical/reasoning question using AI.
     Returns a dict with topic, title, description, correct_answer.
     """
-    difficulty = _pick_difficulty(question_number, total_questions)
-    topic = _pick_logical_topic(used_topics)
-
-    user_prompt = GENERATE_LOGICAL_QUESTION_USER.format(
-        difficulty=difficulty,
-        topic=topic,
-        used_topics=", ".join(used_topics[-5:]) if used_topics else "none",
+    user_prompt, difficulty = _logical_prompt(
+        used_topics, question_number, total_questions, topic, difficulty
     )
-
     raw = _call_gemini(
         GENERATE_LOGICAL_QUESTION_SYSTEM,
         user_prompt,
         max_tokens=1000,
         temperature=0.8,
+        priority=priority,
+        deadline=deadline,
+        schema=LOGICAL_QUESTION_SCHEMA,
     )
+    question = _parse_logical_question(raw, difficulty)
+    remember_question(question)
+    return question
 
+
+async def agenerate_logical_question(
+    used_topics: List[str],
+    question_number: int = 1,
+    total_questions: int = 5,
+    priority: int = PRIORITY_GENERATION,
+    deadline: Optional[Deadline] = None,
+    topic: Optional[str] = None,
+    difficulty: Optional[str] = None,
+) -> Optional[Dict]:
+    """Async counterpart of ``generate_logical_question``."""
+    user_prompt, difficulty = _logical_prompt(
+        used_topics, question_number, total_questions, topic, difficulty
+    )
+    raw = await _acall_gemini(
+        GENERATE_LOGICAL_QUESTION_SYSTEM,
+        user_prompt,
+        max_tokens=1000,
+        temperature=0.8,
+        priority=priority,
+        deadline=deadline,
+        schema=LOGICAL_QUESTION_SCHEMA,
+    )
+    question = _parse_logical_question(raw, difficulty)
+    remember_question(question)
+    return question
+
+
+# ═══════════════════════════════════════════════
+#  BATCH GENERATION (several questions per AI call)
+# ═══════════════════════════════════════════════
+
+# Output budget for one batch call; larger batches are still sent but may be
+# cut short, in which case the missing items fall back.
+_MAX_BATCH_TOKENS = 8192
+
+Spec = Tuple[str, str]  # (topic, difficulty)
+
+# kind -> (system prompt, user template, tokens per question, topic pool)
+_BATCH_KINDS = {
+    "debug": (GENERATE_DEBUG_QUESTION_SYSTEM, GENERATE_DEBUG_BATCH_USER, 1024, DSA_TOPICS,
+              batch_schema(DEBUG_QUESTION_SCHEMA)),
+    "coding": (GENERATE_CODING_QUESTION_SYSTEM, GENERATE_CODING_BATCH_USER, 1500, DSA_TOPICS,
+               batch_schema(CODING_QUESTION_SCHEMA)),
+    "logical": (GENERATE_LOGICAL_QUESTION_SYSTEM, GENERATE_LOGICAL_BATCH_USER, 1000, LOGICAL_TOPICS,
+                batch_schema(LOGICAL_QUESTION_SCHEMA)),
+}
+
+
+def _plan_batch(
+    count: int, used_topics: List[str], start_number: int, total_questions: int, topics: List[str]
+) -> List[Spec]:
+    """Distinct topics, unused ones first, with difficulty ramping from ``start_number``."""
+    fresh = [t for t in topics if t not in used_topics]
+    stale = [t for t in topics if t in used_topics]
+    random.shuffle(fresh)
+    random.shuffle(stale)
+    order = fresh + stale
+    return [
+        (order[i % len(order)], _pick_difficulty(start_number + i, total_questions))
+        for i in range(count)
+    ]
+
+
+def _batch_call_args(
+    kind: str,
+    language: str,
+    used_topics: List[str],
+    count: int,
+    start_number: int,
+    total_questions: int,
+    specs: Optional[List[Spec]],
+) -> Tuple[List[Spec], Dict]:
+    """Return (specs, keyword arguments for ``_call_gemini``) for a batch."""
+    system, template, tokens, topics, schema = _BATCH_KINDS[kind]
+    specs = list(specs) if specs else _plan_batch(
+        count, used_topics, start_number, total_questions, topics
+    )
+    user_prompt = template.format(
+        count=len(specs),
+        language=language,
+        items="\n".join(f"{i}. {difficulty} - {topic}" for i, (topic, difficulty) in enumerate(specs, 1)),
+        used_topics=", ".join(used_topics[-5:]) if used_topics else "none",
+    )
+    return specs, {
+        "system_prompt": system,
+        "user_prompt": user_prompt,
+        "max_tokens": min(tokens * len(specs), _MAX_BATCH_TOKENS),
+        "temperature": 0.8,
+        "schema": schema,
+    }
+
+
+def _parse_batch(
+    raw: Optional[str], specs: List[Spec], build: Callable[[Dict, str], Optional[Dict]]
+) -> List[Optional[Dict]]:
+    """Validate each returned item on its own; the result is aligned with ``specs``."""
+    results: List[Optional[Dict]] = [None] * len(specs)
     if not raw:
-        logger.warning("AI logical question generation failed, using fallback")
-        return None
+        logger.warning("AI batch question generation failed, using fallback")
+        return results
+
+    data = parse_model_json(raw, "question_batch")
+    if data is None:
+        return results
+
+    items = data.get("questions") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        logger.warning("AI question batch has no question list")
+        return results
+
+    titles = set()
+    for i, item in enumerate(items[: len(specs)]):
+        if not isinstance(item, dict):
+            continue
+        try:
+            q = build(item, specs[i][1])
+        except (ValueError, TypeError, KeyError) as exc:
+            logger.warning("Dropping malformed question %d of batch: %s", i + 1, exc)
+            continue
+        # The same question twice in one batch counts as one good item.
+        if q is None or q["title"].lower() in titles:
+            continue
+        titles.add(q["title"].lower())
+        results[i] = q
+    return results
+
+
+def _finish_batch(
+    kind: str, raw: Optional[str], specs: List[Spec], language: str, fallback: bool
+) -> List[Optional[Dict]]:
+    if kind == "debug":
+        results = _parse_batch(raw, specs, lambda data, d: _debug_from_data(data, d, language))
+        bank = _FALLBACK_DEBUG.get(language, _FALLBACK_DEBUG["python"])
+    elif kind == "coding":
+        results = _parse_batch(raw, specs, lambda data, d: _coding_from_data(data, d, language))
+        bank = _FALLBACK_CODING.get(language, _FALLBACK_CODING["python"])
+    else:
+        results = _parse_batch(raw, specs, _logical_from_data)
+        bank = _FALLBACK_LOGICAL
+    results = check_questions(results)
+    for question in results:
+        remember_question(question)
+    if not fallback:
+        return results
+
+    # Distinct fallbacks while the bank lasts.
+    unused = [q for q in bank if q["title"] not in {r["title"] for r in results if r}]
+    random.shuffle(unused)
+    for i, q in enumerate(results):
+        if q is None and bank:
+            results[i] = dict(unused.pop() if unused else random.choice(bank))
+    return results
+
+
+def generate_debug_questions(
+    language: str,
+    used_topics: List[str],
+    count: int = 5,
+    start_number: int = 1,
+    total_questions: int = 5,
+    priority: int = PRIORITY_GENERATION,
+    deadline: Optional[Deadline] = None,
+    specs: Optional[List[Spec]] = None,
+    fallback: bool = True,
+) -> List[Optional[Dict]]:
+    """
+    Generate ``count`` debugging questions over distinct topics in one AI call.
+    ``specs`` fixes each item's (topic, difficulty). Items that fail validation
+    (parsing or the execution check) are replaced by fallback questions, or
+    left as None with ``fallback=False``.
+    """
+    specs, args = _batch_call_args(
+        "debug", language, used_topics, count, start_number, total_questions, specs
+    )
+    raw = _call_gemini(**args, priority=priority, deadline=deadline)
+    return _finish_batch("debug", raw, specs, language, fallback)
+
+
+async def agenerate_debug_questions(
+    language: str,
+    used_topics: List[str],
+    count: int = 5,
+    start_number: int = 1,
+    total_questions: int = 5,
+    priority: int = PRIORITY_GENERATION,
+    deadline: Optional[Deadline] = None,
+    specs: Optional[List[Spec]] = None,
+    fallback: bool = True,
+) -> List[Optional[Dict]]:
+    """Async counterpart of ``generate_debug_questions``."""
+    specs, args = _batch_call_args(
+        "debug", language, used_topics, count, start_number, total_questions, specs
+    )
+    raw = await _acall_gemini(**args, priority=priority, deadline=deadline)
+    return await asyncio.to_thread(_finish_batch, "debug", raw, specs, language, fallback)
+
+
+def generate_coding_questions(
+    language: str,
+    used_topics: List[str],
+    count: int = 5,
+    start_number: int = 1,
+    total_questions: int = 5,
+    priority: int = PRIORITY_GENERATION,
+    deadline: Optional[Deadline] = None,
+    specs: Optional[List[Spec]] = None,
+    fallback: bool = True,
+) -> List[Optional[Dict]]:
+    """Batch counterpart of ``generate_coding_question``; see ``generate_debug_questions``."""
+    specs, args = _batch_call_args(
+        "coding", language, used_topics, count, start_number, total_questions, specs
+    )
+    raw = _call_gemini(**args, priority=priority, deadline=deadline)
+    return _finish_batch("coding", raw, specs, language, fallback)
+
+
+async def agenerate_coding_questions(
+    language: str,
+    used_topics: List[str],
+    count: int = 5,
+    start_number: int = 1,
+    total_questions: int = 5,
+    priority: int = PRIORITY_GENERATION,
+    deadline: Optional[Deadline] = None,
+    specs: Optional[List[Spec]] = None,
+    fallback: bool = True,
+) -> List[Optional[Dict]]:
+    """Async counterpart of ``generate_coding_questions``."""
+    specs, args = _batch_call_args(
+        "coding", language, used_topics, count, start_number, total_questions, specs
+    )
+    raw = await _acall_gemini(**args, priority=priority, deadline=deadline)
+    return await asyncio.to_thread(_finish_batch, "coding", raw, specs, language, fallback)
+
+
+def generate_logical_questions(
+    used_topics: List[str],
+    count: int = 5,
+    start_number: int = 1,
+    total_questions: int = 5,
+    priority: int = PRIORITY_GENERATION,
+    deadline: Optional[Deadline] = None,
+    specs: Optional[List[Spec]] = None,
+    fallback: bool = True,
+) -> List[Optional[Dict]]:
+    """Batch counterpart of ``generate_logical_question``; see ``generate_debug_questions``."""
+    specs, args = _batch_call_args(
+        "logical", "", used_topics, count, start_number, total_questions, specs
+    )
+    raw = _call_gemini(**args, priority=priority, deadline=deadline)
+    return _finish_batch("logical", raw, specs, "", fallback)
+
+
+async def agenerate_logical_questions(
+    used_topics: List[str],
+    count: int = 5,
+    start_number: int = 1,
+    total_questions: int = 5,
+    priority: int = PRIORITY_GENERATION,
+    deadline: Optional[Deadline] = None,
+    specs: Optional[List[Spec]] = None,
+    fallback: bool = True,
+) -> List[Optional[Dict]]:
+    """Async counterpart of ``generate_logical_questions``."""
+    specs, args = _batch_call_args(
+        "logical", "", used_topics, count, start_number, total_questions, specs
+    )
+    raw = await _acall_gemini(**args, priority=priority, deadline=deadline)
+    return await asyncio.to_thread(_finish_batch, "logical", raw, specs, "", fallback)
 
-    try:
-        text = raw.strip().replace("```json", "").replace("```", "").strip()
-        data = json.loads(text)
-
-        required = ["topic", "title", "description", "correct_answer"]
-        if not all(data.get(k) for k in required):
-            logger.warning("AI logical response missing fields: %s", data.keys())
-            return None
-
-        return {
-            "type": "logical",
-            "topic": str(data["topic"]),
-            "title": str(data["title"]),
-            "difficulty": str(data.get("difficulty", difficulty)),
-            "description": str(data["description"]),
-            "hints": list(data.get("hints", [])),
-            "correct_answer": str(data["correct_answer"]),
-        }
-    except (json.JSONDecodeError, ValueError, KeyError) as exc:
-        logger.warning("Failed to parse AI logical question: %s", exc)
-        return None
 
 # ═══════════════════════════════════════════════
 #  FALLBACK QUESTIONS (when AI is unavailable)
@@ -425,28 +858,29 @@ _FALLBACK_LOGICAL = [
 ]
 
 
+def _pick_unused(bank: List[Dict], used_indices: List[int]) -> Optional[Dict]:
+    """Random item whose index is not in ``used_indices`` (any item once all are used)."""
+    if not bank:
+        return None
+    used = {i for i in used_indices if 0 <= i < len(bank)}
+    if len(used) >= len(bank):
+        return random.choice(bank)
+    while True:
+        i = random.randrange(len(bank))
+        if i not in used:
+            return bank[i]
+
+
 def get_fallback_debug(language: str, used_indices: List[int]) -> Optional[Dict]:
     """Return a fallback debug question for the given language."""
-    bank = _FALLBACK_DEBUG.get(language, _FALLBACK_DEBUG["python"])
-    available = [q for i, q in enumerate(bank) if i not in used_indices]
-    if not available:
-        available = bank
-    return random.choice(available) if available else None
+    return _pick_unused(_FALLBACK_DEBUG.get(language, _FALLBACK_DEBUG["python"]), used_indices)
 
 
 def get_fallback_coding(language: str, used_indices: List[int]) -> Optional[Dict]:
     """Return a fallback coding question for the given language."""
-    bank = _FALLBACK_CODING.get(language, _FALLBACK_CODING["python"])
-    available = [q for i, q in enumerate(bank) if i not in used_indices]
-    if not available:
-        available = bank
-    return random.choice(available) if available else None
+    return _pick_unused(_FALLBACK_CODING.get(language, _FALLBACK_CODING["python"]), used_indices)
 
 
 def get_fallback_logical(used_indices: List[int]) -> Optional[Dict]:
     """Return a fallback logical question."""
-    bank = _FALLBACK_LOGICAL
-    available = [q for i, q in enumerate(bank) if i not in used_indices]
-    if not available:
-        available = bank
-    return random.choice(available) if available else None
+    return _pick_unused(_FALLBACK_LOGICAL, used_indices)
@@ -2,17 +2,386 @@
 AI evaluation service using Google Gemini.
 Supports answer evaluation, code evaluation, and question generation.
 Falls back to keyword-based evaluation if the API key is not set or the call fails.
+
+Requests go through a pluggable provider (see ``llm_providers``): the Gemini
+API by default, or an offline fake with ``LLM_PROVIDER=fake``.
+
+Every entry point has an ``async`` counterpart (``_acall_gemini``,
+``aevaluate_with_ai``, ``aevaluate_code_with_ai``) for use from async views.
+
+Evaluation responses are cached by a hash of the rendered prompt, so an
+identical (question, answer) pair is only graded upstream once.
+
+Upstream calls go through a circuit breaker: transient 429/5xx errors are
+retried with jittered backoff, and while Gemini is failing callers skip the
+request entirely and use their fallback path straight away.
+
+Identical requests that are in flight at the same time are coalesced into a
+single upstream call whose response every caller shares. Optionally, slow
+requests are hedged with a duplicate to trim tail latency.
+
+A priority-aware quota scheduler sits in front of the upstream: candidate-
+facing grading goes first, then question generation, then background work.
+If the queue wait would be too long, the call returns None at once and the
+caller uses its fallback.
+
+``astream_answer_evaluation`` / ``astream_code_evaluation`` stream an
+evaluation field by field for the SSE feedback endpoint.
 """
 from __future__ import annotations
 
+import asyncio
+import http.client
 import json
 import logging
 import os
-from typing import Dict, Optional
+import tempfile
+import threading
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from .deadline import Deadline
+from .hedging import HedgePolicy
+from .http_pool import AsyncHTTPConnectionPool, HTTPConnectionPool, HTTPStatusError, PooledResponse
+from .llm_cache import TieredCache, build_cache, make_cache_key
+from .llm_providers import FakeProvider, GeminiProvider, LatencyModel, LLMProvider
+from .json_repair import parse_model_json
+from .prompts import ANSWER_EVAL_SCHEMA, CODE_EVAL_SCHEMA, PROMPT_VERSION
+from .quota_scheduler import PRIORITY_BACKGROUND, PRIORITY_GENERATION, PRIORITY_INTERACTIVE, QuotaScheduler
+from .resilience import CircuitBreaker, RetryPolicy
+from .single_flight import AsyncSingleFlight, SingleFlight, SingleFlightTimeout
+from .streaming import JSONFieldStream, SSEDecoder
 
 logger = logging.getLogger(__name__)
 
 GEMINI_API_KEY: Optional[str] = os.environ.get("GEMINI_API_KEY")
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta")
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.0-flash")
+# "gemini", or "fake" for the in-process offline backend.
+LLM_PROVIDER = os.environ.get("LLM_PROVIDER", "gemini").strip().lower()
+
+_POOL_OPTIONS = {
+    "maxsize": int(os.environ.get("GEMINI_POOL_MAXSIZE", "8")),
+    "connect_timeout": float(os.environ.get("GEMINI_CONNECT_TIMEOUT", "5")),
+    "read_timeout": float(os.environ.get("GEMINI_READ_TIMEOUT", "20")),
+}
+
+# One keep-alive pool shared by every Gemini caller in the process.
+_HTTP_POOL = HTTPConnectionPool(**_POOL_OPTIONS)
+_ASYNC_HTTP_POOL = AsyncHTTPConnectionPool(**_POOL_OPTIONS)
+
+
+def _build_provider() -> LLMProvider:
+    if LLM_PROVIDER == "fake":
+        latency = LatencyModel(
+            median=float(os.environ.get("LLM_FAKE_LATENCY_MEDIAN", "0.8")),
+            p99=float(os.environ.get("LLM_FAKE_LATENCY_P99", "4")),
+        )
+        seed = os.environ.get("LLM_FAKE_SEED")
+        return FakeProvider(
+            latency,
+            error_rate=float(os.environ.get("LLM_FAKE_ERROR_RATE", "0")),
+            seed=int(seed) if seed else None,
+        )
+    return GeminiProvider(
+        GEMINI_API_KEY, _HTTP_POOL, _ASYNC_HTTP_POOL, base_url=GEMINI_BASE_URL, model=GEMINI_MODEL
+    )
+
+
+_PROVIDER = _build_provider()
+
+
+def provider_ready() -> bool:
+    """True if the active provider can serve requests (e.g. has an API key)."""
+    return _PROVIDER.ready()
+
+
+def get_provider_stats() -> Dict[str, object]:
+    """Return the active provider's name and counters."""
+    return _PROVIDER.stats()
+
+
+def get_pool_stats() -> Dict[str, int]:
+    """Return hit/miss counters for the shared Gemini connection pool."""
+    return _HTTP_POOL.stats()
+
+
+def get_async_pool_stats() -> Dict[str, int]:
+    """Return hit/miss counters for the asyncio Gemini client."""
+    return _ASYNC_HTTP_POOL.stats()
+
+
+_BREAKER = CircuitBreaker(
+    failure_ratio=float(os.environ.get("GEMINI_BREAKER_FAILURE_RATIO", "0.5")),
+    min_calls=int(os.environ.get("GEMINI_BREAKER_MIN_CALLS", "5")),
+    window_seconds=float(os.environ.get("GEMINI_BREAKER_WINDOW", "60")),
+    reset_timeout=float(os.environ.get("GEMINI_BREAKER_RESET", "30")),
+    half_open_probes=int(os.environ.get("GEMINI_BREAKER_PROBES", "1")),
+    slow_call_seconds=float(os.environ.get("GEMINI_BREAKER_SLOW_CALL", "10")),
+)
+_RETRY = RetryPolicy(
+    max_attempts=int(os.environ.get("GEMINI_RETRY_ATTEMPTS", "3")),
+    base_delay=float(os.environ.get("GEMINI_RETRY_BASE_DELAY", "0.25")),
+    max_delay=float(os.environ.get("GEMINI_RETRY_MAX_DELAY", "2")),
+)
+
+# Connection-level errors worth retrying. Timeouts are not retried: the
+# caller has already waited the full read timeout once.
+_TRANSIENT_ERRORS = (ConnectionError, http.client.HTTPException)
+
+
+def get_breaker_stats() -> Dict[str, object]:
+    """Return circuit state, rejection counts and recent latency percentiles."""
+    return _BREAKER.stats()
+
+
+_HEDGE = HedgePolicy(
+    _BREAKER.window,
+    enabled=os.environ.get("GEMINI_HEDGE_ENABLED", "false").strip().lower() in {"1", "true", "yes", "on"},
+    percentile=float(os.environ.get("GEMINI_HEDGE_PERCENTILE", "95")),
+    budget_per_minute=int(os.environ.get("GEMINI_HEDGE_BUDGET_PER_MIN", "10")),
+    min_samples=int(os.environ.get("GEMINI_HEDGE_MIN_SAMPLES", "20")),
+    max_workers=_POOL_OPTIONS["maxsize"] * 2,
+)
+
+
+def get_hedge_stats() -> Dict[str, object]:
+    """Return hedge counts, win rate and the current hedge delay."""
+    return _HEDGE.stats()
+
+
+_QUOTA = QuotaScheduler(
+    requests_per_minute=float(os.environ.get("GEMINI_RPM_LIMIT", "0")),
+    tokens_per_minute=float(os.environ.get("GEMINI_TPM_LIMIT", "0")),
+)
+
+
+def get_quota_stats() -> Dict[str, object]:
+    """Return queue depth, bucket levels and per-priority grant counts."""
+    return _QUOTA.stats()
+
+
+def estimate_quota_wait(
+    system_prompt: str,
+    user_prompt: str,
+    max_tokens: int = 512,
+    priority: int = PRIORITY_GENERATION,
+) -> float:
+    """Seconds a call like this would currently wait for upstream quota."""
+    return _QUOTA.estimate_wait(_estimate_tokens(system_prompt, user_prompt, max_tokens), priority)
+
+
+def _estimate_tokens(system_prompt: str, user_prompt: str, max_tokens: int) -> int:
+    # Roughly four characters per token for the prompt, plus the output cap.
+    return (len(system_prompt) + len(user_prompt)) // 4 + max_tokens
+
+
+# Callers that join an identical in-flight request wait at most this long.
+GEMINI_SINGLE_FLIGHT_MAX_WAIT = float(os.environ.get("GEMINI_SINGLE_FLIGHT_MAX_WAIT", "25"))
+_SINGLE_FLIGHT = SingleFlight(max_wait=GEMINI_SINGLE_FLIGHT_MAX_WAIT)
+_ASYNC_SINGLE_FLIGHT = AsyncSingleFlight(max_wait=GEMINI_SINGLE_FLIGHT_MAX_WAIT)
+
+
+def get_single_flight_stats() -> Dict[str, Dict[str, int]]:
+    """Return leader/coalesced/timeout counters for request coalescing."""
+    return {"threads": _SINGLE_FLIGHT.stats(), "async": _ASYNC_SINGLE_FLIGHT.stats()}
+
+
+# Response cache. Set LLM_CACHE_PATH to an empty string to keep it memory-only.
+LLM_CACHE_MAXSIZE = int(os.environ.get("LLM_CACHE_MAXSIZE", "1024"))
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", str(24 * 60 * 60)))
+LLM_CACHE_PATH = os.environ.get(
+    "LLM_CACHE_PATH", os.path.join(tempfile.gettempdir(), "mock_interviewer_llm_cache.sqlite3")
+)
+
+_response_cache: Optional[TieredCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def _get_response_cache() -> TieredCache:
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = build_cache(LLM_CACHE_MAXSIZE, LLM_CACHE_TTL, LLM_CACHE_PATH)
+    return _response_cache
+
+
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Return hit/miss/eviction counters for each response cache tier."""
+    return _get_response_cache().stats()
+
+
+def _request_fingerprint(
+    system_prompt: str,
+    user_prompt: str,
+    max_tokens: int,
+    temperature: float,
+    schema: Optional[Dict] = None,
+) -> str:
+    """Key shared by the response cache and request coalescing."""
+    return make_cache_key(
+        PROMPT_VERSION, _PROVIDER.cache_namespace, system_prompt, user_prompt, max_tokens, temperature, schema
+    )
+
+
+def _gemini_text(resp: PooledResponse) -> Optional[str]:
+    """Text of a successful response, or None for an error status."""
+    if resp.status >= 400:
+        logger.warning("Gemini API returned HTTP %d", resp.status)
+        return None
+    return _PROVIDER.decode(resp)
+
+
+def _settle_attempt(
+    resp: Optional[PooledResponse],
+    error: Optional[Exception],
+    attempt: int,
+    latency: float,
+) -> Optional[float]:
+    """
+    Record one upstream attempt with the breaker.
+    Returns the backoff delay if the attempt should be retried, else None.
+    """
+    if error is not None:
+        _BREAKER.record(False, latency)
+        logger.warning("Gemini API call failed: %s", error)
+        transient = isinstance(error, _TRANSIENT_ERRORS)
+    elif resp.status in _RETRY.retry_statuses:
+        _BREAKER.record(False, latency)
+        logger.warning("Gemini API returned HTTP %d (attempt %d)", resp.status, attempt + 1)
+        transient = True
+    else:
+        # Other 4xx responses are our own fault, not an upstream outage.
+        _BREAKER.record(True, latency)
+        return None
+
+    if not transient or attempt + 1 >= _RETRY.max_attempts:
+        return None
+    return _RETRY.delay(attempt, resp.headers.get("retry-after") if resp else None)
+
+
+def _succeeded(resp: PooledResponse) -> bool:
+    """A hedged leg only wins with a 2xx; a fast 429/5xx waits for the other leg."""
+    return 200 <= resp.status < 300
+
+
+def _admit_hedge(call: "_UpstreamCall") -> bool:
+    """Charge a hedge's duplicate request to the quota, without waiting; no quota, no hedge."""
+    return _QUOTA.acquire(call.tokens, PRIORITY_BACKGROUND, max_wait=0)
+
+
+@dataclass
+class _UpstreamCall:
+    """One logical Gemini request as it moves through the call pipeline."""
+
+    body: bytes
+    tokens: int
+    priority: int
+    deadline: Optional[Deadline] = None
+
+    def out_of_budget(self) -> bool:
+        return self.deadline is not None and self.deadline.upstream_timeout() is None
+
+    def timeout(self) -> Optional[float]:
+        """Per-attempt timeout: the rest of the request budget, or the pool default."""
+        return self.deadline.upstream_timeout() if self.deadline else None
+
+    def quota_wait(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return min(_QUOTA.max_wait.get(self.priority, 0.0), self.deadline.upstream_timeout() or 0.0)
+
+
+def _begin_attempt(call: _UpstreamCall, granted: bool) -> bool:
+    """Final checks before an attempt, after the breaker let it through."""
+    if not granted:
+        _BREAKER.release()
+        logger.info("Gemini quota wait too long; skipping upstream call")
+        return False
+    if call.out_of_budget():
+        _BREAKER.release()
+        logger.info("Request budget spent; skipping Gemini call")
+        return False
+    return True
+
+
+def _send_gemini(call: _UpstreamCall) -> Optional[PooledResponse]:
+    """POST to Gemini through the breaker and quota scheduler, retrying transient errors."""
+    for attempt in range(_RETRY.max_attempts):
+        if call.out_of_budget():
+            logger.info("Request budget spent; skipping Gemini call")
+            return None
+        if not _BREAKER.allow():
+            logger.info("Gemini circuit is open; skipping upstream call")
+            return None
+        if not _begin_attempt(call, _QUOTA.acquire(call.tokens, call.priority, call.quota_wait())):
+            return None
+        timeout = call.timeout()
+        started = time.monotonic()
+        resp, error = None, None
+        try:
+            resp = _HEDGE.run(
+                lambda: _PROVIDER.send(call.body, timeout), _succeeded, lambda: _admit_hedge(call)
+            )
+        except Exception as exc:
+            error = exc
+        delay = _settle_attempt(resp, error, attempt, time.monotonic() - started)
+        if delay is None:
+            return resp
+        if call.deadline is not None and delay >= call.deadline.remaining():
+            return None
+        time.sleep(delay)
+    return None
+
+
+async def _asend_gemini(call: _UpstreamCall) -> Optional[PooledResponse]:
+    """Async counterpart of ``_send_gemini``."""
+    for attempt in range(_RETRY.max_attempts):
+        if call.out_of_budget():
+            logger.info("Request budget spent; skipping Gemini call")
+            return None
+        if not _BREAKER.allow():
+            logger.info("Gemini circuit is open; skipping upstream call")
+            return None
+        granted = await _QUOTA.aacquire(call.tokens, call.priority, call.quota_wait())
+        if not _begin_attempt(call, granted):
+            return None
+        timeout = call.timeout()
+        started = time.monotonic()
+        resp, error = None, None
+        try:
+            resp = await _HEDGE.arun(
+                lambda: _PROVIDER.asend(call.body, timeout), _succeeded, lambda: _admit_hedge(call)
+            )
+        except Exception as exc:
+            error = exc
+        delay = _settle_attempt(resp, error, attempt, time.monotonic() - started)
+        if delay is None:
+            return resp
+        if call.deadline is not None and delay >= call.deadline.remaining():
+            return None
+        await asyncio.sleep(delay)
+    return None
+
+
+def _fetch_text(call: _UpstreamCall) -> Optional[str]:
+    resp = _send_gemini(call)
+    return _gemini_text(resp) if resp else None
+
+
+async def _afetch_text(call: _UpstreamCall) -> Optional[str]:
+    resp = await _asend_gemini(call)
+    return _gemini_text(resp) if resp else None
+
+
+def _follower_wait(deadline: Optional[Deadline]) -> Optional[float]:
+    """How long a coalesced follower may wait for the leader's result."""
+    if deadline is None:
+        return None
+    return deadline.upstream_timeout() or 0.0
 
 
 def _call_gemini(
@@ -20,102 +389,180 @@ def _call_gemini(
     user_prompt: str,
     max_tokens: int = 512,
     temperature: float = 0.1,
+    cache: bool = False,
+    priority: int = PRIORITY_GENERATION,
+    deadline: Optional[Deadline] = None,
+    schema: Optional[Dict] = None,
 ) -> Optional[str]:
-    """Call the Gemini API and return the text response, or None on failure."""
-    if not GEMINI_API_KEY:
+    """
+    Call the Gemini API and return the text response, or None on failure.
+    With ``cache=True`` identical requests are answered from the response cache.
+    ``priority`` is the quota scheduler class (see ``quota_scheduler``).
+    With a ``deadline`` the call only uses what is left of the request budget.
+    ``schema`` is sent as Gemini's response schema to constrain the JSON reply.
+    """
+    if not _PROVIDER.ready():
         return None
 
+    key = _request_fingerprint(system_prompt, user_prompt, max_tokens, temperature, schema)
+    if cache:
+        hit = _get_response_cache().get(key)
+        if hit is not None:
+            return hit
+
+    call = _UpstreamCall(
+        body=_PROVIDER.encode(system_prompt, user_prompt, max_tokens, temperature, schema),
+        tokens=_estimate_tokens(system_prompt, user_prompt, max_tokens),
+        priority=priority,
+        deadline=deadline,
+    )
     try:
-        import urllib.request
-        import urllib.error
+        text = _SINGLE_FLIGHT.do(key, lambda: _fetch_text(call), _follower_wait(deadline))
+        if cache and text:
+            _get_response_cache().set(key, text)
+        return text
+    except SingleFlightTimeout:
+        logger.warning("Gave up waiting on a coalesced Gemini request")
+    except Exception as exc:
+        logger.warning("Gemini API call failed: %s", exc)
 
-        url = (
-            f"https://generativelanguage.googleapis.com/v1beta/models/"
-            f"gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
-        )
-        payload = json.dumps({
-            "system_instruction": {
-                "parts": [{"text": system_prompt}]
-            },
-            "contents": [
-                {
-                    "role": "user",
-                    "parts": [{"text": user_prompt}],
-                }
-            ],
-            "generationConfig": {
-                "temperature": temperature,
-                "maxOutputTokens": max_tokens,
-                "response_mime_type": "application/json",
-            },
-        })
-
-        req = urllib.request.Request(
-            url,
-            data=payload.encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
+    return None
 
-        with urllib.request.urlopen(req, timeout=20) as resp:
-            body = json.loads(resp.read().decode("utf-8"))
 
-        candidates = body.get("candidates", [])
-        if candidates:
-            parts = candidates[0].get("content", {}).get("parts", [])
-            if parts:
-                return parts[0].get("text", "")
+async def _acall_gemini(
+    system_prompt: str,
+    user_prompt: str,
+    max_tokens: int = 512,
+    temperature: float = 0.1,
+    cache: bool = False,
+    priority: int = PRIORITY_GENERATION,
+    deadline: Optional[Deadline] = None,
+    schema: Optional[Dict] = None,
+) -> Optional[str]:
+    """Async counterpart of ``_call_gemini`` using the asyncio client."""
+    if not _PROVIDER.ready():
+        return None
+
+    key = _request_fingerprint(system_prompt, user_prompt, max_tokens, temperature, schema)
+    if cache:
+        hit = _get_response_cache().get(key)
+        if hit is not None:
+            return hit
+
+    call = _UpstreamCall(
+        body=_PROVIDER.encode(system_prompt, user_prompt, max_tokens, temperature, schema),
+        tokens=_estimate_tokens(system_prompt, user_prompt, max_tokens),
+        priority=priority,
+        deadline=deadline,
+    )
+    try:
+        text = await _ASYNC_SINGLE_FLIGHT.do(
+            key, lambda: _afetch_text(call), _follower_wait(deadline)
+        )
+        if cache and text:
+            _get_response_cache().set(key, text)
+        return text
+    except SingleFlightTimeout:
+        logger.warning("Gave up waiting on a coalesced Gemini request")
     except Exception as exc:
         logger.warning("Gemini API call failed: %s", exc)
 
     return None
 
 
-def evaluate_with_ai(topic: str, question: str, answer: str) -> Optional[Dict[str, object]]:
-    """
-    Use Gemini to evaluate an answer.
-    Returns a dict with score/feedback/matched_concepts/strengths/improvement,
-    or None if AI evaluation is unavailable.
-    """
-    from .prompts import EVALUATE_ANSWER_SYSTEM, EVALUATE_ANSWER_USER
+def _answer_eval_prompt(topic: str, question: str, answer: str) -> str:
+    from .prompts import EVALUATE_ANSWER_USER
 
-    user_prompt = EVALUATE_ANSWER_USER.format(
-        topic=topic, question=question, answer=answer
+    return EVALUATE_ANSWER_USER.format(
+        topic=topic, question=question, answer=answer.strip()
     )
-    raw = _call_gemini(EVALUATE_ANSWER_SYSTEM, user_prompt)
+
+
+def _score(value) -> int:
+    return max(0, min(10, int(value)))
+
+
+# Model field -> (result key, coercion, default), in the order the prompts ask for them.
+_ANSWER_EVAL_FIELDS = {
+    "score": ("score", _score, 0),
+    "feedback": ("feedback", str, ""),
+    "matched_concepts": ("matched_keywords", list, []),
+    "strengths": ("strengths", str, ""),
+    "improvement": ("improvement", str, ""),
+}
+
+_CODE_EVAL_FIELDS = {
+    "score": ("score", _score, 0),
+    "passed_tests": ("passed_tests", int, 0),
+    "total_tests": ("total_tests", int, 0),
+    "feedback": ("feedback", str, ""),
+    "strengths": ("strengths", str, ""),
+    "improvement": ("improvement", str, ""),
+    "bugs_found": ("bugs_found", list, []),
+    "complexity_analysis": ("complexity_analysis", str, ""),
+}
+
+
+def _coerce_fields(result: Dict, fields: Dict, **defaults) -> Dict[str, object]:
+    return {
+        key: coerce(result.get(name, defaults.get(key, default)))
+        for name, (key, coerce, default) in fields.items()
+    }
+
+
+def _parse_answer_eval(raw: Optional[str]) -> Optional[Dict[str, object]]:
     if not raw:
         return None
 
+    data = parse_model_json(raw, "answer_eval", required=("score",))
+    if data is None:
+        return None
     try:
-        text = raw.strip().replace("```json", "").replace("```", "").strip()
-        result = json.loads(text)
-        score = int(result.get("score", 0))
-        score = max(0, min(10, score))
-        return {
-            "score": score,
-            "feedback": str(result.get("feedback", "")),
-            "matched_keywords": list(result.get("matched_concepts", [])),
-            "strengths": str(result.get("strengths", "")),
-            "improvement": str(result.get("improvement", "")),
-        }
-    except (json.JSONDecodeError, ValueError, KeyError) as exc:
+        return _coerce_fields(data, _ANSWER_EVAL_FIELDS)
+    except (TypeError, ValueError) as exc:
         logger.warning("Failed to parse Gemini eval response: %s", exc)
         return None
 
 
-def evaluate_code_with_ai(
+def evaluate_with_ai(
+    topic: str, question: str, answer: str, deadline: Optional[Deadline] = None
+) -> Optional[Dict[str, object]]:
+    """
+    Use Gemini to evaluate an answer.
+    Returns a dict with score/feedback/matched_concepts/strengths/improvement,
+    or None if AI evaluation is unavailable.
+    """
+    from .prompts import EVALUATE_ANSWER_SYSTEM
+
+    raw = _call_gemini(
+        EVALUATE_ANSWER_SYSTEM, _answer_eval_prompt(topic, question, answer),
+        cache=True, priority=PRIORITY_INTERACTIVE, deadline=deadline, schema=ANSWER_EVAL_SCHEMA,
+    )
+    return _parse_answer_eval(raw)
+
+
+async def aevaluate_with_ai(
+    topic: str, question: str, answer: str, deadline: Optional[Deadline] = None
+) -> Optional[Dict[str, object]]:
+    """Async counterpart of ``evaluate_with_ai``."""
+    from .prompts import EVALUATE_ANSWER_SYSTEM
+
+    raw = await _acall_gemini(
+        EVALUATE_ANSWER_SYSTEM, _answer_eval_prompt(topic, question, answer),
+        cache=True, priority=PRIORITY_INTERACTIVE, deadline=deadline, schema=ANSWER_EVAL_SCHEMA,
+    )
+    return _parse_answer_eval(raw)
+
+
+def _code_eval_prompt(
     problem_description: str,
     language: str,
     submitted_code: str,
     test_cases: list,
-    original_code: str = "",
-    question_type: str = "coding",
-) -> Optional[Dict]:
-    """
-    Use Gemini to evaluate submitted code against a problem.
-    Works for both debug fixes and coding solutions.
-    """
-    from .prompts import EVALUATE_CODE_SYSTEM, EVALUATE_CODE_USER
+    original_code: str,
+    question_type: str,
+) -> str:
+    from .prompts import EVALUATE_CODE_USER
 
     if question_type == "debug":
         original_section = f"Original Buggy Code:\n```{language}\n{original_code}\n```"
@@ -127,33 +574,194 @@ def evaluate_code_with_ai(
         for tc in test_cases[:5]
     )
 
-    user_prompt = EVALUATE_CODE_USER.format(
+    return EVALUATE_CODE_USER.format(
         problem_description=problem_description,
         language=language,
         original_code_section=original_section,
-        submitted_code=submitted_code,
+        submitted_code=submitted_code.strip(),
         test_cases=tc_text or "No specific test cases provided.",
     )
 
-    raw = _call_gemini(EVALUATE_CODE_SYSTEM, user_prompt, max_tokens=800)
+
+def _parse_code_eval(raw: Optional[str], test_cases: list) -> Optional[Dict]:
     if not raw:
         return None
 
+    data = parse_model_json(raw, "code_eval", required=("score",))
+    if data is None:
+        return None
     try:
-        text = raw.strip().replace("```json", "").replace("```", "").strip()
-        result = json.loads(text)
-        score = int(result.get("score", 0))
-        score = max(0, min(10, score))
-        return {
-            "score": score,
-            "passed_tests": int(result.get("passed_tests", 0)),
-            "total_tests": int(result.get("total_tests", len(test_cases))),
-            "feedback": str(result.get("feedback", "")),
-            "strengths": str(result.get("strengths", "")),
-            "improvement": str(result.get("improvement", "")),
-            "bugs_found": list(result.get("bugs_found", [])),
-            "complexity_analysis": str(result.get("complexity_analysis", "")),
-        }
-    except (json.JSONDecodeError, ValueError, KeyError) as exc:
+        return _coerce_fields(data, _CODE_EVAL_FIELDS, total_tests=len(test_cases))
+    except (TypeError, ValueError) as exc:
         logger.warning("Failed to parse code eval response: %s", exc)
         return None
+
+
+def evaluate_code_with_ai(
+    problem_description: str,
+    language: str,
+    submitted_code: str,
+    test_cases: list,
+    original_code: str = "",
+    question_type: str = "coding",
+    deadline: Optional[Deadline] = None,
+) -> Optional[Dict]:
+    """
+    Use Gemini to evaluate submitted code against a problem.
+    Works for both debug fixes and coding solutions.
+    """
+    from .prompts import EVALUATE_CODE_SYSTEM
+
+    user_prompt = _code_eval_prompt(
+        problem_description, language, submitted_code, test_cases, original_code, question_type
+    )
+    raw = _call_gemini(
+        EVALUATE_CODE_SYSTEM, user_prompt, max_tokens=800,
+        cache=True, priority=PRIORITY_INTERACTIVE, deadline=deadline, schema=CODE_EVAL_SCHEMA,
+    )
+    return _parse_code_eval(raw, test_cases)
+
+
+async def aevaluate_code_with_ai(
+    problem_description: str,
+    language: str,
+    submitted_code: str,
+    test_cases: list,
+    original_code: str = "",
+    question_type: str = "coding",
+    deadline: Optional[Deadline] = None,
+) -> Optional[Dict]:
+    """Async counterpart of ``evaluate_code_with_ai``."""
+    from .prompts import EVALUATE_CODE_SYSTEM
+
+    user_prompt = _code_eval_prompt(
+        problem_description, language, submitted_code, test_cases, original_code, question_type
+    )
+    raw = await _acall_gemini(
+        EVALUATE_CODE_SYSTEM, user_prompt, max_tokens=800,
+        cache=True, priority=PRIORITY_INTERACTIVE, deadline=deadline, schema=CODE_EVAL_SCHEMA,
+    )
+    return _parse_code_eval(raw, test_cases)
+
+
+# ═══════════════════════════════════
+#  STREAMING EVALUATION
+# ═══════════════════════════════════
+
+async def _astream_gemini(system_prompt: str, user_prompt: str, call: _UpstreamCall) -> AsyncIterator[str]:
+    """
+    Yield text fragments from ``streamGenerateContent`` as Gemini produces them.
+    Not retried or hedged: once text has been handed on it cannot be replayed.
+    """
+    if call.out_of_budget() or not _BREAKER.allow():
+        return
+    if not _begin_attempt(call, await _QUOTA.aacquire(call.tokens, call.priority, call.quota_wait())):
+        return
+
+    started = time.monotonic()
+    events = SSEDecoder()
+    body = _PROVIDER.astream(call.body, call.timeout())
+    try:
+        async with aclosing(body):
+            async for chunk in body:
+                for data in events.feed(chunk):
+                    text = _PROVIDER.decode_event(json.loads(data))
+                    if text:
+                        yield text
+    except HTTPStatusError as exc:
+        status = exc.response.status
+        _BREAKER.record(status not in _RETRY.retry_statuses, time.monotonic() - started)
+        logger.warning("Gemini stream returned HTTP %d", status)
+        return
+    except Exception as exc:
+        _BREAKER.record(False, time.monotonic() - started)
+        logger.warning("Gemini stream failed: %s", exc)
+        return
+    except BaseException:
+        # The consumer went away (client disconnect); not the upstream's fault.
+        _BREAKER.release()
+        raise
+    _BREAKER.record(True, time.monotonic() - started)
+
+
+async def _astream_fields(
+    system_prompt: str,
+    user_prompt: str,
+    max_tokens: int,
+    fields: Dict,
+    schema: Dict,
+    deadline: Optional[Deadline],
+) -> AsyncIterator[Tuple[str, object]]:
+    if not _PROVIDER.ready():
+        return
+
+    key = _request_fingerprint(system_prompt, user_prompt, max_tokens, 0.1, schema)
+    cached = _get_response_cache().get(key)
+    if cached is not None:
+        pieces = _aiter_one(cached)
+    else:
+        pieces = _astream_gemini(system_prompt, user_prompt, _UpstreamCall(
+            body=_PROVIDER.encode(system_prompt, user_prompt, max_tokens, 0.1, schema),
+            tokens=_estimate_tokens(system_prompt, user_prompt, max_tokens),
+            priority=PRIORITY_INTERACTIVE,
+            deadline=deadline,
+        ))
+
+    parser = JSONFieldStream()
+    text = []
+    async with aclosing(pieces):
+        async for piece in pieces:
+            text.append(piece)
+            for name, value in parser.feed(piece):
+                if name not in fields:
+                    continue
+                result_key, coerce, _ = fields[name]
+                try:
+                    value = coerce(value)
+                except (TypeError, ValueError):
+                    continue
+                yield result_key, value
+
+    # Cache the full reply under the same key as the non-streaming call, so the
+    # follow-up request that records the answer is served without a second call.
+    if cached is None and parser.complete:
+        _get_response_cache().set(key, "".join(text))
+
+
+async def _aiter_one(value: str) -> AsyncIterator[str]:
+    yield value
+
+
+def astream_answer_evaluation(
+    topic: str, question: str, answer: str, deadline: Optional[Deadline] = None
+) -> AsyncIterator[Tuple[str, object]]:
+    """
+    Streaming counterpart of ``aevaluate_with_ai``: yields ``(field, value)``
+    pairs as each one is complete. Yields nothing if AI evaluation is unavailable.
+    """
+    from .prompts import EVALUATE_ANSWER_SYSTEM
+
+    return _astream_fields(
+        EVALUATE_ANSWER_SYSTEM, _answer_eval_prompt(topic, question, answer),
+        512, _ANSWER_EVAL_FIELDS, ANSWER_EVAL_SCHEMA, deadline,
+    )
+
+
+def astream_code_evaluation(
+    problem_description: str,
+    language: str,
+    submitted_code: str,
+    test_cases: list,
+    original_code: str = "",
+    question_type: str = "coding",
+    deadline: Optional[Deadline] = None,
+) -> AsyncIterator[Tuple[str, object]]:
+    """Streaming counterpart of ``aevaluate_code_with_ai``."""
+    from .prompts import EVALUATE_CODE_SYSTEM
+
+    user_prompt = _code_eval_prompt(
+        problem_description, language, submitted_code, test_cases, original_code, question_type
+    )
+    return _astream_fields(
+        EVALUATE_CODE_SYSTEM, user_prompt, 800, _CODE_EVAL_FIELDS, CODE_EVAL_SCHEMA, deadline
+    )
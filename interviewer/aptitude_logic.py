@@ -1,8 +1,11 @@
 import time
 import json
 import logging
+import random
+import zlib
 from typing import Dict, List, Optional
 from .ai_service import _call_gemini
+from .state_codec import KIND_APTITUDE, decode_state, encode_state
 
 logger = logging.getLogger(__name__)
 
@@ -159,16 +162,50 @@ HARDCODED_QUESTIONS = [
     }
 ]
 
+def _bank_version(questions: List[Dict]) -> int:
+    """Checksum of everything a saved plan relies on: ids, prompts, options and answers."""
+    fields = [[q["id"], q["prompt"], q["options"], q["answer"]] for q in questions]
+    return zlib.crc32(json.dumps(fields, ensure_ascii=False).encode("utf-8"))
+
+
+# Saved plans from another bank version are discarded.
+BANK_VERSION = _bank_version(HARDCODED_QUESTIONS)
+
+
 class AptitudeSession:
-    def __init__(self, mode="aptitude", duration_minutes=30):
+    """
+    An aptitude round. The question order is drawn with ``seed``, so state
+    holds the seed and, per question, the chosen option index (None when
+    skipped, -1 for text that is not an option) and score. Questions and
+    response dicts are rebuilt when needed.
+    """
+
+    def __init__(self, mode="aptitude", duration_minutes=30, seed: Optional[int] = None):
         self.mode = mode
         self.total_questions = 15
         self.start_time = time.time()
         self.duration_seconds = duration_minutes * 60
+        self.seed = random.getrandbits(32) if seed is None else seed
         self.index = 0
-        self.questions = list(HARDCODED_QUESTIONS)[:self.total_questions]  # 15 questions
-        self.responses = []
+        self.answers: List[Optional[int]] = []
+        self.scores: List[int] = []
         self.finished = False
+        self._questions: Optional[List[Dict]] = None
+
+    @property
+    def questions(self) -> List[Dict]:
+        if self._questions is None:
+            count = min(self.total_questions, len(HARDCODED_QUESTIONS))
+            order = random.Random(self.seed).sample(range(len(HARDCODED_QUESTIONS)), count)
+            self._questions = [HARDCODED_QUESTIONS[i] for i in order]
+        return self._questions
+
+    @property
+    def responses(self) -> List[Dict]:
+        return [
+            self._response(q, answer, score)
+            for q, answer, score in zip(self.questions, self.answers, self.scores)
+        ]
 
     def remaining_seconds(self) -> int:
         elapsed = time.time() - self.start_time
@@ -186,65 +223,53 @@ class AptitudeSession:
             "options": q["options"],
         }
 
-    def evaluate_answer(self, submitted_answer: str) -> Dict:
-        if self.index >= len(self.questions):
-            return {"score": 0}
-        
-        q = self.questions[self.index]
-        expected_answer = q["answer"]
-        start_q = self.start_time  # approximation
-        
-        if submitted_answer.strip() == expected_answer.strip():
-            score = 10
-            feedback = "Correctly answered!"
+    @staticmethod
+    def _response(q: Dict, answer: Optional[int], score: int) -> Dict:
+        skipped = answer is None
+        if skipped:
+            feedback = "Skipped question."
         else:
-            score = 0
-            feedback = "Incorrect answer."
-            
-        res = {
+            feedback = "Correctly answered!" if score == 10 else "Incorrect answer."
+        return {
             "question": q["prompt"],
             "topic": q["topic"],
             "difficulty": q["difficulty"],
             "score": score,
-            "answer": submitted_answer,
-            "correct_answer": expected_answer,
+            "answer": q["options"][answer] if not skipped and 0 <= answer < len(q["options"]) else "",
+            "correct_answer": q["answer"],
             "feedback": feedback,
             "strengths": q["explanation"],
             "improvement": "",
-            "skipped": False,
+            "skipped": skipped,
             "time_taken": 0,
         }
-        self.responses.append(res)
+
+    def _record(self, answer: Optional[int], score: int) -> Dict:
+        res = self._response(self.questions[self.index], answer, score)
+        self.answers.append(answer)
+        self.scores.append(score)
         self.index += 1
-        
         if self.index >= self.total_questions or self.remaining_seconds() <= 0:
             self.finished = True
         return res
 
-    def skip_question(self) -> Dict:
+    def evaluate_answer(self, submitted_answer: str) -> Dict:
         if self.index >= len(self.questions):
             return {"score": 0}
-        
+
         q = self.questions[self.index]
-        res = {
-            "question": q["prompt"],
-            "topic": q["topic"],
-            "difficulty": q["difficulty"],
-            "score": 0,
-            "answer": "",
-            "correct_answer": q["answer"],
-            "feedback": "Skipped question.",
-            "strengths": q["explanation"],
-            "improvement": "",
-            "skipped": True,
-            "time_taken": 0,
-        }
-        self.responses.append(res)
-        self.index += 1
-        if self.index >= self.total_questions or self.remaining_seconds() <= 0:
-            self.finished = True
+        submitted = submitted_answer.strip()
+        score = 10 if submitted == q["answer"].strip() else 0
+        answer = next((i for i, option in enumerate(q["options"]) if option.strip() == submitted), -1)
+        res = self._record(answer, score)
+        res["answer"] = submitted_answer
         return res
 
+    def skip_question(self) -> Dict:
+        if self.index >= len(self.questions):
+            return {"score": 0}
+        return self._record(None, 0)
+
     def is_finished(self) -> bool:
         if self.remaining_seconds() <= 0:
             self.finished = True
@@ -254,16 +279,17 @@ class AptitudeSession:
         self.finished = True
 
     def compile_report(self) -> Dict:
-        total_score = sum(r["score"] for r in self.responses)
-        count = len(self.responses)
+        responses = self.responses
+        total_score = sum(r["score"] for r in responses)
+        count = len(responses)
         overall = total_score / count if count > 0 else 0
         
-        answered = sum(1 for r in self.responses if not r.get("skipped"))
-        acc = (sum(1 for r in self.responses if r["score"] > 5) / answered * 100) if answered > 0 else 0
+        answered = sum(1 for r in responses if not r.get("skipped"))
+        acc = (sum(1 for r in responses if r["score"] > 5) / answered * 100) if answered > 0 else 0
 
         # Topic breakdown
         tb = {}
-        for r in self.responses:
+        for r in responses:
             t = r["topic"]
             if t not in tb:
                 tb[t] = {"total": 0, "count": 0}
@@ -280,67 +306,43 @@ class AptitudeSession:
                 "avg_time": (30*60 - self.remaining_seconds()) / max(1, count),
             },
             "topic_breakdown": tb_avg,
-            "responses": self.responses
+            "responses": responses
         }
 
     def to_dict(self) -> Dict:
-        mini_responses = [
-            {"score": r["score"], "skipped": r["skipped"], "answer": r["answer"]}
-            for r in self.responses
-        ]
         return {
             "mode": self.mode,
+            "seed": self.seed,
+            "bank_version": BANK_VERSION,
             "total_questions": self.total_questions,
             "start_time": self.start_time,
             "duration_seconds": self.duration_seconds,
             "index": self.index,
-            "responses": mini_responses,
+            "answers": self.answers,
+            "scores": self.scores,
             "finished": self.finished,
         }
 
     @classmethod
     def from_dict(cls, data: Dict) -> Optional['AptitudeSession']:
-        if not data:
+        """The saved session; None if there is none or it was planned from another bank version."""
+        if not data or "seed" not in data or data.get("bank_version") != BANK_VERSION:
             return None
-        s = cls(mode=data.get("mode", "aptitude"), 
-                duration_minutes=int(data.get("duration_seconds", 1800)/60))
+        s = cls(mode=data.get("mode", "aptitude"),
+                duration_minutes=int(data.get("duration_seconds", 1800)/60),
+                seed=int(data["seed"]))
         s.total_questions = data.get("total_questions", 15)
         s.start_time = data.get("start_time", time.time())
         s.index = data.get("index", 0)
-        s.questions = list(HARDCODED_QUESTIONS)[:s.total_questions]
+        s.answers = list(data.get("answers", []))
+        s.scores = list(data.get("scores", []))
         s.finished = data.get("finished", False)
-        
-        responses = []
-        for i, r in enumerate(data.get("responses", [])):
-            if i >= len(HARDCODED_QUESTIONS): break
-            q = HARDCODED_QUESTIONS[i]
-            if r.get("skipped"):
-                responses.append({
-                    "question": q["prompt"],
-                    "topic": q["topic"],
-                    "difficulty": q["difficulty"],
-                    "score": 0,
-                    "answer": "",
-                    "correct_answer": q["answer"],
-                    "feedback": "Skipped question.",
-                    "strengths": q["explanation"],
-                    "improvement": "",
-                    "skipped": True,
-                    "time_taken": 0,
-                })
-            else:
-                responses.append({
-                    "question": q["prompt"],
-                    "topic": q["topic"],
-                    "difficulty": q["difficulty"],
-                    "score": r.get("score", 0),
-                    "answer": r.get("answer", ""),
-                    "correct_answer": q["answer"],
-                    "feedback": "Correctly answered!" if r.get("score") == 10 else "Incorrect answer.",
-                    "strengths": q["explanation"],
-                    "improvement": "",
-                    "skipped": False,
-                    "time_taken": 0,
-                })
-        s.responses = responses
         return s
+
+    def to_bytes(self) -> bytes:
+        """``to_dict()`` in the compact ``state_codec`` form."""
+        return encode_state(KIND_APTITUDE, self.to_dict())
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> Optional['AptitudeSession']:
+        return cls.from_dict(decode_state(blob, KIND_APTITUDE))
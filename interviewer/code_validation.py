@@ -0,0 +1,302 @@
+"""
+Execution-based validation of generated debug and coding questions.
+
+A generated question is only as good as its reference code and test cases.
+``validate_question`` runs the reference (``fixed_code`` or
+``solution_code``) against the question's own ``test_cases`` and, for debug
+questions, checks that ``buggy_code`` fails at least one of them. Everything
+runs in a separate interpreter (isolated mode, empty environment, scratch
+working directory, CPU/memory/file-size limits where the platform supports
+them) on a small thread pool, so a hostile or runaway snippet cannot touch
+the web process.
+
+Only Python can be executed here. Questions in other languages are marked
+``unsupported`` and passed through; questions whose tests cannot be turned
+into calls (no top-level function, prose or helper objects in the inputs and
+expectations) are marked ``unrunnable``. Only ``failed`` questions are rejected.
+
+The result is attached to the question as ``question["validation"]``.
+
+Threat model: the code comes from the model, so treat it as hostile. It may
+try to read secrets, write files, open connections or fork. The child runs
+as the web worker's user. Before any candidate code runs, the harness applies
+CPU, address-space, file-size (0) and process-count (0) limits to itself.
+On Linux, the child also gets fresh user, network and mount namespaces
+(``unshare``):
+- no network;
+- a private tmpfs over the system temp dir, which hides the default cache,
+  corpus and state-store files.
+The rest of the filesystem stays readable. That is the remaining exposure,
+so do not keep secrets in files readable by the worker. Where namespaces
+are unavailable, the limits alone are not a sandbox. ``QUESTION_VALIDATION``
+therefore defaults to ``auto``: on only when the namespaces work. Setting it
+to ``true`` forces validation on regardless.
+"""
+from __future__ import annotations
+
+import ast
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# "auto" validates only where the child can be isolated in namespaces; true/false force it.
+QUESTION_VALIDATION = os.environ.get("QUESTION_VALIDATION", "auto").strip().lower()
+# Wall-clock limit for one validation subprocess.
+QUESTION_VALIDATION_TIMEOUT = float(os.environ.get("QUESTION_VALIDATION_TIMEOUT", "5"))
+# Reference code slower than this over all its tests is rejected as too expensive.
+QUESTION_VALIDATION_MAX_RUNTIME = float(os.environ.get("QUESTION_VALIDATION_MAX_RUNTIME", "1"))
+QUESTION_VALIDATION_WORKERS = int(os.environ.get("QUESTION_VALIDATION_WORKERS", "2"))
+_MEMORY_LIMIT = 256 * 1024 * 1024
+
+VERIFIED = "verified"
+FAILED = "failed"
+UNRUNNABLE = "unrunnable"
+UNSUPPORTED = "unsupported"
+
+# Runs inside the sandbox with argv [cpu_seconds, memory_bytes]: limits
+# itself, reads {"programs": [...], "tests": [...]} on stdin and prints
+# per-program, per-test outcomes as JSON.
+_HARNESS = r'''
+import ast, json, sys, time
+
+try:
+    import resource
+except ImportError:  # not POSIX
+    resource = None
+if resource is not None:
+    cpu, memory = int(sys.argv[1]), int(sys.argv[2])
+    for name, value in (("RLIMIT_CPU", cpu), ("RLIMIT_AS", memory), ("RLIMIT_FSIZE", 0), ("RLIMIT_NPROC", 0)):
+        if hasattr(resource, name):
+            resource.setrlimit(getattr(resource, name), (value, value))
+
+def load(text):
+    # (value, exact): exact is False when the text is prose rather than a literal.
+    text = str(text).strip()
+    try:
+        return ast.literal_eval(text), True
+    except Exception:
+        lowered = text.lower()
+        if lowered in ("true", "false"):
+            return lowered == "true", True
+        if lowered in ("null", "none"):
+            return None, True
+        return text, False
+
+def same(actual, expected):
+    if actual == expected:
+        return True
+    if isinstance(actual, tuple) and list(actual) == expected:
+        return True
+    return str(actual).replace(" ", "").lower() == str(expected).replace(" ", "").lower()
+
+job = json.loads(sys.stdin.read())
+report = []
+for program in job["programs"]:
+    namespace = {"__name__": "__candidate__"}
+    try:
+        exec(compile(program["code"], "<candidate>", "exec"), namespace)
+        fn = namespace[program["entry"]]
+    except BaseException as exc:
+        report.append({"error": "%s: %s" % (type(exc).__name__, exc)})
+        continue
+    results = []
+    for case in job["tests"]:
+        args = str(case.get("input", ""))
+        expected, exact = load(case.get("expected", ""))
+        started = time.perf_counter()
+        result = {"ok": False, "error": None, "unrunnable": False}
+        try:
+            try:
+                value = eval("__fn__(%s)" % args, {"__fn__": fn})
+            except SyntaxError:
+                value, literal = load(args)
+                exact = exact and literal
+                value = fn(value)
+            result["ok"] = same(value, expected)
+            result["unrunnable"] = not result["ok"] and not exact
+        except NameError as exc:
+            result.update(error="NameError: %s" % exc, unrunnable=True)
+        except BaseException as exc:
+            result.update(error="%s: %s" % (type(exc).__name__, exc), unrunnable=not exact)
+        result["seconds"] = time.perf_counter() - started
+        results.append(result)
+    report.append({"results": results})
+print(json.dumps(report))
+'''
+
+
+# Fresh user, network and mount namespaces; a tmpfs then hides the system temp dir.
+_UNSHARE = ["unshare", "--user", "--map-root-user", "--net", "--mount", "--"]
+_HIDE_TEMP = 'mount -t tmpfs -o size=1m tmpfs "$1" && cd "$1" && shift && exec "$@"'
+
+
+@lru_cache(maxsize=1)
+def _isolation() -> List[str]:
+    """Command prefix that isolates the child, or [] where namespaces are unavailable."""
+    if not sys.platform.startswith("linux") or shutil.which("unshare") is None:
+        return []
+    prefix = _UNSHARE + ["sh", "-c", _HIDE_TEMP, "sh", tempfile.gettempdir()]
+    try:
+        probe = subprocess.run(prefix + ["true"], capture_output=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return []
+    if probe.returncode != 0:
+        logger.warning("Namespaces unavailable for question validation: %s", probe.stderr.decode(errors="replace").strip())
+        return []
+    return prefix
+
+
+def validation_enabled() -> bool:
+    if QUESTION_VALIDATION == "auto":
+        return bool(_isolation())
+    return QUESTION_VALIDATION in ("1", "true", "yes")
+
+
+def _entry_point(code: str) -> Optional[str]:
+    """Name of the last top-level function, the usual entry point of a snippet."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    names = [node.name for node in tree.body if isinstance(node, ast.FunctionDef)]
+    return names[-1] if names else None
+
+
+def _run(programs: List[Dict], tests: List[Dict], timeout: float) -> List[Dict]:
+    limits = [str(int(QUESTION_VALIDATION_TIMEOUT) + 1), str(_MEMORY_LIMIT)]
+    with tempfile.TemporaryDirectory() as scratch:
+        proc = subprocess.run(
+            _isolation() + [sys.executable, "-I", "-S", "-c", _HARNESS] + limits,
+            input=json.dumps({"programs": programs, "tests": tests}),
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            cwd=scratch,
+            env={},
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _result(status: str, reason: str = "", **extra) -> Dict:
+    return dict(extra, status=status, reason=reason)
+
+
+def validate_question(question: Dict, timeout: float = QUESTION_VALIDATION_TIMEOUT) -> Dict:
+    """Execute a debug or coding question's reference code against its tests."""
+    kind = question.get("type")
+    reference = question.get("fixed_code" if kind == "debug" else "solution_code", "")
+    tests = [t for t in question.get("test_cases", []) if isinstance(t, dict)]
+    if kind not in ("debug", "coding"):
+        return _result(UNSUPPORTED, f"nothing to execute for {kind} questions")
+    if str(question.get("language", "python")).lower() != "python":
+        return _result(UNSUPPORTED, f"no runner for {question.get('language')}")
+    if not reference or not tests:
+        return _result(FAILED, "missing reference code or test cases")
+
+    entry = _entry_point(reference)
+    if entry is None:
+        return _result(UNRUNNABLE, "reference code has no top-level function")
+    programs = [{"code": reference, "entry": entry}]
+    if kind == "debug":
+        programs.append({"code": question.get("buggy_code", ""), "entry": entry})
+
+    try:
+        report = _run(programs, tests, timeout)
+    except subprocess.TimeoutExpired:
+        return _result(FAILED, "timed out")
+    except (OSError, RuntimeError, ValueError) as exc:
+        return _result(FAILED, f"sandbox error: {exc}")
+
+    ref = report[0]
+    if "error" in ref:
+        return _result(FAILED, f"reference does not load: {ref['error']}")
+    results = ref["results"]
+    runtime_ms = round(sum(r["seconds"] for r in results) * 1000, 2)
+    passed = sum(1 for r in results if r["ok"])
+    stats = {"runtime_ms": runtime_ms, "passed": passed, "total": len(results)}
+    if any(r.get("unrunnable") for r in results):
+        return _result(UNRUNNABLE, "test cases are not executable literals", **stats)
+    if passed < len(results):
+        failing = next(r for r in results if not r["ok"])
+        return _result(FAILED, f"reference fails its own tests ({failing['error'] or 'wrong output'})", **stats)
+    if runtime_ms > QUESTION_VALIDATION_MAX_RUNTIME * 1000:
+        return _result(FAILED, "reference is too slow to execute cheaply", **stats)
+    if kind == "debug":
+        buggy = report[1]
+        if "error" not in buggy and all(r["ok"] for r in buggy["results"]):
+            return _result(FAILED, "buggy code passes every test", **stats)
+    return _result(VERIFIED, **stats)
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_stats = {VERIFIED: 0, FAILED: 0, UNRUNNABLE: 0, UNSUPPORTED: 0}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=QUESTION_VALIDATION_WORKERS, thread_name_prefix="question-validation"
+            )
+        return _executor
+
+
+def check_questions(questions: List[Optional[Dict]]) -> List[Optional[Dict]]:
+    """
+    Validate each question on the sandbox pool, attach the result and drop
+    (replace with None) the ones that failed. No-op when validation is off.
+    """
+    if not validation_enabled():
+        return questions
+    futures = [
+        _get_executor().submit(validate_question, q) if q and q.get("type") in ("debug", "coding") else None
+        for q in questions
+    ]
+    checked: List[Optional[Dict]] = []
+    for q, future in zip(questions, futures):
+        if future is not None:
+            q["validation"] = future.result()
+            with _executor_lock:
+                _stats[q["validation"]["status"]] += 1
+            if q["validation"]["status"] == FAILED:
+                logger.warning("Rejected generated question %r: %s", q.get("title"), q["validation"]["reason"])
+                q = None
+        checked.append(q)
+    return checked
+
+
+def check_question(question: Optional[Dict]) -> Optional[Dict]:
+    return check_questions([question])[0]
+
+
+async def acheck_question(question: Optional[Dict]) -> Optional[Dict]:
+    """Async counterpart of ``check_question``; the subprocess runs off the event loop."""
+    if not question or not validation_enabled():
+        return question
+    return await asyncio.to_thread(check_question, question)
+
+
+def is_verified(question: Dict) -> bool:
+    """True unless validation found a problem or could not execute the question."""
+    status = question.get("validation", {}).get("status", VERIFIED)
+    return status in (VERIFIED, UNSUPPORTED)
+
+
+def get_validation_stats() -> Dict[str, int]:
+    with _executor_lock:
+        return dict(_stats)
@@ -0,0 +1,52 @@
+"""
+Per-request latency budgets.
+
+Each view starts a ``Deadline`` for its SLO and passes it down to the AI
+calls it makes. An upstream call only gets the time left in the budget minus
+``FALLBACK_RESERVE`` (the time the fallback path and response rendering
+need), so the response still arrives within the SLO when Gemini is slow.
+"""
+from __future__ import annotations
+
+import os
+import time
+from typing import Optional
+
+# End-to-end budget for one interview API request, in seconds.
+REQUEST_SLO = float(os.environ.get("INTERVIEW_REQUEST_SLO", "9"))
+# Time kept back for the fallback path and rendering the response.
+FALLBACK_RESERVE = float(os.environ.get("INTERVIEW_FALLBACK_RESERVE", "0.5"))
+# Upstream calls with less time than this left are not worth starting.
+MIN_UPSTREAM_TIMEOUT = 0.25
+
+
+class Deadline:
+    """A point in (monotonic) time by which a request must have responded."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+
+    @classmethod
+    def for_request(cls) -> "Deadline":
+        """Deadline for a request that starts now, using the configured SLO."""
+        return cls.after(REQUEST_SLO)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def upstream_timeout(self, reserve: float = FALLBACK_RESERVE) -> Optional[float]:
+        """Seconds an upstream call may take, or None if there is no time for one."""
+        budget = self.remaining() - reserve
+        return budget if budget >= MIN_UPSTREAM_TIMEOUT else None
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f}s)"
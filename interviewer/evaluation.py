@@ -3,9 +3,10 @@ from __future__ import annotations
 import logging
 from collections import defaultdict
 from statistics import mean
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from .ai_service import evaluate_with_ai
+from .ai_service import aevaluate_with_ai, evaluate_with_ai
+from .deadline import Deadline
 from .questions import Question
 
 logger = logging.getLogger(__name__)
@@ -27,7 +28,7 @@ def _keyword_evaluate(question: Question, answer: str) -> Dict[str, object]:
             "improvement": "Provide a substantive answer covering key concepts.",
         }
 
-    keywords = [word.lower() for word in question.expected_keywords]
+    keywords = question.expected_keywords
     matched = [word for word in keywords if word in normalized]
 
     keyword_ratio = len(matched) / max(len(keywords), 1)
@@ -58,23 +59,29 @@ def _keyword_evaluate(question: Question, answer: str) -> Dict[str, object]:
     }
 
 
-def evaluate_answer(question: Question, answer: str) -> Dict[str, object]:
+def _empty_answer_result() -> Dict[str, object]:
+    return {
+        "score": 0,
+        "feedback": "No answer captured. Try speaking clearly and include key concepts.",
+        "matched_keywords": [],
+        "strengths": "",
+        "improvement": "Provide a substantive answer covering key concepts.",
+    }
+
+
+def evaluate_answer(
+    question: Question, answer: str, deadline: Optional[Deadline] = None
+) -> Dict[str, object]:
     """
     Evaluate a candidate answer, preferring AI evaluation when available.
     Falls back to keyword matching if AI is unavailable.
     """
     normalized = _normalize(answer)
     if not normalized:
-        return {
-            "score": 0,
-            "feedback": "No answer captured. Try speaking clearly and include key concepts.",
-            "matched_keywords": [],
-            "strengths": "",
-            "improvement": "Provide a substantive answer covering key concepts.",
-        }
+        return _empty_answer_result()
 
     # Try AI evaluation first
-    ai_result = evaluate_with_ai(question.topic, question.prompt, answer)
+    ai_result = evaluate_with_ai(question.topic, question.prompt, answer, deadline)
     if ai_result is not None:
         logger.info("Used AI evaluation for qid=%d", question.qid)
         return ai_result
@@ -84,6 +91,23 @@ def evaluate_answer(question: Question, answer: str) -> Dict[str, object]:
     return _keyword_evaluate(question, answer)
 
 
+async def aevaluate_answer(
+    question: Question, answer: str, deadline: Optional[Deadline] = None
+) -> Dict[str, object]:
+    """Async counterpart of ``evaluate_answer``."""
+    normalized = _normalize(answer)
+    if not normalized:
+        return _empty_answer_result()
+
+    ai_result = await aevaluate_with_ai(question.topic, question.prompt, answer, deadline)
+    if ai_result is not None:
+        logger.info("Used AI evaluation for qid=%d", question.qid)
+        return ai_result
+
+    logger.info("Falling back to keyword evaluation for qid=%d", question.qid)
+    return _keyword_evaluate(question, answer)
+
+
 def compile_interview_report(responses: List[Dict[str, object]]) -> Dict[str, object]:
     if not responses:
         return {
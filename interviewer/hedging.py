@@ -0,0 +1,194 @@
+"""
+Hedged requests for cutting tail latency.
+
+If the primary request hasn't answered within the given percentile of
+recently observed latency, a duplicate is sent and whichever succeeds first
+is used. A leg succeeds if it raised nothing and, when an ``accept``
+predicate is given, its result is accepted, so a fast 503 does not beat a
+slower 200 still in flight. The other one is cancelled (asyncio) or left to
+finish in the background and ignored (threads). A rolling per-minute budget caps the extra
+load hedging can add, an optional ``admit`` check (e.g. upstream quota) can
+veto each duplicate, and hedge/win counts are kept for tuning.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+from .resilience import LatencyWindow
+
+T = TypeVar("T")
+
+
+class HedgePolicy:
+    """Decides when to hedge and runs hedged calls for threads or asyncio."""
+
+    def __init__(
+        self,
+        window: LatencyWindow,
+        enabled: bool = False,
+        percentile: float = 95.0,
+        budget_per_minute: int = 10,
+        min_samples: int = 20,
+        max_workers: int = 16,
+    ):
+        self.window = window
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget_per_minute = budget_per_minute
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self._sent: Deque[float] = deque()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "hedges": 0, "hedge_wins": 0, "budget_exhausted": 0, "denied": 0}
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None if hedging is off for now."""
+        if not self.enabled or self.window.count() < self.min_samples:
+            return None
+        return self.window.percentile(self.percentile)
+
+    def run(
+        self,
+        fn: Callable[[], T],
+        accept: Optional[Callable[[T], bool]] = None,
+        admit: Optional[Callable[[], bool]] = None,
+    ) -> T:
+        """
+        Run a blocking call, hedging it on a worker thread if it runs long.
+        If neither leg succeeds, the first rejected result is returned, else
+        the first error is raised.
+        """
+        delay = self.hedge_delay()
+        if delay is None:
+            return fn()
+
+        self._bump("calls")
+        executor = self._get_executor()
+        primary = executor.submit(fn)
+        if wait([primary], timeout=delay).done:
+            return primary.result()
+        if not self._may_hedge(admit):
+            return primary.result()
+
+        hedge = executor.submit(fn)
+        self._bump("hedges")
+        pending = {primary, hedge}
+        outcome = _Outcome(accept)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if outcome.add(fut):
+                    if fut is hedge:
+                        self._bump("hedge_wins")
+                    return fut.result()
+        return outcome.settle()
+
+    async def arun(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        accept: Optional[Callable[[T], bool]] = None,
+        admit: Optional[Callable[[], bool]] = None,
+    ) -> T:
+        """Async counterpart of ``run``; the losing request is cancelled."""
+        delay = self.hedge_delay()
+        if delay is None:
+            return await fn()
+
+        self._bump("calls")
+        primary = asyncio.ensure_future(fn())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._may_hedge(admit):
+                return await primary
+
+            hedge = asyncio.ensure_future(fn())
+            tasks.add(hedge)
+            self._bump("hedges")
+            pending = set(tasks)
+            outcome = _Outcome(accept)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if outcome.add(task):
+                        if task is hedge:
+                            self._bump("hedge_wins")
+                        return task.result()
+            return outcome.settle()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            result: Dict[str, object] = dict(self._stats)
+        result["enabled"] = self.enabled
+        result["hedge_delay"] = self.hedge_delay()
+        result["win_rate"] = (
+            round(result["hedge_wins"] / result["hedges"], 3) if result["hedges"] else 0.0
+        )
+        return result
+
+    def _may_hedge(self, admit: Optional[Callable[[], bool]]) -> bool:
+        if not self._take_budget():
+            return False
+        if admit is not None and not admit():
+            with self._lock:
+                self._stats["denied"] += 1
+            return False
+        return True
+
+    def _take_budget(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            while self._sent and now - self._sent[0] > 60:
+                self._sent.popleft()
+            if len(self._sent) >= self.budget_per_minute:
+                self._stats["budget_exhausted"] += 1
+                return False
+            self._sent.append(now)
+            return True
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="gemini-hedge"
+                )
+            return self._executor
+
+    def _bump(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+class _Outcome:
+    """Collects finished legs of a hedged call until one is a success."""
+
+    def __init__(self, accept: Optional[Callable[[object], bool]]):
+        self.accept = accept
+        self.rejected: List[object] = []
+        self.error: Optional[BaseException] = None
+
+    def add(self, leg) -> bool:
+        """Record a finished future or task; True if it is a success to return."""
+        error = leg.exception()
+        if error is not None:
+            self.error = self.error or error
+            return False
+        if self.accept is None or self.accept(leg.result()):
+            return True
+        self.rejected.append(leg.result())
+        return False
+
+    def settle(self):
+        if self.rejected:
+            return self.rejected[0]
+        raise self.error
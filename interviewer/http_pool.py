@@ -0,0 +1,515 @@
+"""
+Keep-alive HTTP(S) connection pools for outbound API calls.
+
+Connections are kept open between requests and reused per (scheme, host, port),
+so repeated calls to the same upstream skip DNS, TCP and TLS setup.
+The number of connections per host is bounded; callers block (up to the
+connect timeout) when every connection to a host is in use.
+
+``HTTPConnectionPool`` is the thread-safe blocking pool; ``AsyncHTTPConnectionPool``
+is a native asyncio HTTP/1.1 client with the same interface for async views,
+plus ``stream()`` for reading a response body as it arrives.
+"""
+from __future__ import annotations
+
+import asyncio
+import http.client
+import ssl
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Errors that mean a reused keep-alive connection was closed by the server
+# before our request got through; the request is retried once on a fresh one.
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+_READ_CHUNK = 64 * 1024
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection to a host became free within the timeout."""
+
+
+class HTTPStatusError(Exception):
+    """A streamed request got an error status; ``response`` holds the full reply."""
+
+    def __init__(self, response: "PooledResponse"):
+        super().__init__(f"HTTP {response.status}")
+        self.response = response
+
+
+@dataclass
+class PooledResponse:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+@dataclass
+class _IdleConnection:
+    conn: http.client.HTTPConnection
+    released_at: float
+
+
+class _HostPool:
+    """Idle connections plus an in-use bound for a single host."""
+
+    def __init__(self, maxsize: int):
+        self.slots = threading.BoundedSemaphore(maxsize)
+        self.idle: List[_IdleConnection] = []
+
+
+class HTTPConnectionPool:
+    """
+    Keep-alive connection pool shared across threads.
+
+    - ``maxsize`` bounds open connections per host.
+    - ``connect_timeout`` covers TCP/TLS setup and waiting for a free slot.
+    - ``read_timeout`` is the default socket timeout once connected; callers
+      may pass a shorter ``timeout`` per request, which also caps the connect.
+    - Idle connections older than ``idle_expiry`` seconds are discarded rather
+      than reused, since the server has likely dropped them already.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 8,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 20.0,
+        idle_expiry: float = 60.0,
+    ):
+        self.maxsize = max(1, int(maxsize))
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_expiry = idle_expiry
+        self._lock = threading.Lock()
+        self._hosts: Dict[Tuple[str, str, int], _HostPool] = {}
+        self._stats = {"hits": 0, "misses": 0, "discarded": 0, "stale_retries": 0}
+
+    # ── Public API ──
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> PooledResponse:
+        """Send a request over a pooled connection and return the full response."""
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "", port)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        read_timeout = self.read_timeout if timeout is None else timeout
+        connect_timeout = min(self.connect_timeout, read_timeout)
+        host_pool = self._host_pool(key)
+        if not host_pool.slots.acquire(timeout=connect_timeout):
+            raise PoolTimeoutError(f"No free connection to {key[1]}:{port}")
+
+        try:
+            conn, reused = self._checkout(key, host_pool, connect_timeout)
+            try:
+                return self._send(key, host_pool, conn, method, path, body, headers, read_timeout)
+            except _STALE_ERRORS:
+                if not reused:
+                    raise
+                # The server closed an idle keep-alive connection; retry once.
+                self._bump("stale_retries")
+                conn = self._connect(key, connect_timeout)
+                return self._send(key, host_pool, conn, method, path, body, headers, read_timeout)
+        finally:
+            host_pool.slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current idle connection count."""
+        with self._lock:
+            result = dict(self._stats)
+            result["idle"] = sum(len(p.idle) for p in self._hosts.values())
+        return result
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle = [item for p in self._hosts.values() for item in p.idle]
+            for p in self._hosts.values():
+                p.idle.clear()
+        for item in idle:
+            item.conn.close()
+
+    # ── Internals ──
+
+    def _host_pool(self, key: Tuple[str, str, int]) -> _HostPool:
+        with self._lock:
+            pool = self._hosts.get(key)
+            if pool is None:
+                pool = self._hosts[key] = _HostPool(self.maxsize)
+            return pool
+
+    def _bump(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _checkout(
+        self, key, host_pool: _HostPool, connect_timeout: float
+    ) -> Tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        expired = []
+        conn = None
+        with self._lock:
+            while host_pool.idle:
+                item = host_pool.idle.pop()
+                if now - item.released_at <= self.idle_expiry:
+                    conn = item.conn
+                    break
+                expired.append(item.conn)
+            self._stats["discarded"] += len(expired)
+            self._stats["hits" if conn is not None else "misses"] += 1
+        for old in expired:
+            old.close()
+        if conn is not None:
+            return conn, True
+        return self._connect(key, connect_timeout), False
+
+    def _connect(self, key: Tuple[str, str, int], connect_timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = conn_cls(host, port, timeout=connect_timeout)
+        conn.connect()
+        return conn
+
+    def _send(self, key, host_pool, conn, method, path, body, headers, read_timeout) -> PooledResponse:
+        try:
+            conn.sock.settimeout(read_timeout)
+            conn.request(method, path, body=body, headers=headers or {})
+            resp = conn.getresponse()
+            data = resp.read()
+        except BaseException:
+            conn.close()
+            raise
+
+        result = PooledResponse(
+            status=resp.status,
+            headers={k.lower(): v for k, v in resp.getheaders()},
+            body=data,
+        )
+        if resp.will_close:
+            conn.close()
+            self._bump("discarded")
+        else:
+            with self._lock:
+                host_pool.idle.append(_IdleConnection(conn, time.monotonic()))
+        return result
+
+
+# ═══════════════════════════════════
+#  ASYNCIO CLIENT
+# ═══════════════════════════════════
+
+@dataclass
+class _AsyncConnection:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    released_at: float = 0.0
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class _AsyncHostPool:
+    def __init__(self, maxsize: int):
+        self.slots = asyncio.Semaphore(maxsize)
+        self.idle: List[_AsyncConnection] = []
+
+
+class AsyncHTTPConnectionPool:
+    """
+    Native asyncio keep-alive HTTP/1.1 client.
+
+    Streams belong to the event loop that opened them, so idle connections are
+    tracked per running loop. Under ASGI that is one long-lived loop; when Django
+    runs an async view under WSGI each request gets a fresh loop and simply
+    starts with an empty pool.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 8,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 20.0,
+        idle_expiry: float = 60.0,
+    ):
+        self.maxsize = max(1, int(maxsize))
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_expiry = idle_expiry
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "discarded": 0, "stale_retries": 0}
+        self._ssl_context: Optional[ssl.SSLContext] = None
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> PooledResponse:
+        """Send a request over a pooled connection and return the full response."""
+        key, raw = self._prepare(method, url, body, headers)
+        read_timeout = self.read_timeout if timeout is None else timeout
+        connect_timeout = min(self.connect_timeout, read_timeout)
+        host_pool = await self._acquire_slot(key, connect_timeout)
+
+        try:
+            conn, reused = await self._checkout(key, host_pool, connect_timeout)
+            try:
+                return await self._send(host_pool, conn, raw, read_timeout)
+            except (*_STALE_ERRORS, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                self._bump("stale_retries")
+                conn = await self._connect(key, connect_timeout)
+                return await self._send(host_pool, conn, raw, read_timeout)
+        finally:
+            host_pool.slots.release()
+
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Send a request and yield the response body as it arrives.
+
+        Error statuses raise ``HTTPStatusError`` before anything is yielded.
+        ``timeout`` bounds the whole exchange, not each read. A stream that is
+        closed early also closes its connection instead of returning it.
+        """
+        key, raw = self._prepare(method, url, body, headers)
+        read_timeout = self.read_timeout if timeout is None else timeout
+        connect_timeout = min(self.connect_timeout, read_timeout)
+        expires = time.monotonic() + read_timeout
+        host_pool = await self._acquire_slot(key, connect_timeout)
+        conn = None
+        try:
+            conn, reused = await self._checkout(key, host_pool, connect_timeout)
+            try:
+                status, resp_headers, keep_alive = await self._send_head(conn, raw, read_timeout)
+            except (*_STALE_ERRORS, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                self._bump("stale_retries")
+                conn.close()
+                conn = await self._connect(key, connect_timeout)
+                status, resp_headers, keep_alive = await self._send_head(conn, raw, read_timeout)
+
+            chunks = self._iter_body(conn.reader, resp_headers)
+            if status >= 400:
+                error_body = b"".join([chunk async for chunk in chunks])
+                raise HTTPStatusError(PooledResponse(status, resp_headers, error_body))
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        chunks.__anext__(), max(0.0, expires - time.monotonic())
+                    )
+                except StopAsyncIteration:
+                    break
+                yield chunk
+
+            if keep_alive:
+                conn.released_at = time.monotonic()
+                host_pool.idle.append(conn)
+            else:
+                conn.close()
+                self._bump("discarded")
+            conn = None
+        finally:
+            if conn is not None:
+                conn.close()
+            host_pool.slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            result = dict(self._stats)
+        try:
+            hosts = self._loops.get(asyncio.get_running_loop(), {})
+        except RuntimeError:
+            hosts = {}
+        result["idle"] = sum(len(p.idle) for p in hosts.values())
+        return result
+
+    # ── Internals ──
+
+    def _prepare(self, method, url, body, headers) -> Tuple[Tuple[str, str, int], bytes]:
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "", port)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        return key, self._encode_request(method, key, path, body, headers)
+
+    async def _acquire_slot(self, key, connect_timeout: float) -> _AsyncHostPool:
+        host_pool = self._host_pool(key)
+        try:
+            await asyncio.wait_for(host_pool.slots.acquire(), connect_timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeoutError(f"No free connection to {key[1]}:{key[2]}") from None
+        return host_pool
+
+    def _host_pool(self, key: Tuple[str, str, int]) -> _AsyncHostPool:
+        hosts = self._loops.setdefault(asyncio.get_running_loop(), {})
+        pool = hosts.get(key)
+        if pool is None:
+            pool = hosts[key] = _AsyncHostPool(self.maxsize)
+        return pool
+
+    def _bump(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += amount
+
+    async def _checkout(
+        self, key, host_pool: _AsyncHostPool, connect_timeout: float
+    ) -> Tuple[_AsyncConnection, bool]:
+        now = time.monotonic()
+        while host_pool.idle:
+            conn = host_pool.idle.pop()
+            if now - conn.released_at <= self.idle_expiry and not conn.reader.at_eof():
+                self._bump("hits")
+                return conn, True
+            conn.close()
+            self._bump("discarded")
+        self._bump("misses")
+        return await self._connect(key, connect_timeout), False
+
+    async def _connect(self, key: Tuple[str, str, int], connect_timeout: float) -> _AsyncConnection:
+        scheme, host, port = key
+        ssl_ctx = None
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            ssl_ctx = self._ssl_context
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=ssl_ctx), connect_timeout
+        )
+        return _AsyncConnection(reader, writer)
+
+    @staticmethod
+    def _encode_request(method, key, path, body, headers) -> bytes:
+        scheme, host, port = key
+        default_port = 443 if scheme == "https" else 80
+        lines = [f"{method} {path} HTTP/1.1"]
+        all_headers = {"Host": host if port == default_port else f"{host}:{port}"}
+        all_headers.update(headers or {})
+        all_headers["Content-Length"] = str(len(body or b""))
+        lines.extend(f"{k}: {v}" for k, v in all_headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b"")
+
+    async def _send(self, host_pool, conn: _AsyncConnection, raw: bytes, read_timeout) -> PooledResponse:
+        try:
+            conn.writer.write(raw)
+            await conn.writer.drain()
+            status, headers, body, keep_alive = await asyncio.wait_for(
+                self._read_response(conn.reader), read_timeout
+            )
+        except BaseException:
+            conn.close()
+            raise
+
+        if keep_alive:
+            conn.released_at = time.monotonic()
+            host_pool.idle.append(conn)
+        else:
+            conn.close()
+            self._bump("discarded")
+        return PooledResponse(status=status, headers=headers, body=body)
+
+    async def _send_head(self, conn: _AsyncConnection, raw: bytes, read_timeout):
+        try:
+            conn.writer.write(raw)
+            await conn.writer.drain()
+            return await asyncio.wait_for(self._read_head(conn.reader), read_timeout)
+        except BaseException:
+            conn.close()
+            raise
+
+    @classmethod
+    async def _read_response(cls, reader: asyncio.StreamReader):
+        status, headers, keep_alive = await cls._read_head(reader)
+        body = b"".join([chunk async for chunk in cls._iter_body(reader, headers)])
+        return status, headers, body, keep_alive
+
+    @staticmethod
+    async def _read_head(reader: asyncio.StreamReader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise http.client.RemoteDisconnected("Remote end closed connection without response")
+        parts = status_line.decode("latin-1").split(None, 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise http.client.BadStatusLine(status_line.decode("latin-1", "replace"))
+        version, status = parts[0], int(parts[1])
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if not _is_chunked(headers) and "content-length" not in headers:
+            keep_alive = False  # body runs to EOF
+        return status, headers, keep_alive
+
+    @staticmethod
+    async def _iter_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> AsyncIterator[bytes]:
+        if _is_chunked(headers):
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip(), 16)
+                if size == 0:
+                    # Trailers end with an empty line.
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                yield await reader.readexactly(size)
+                await reader.readexactly(2)
+        elif "content-length" in headers:
+            left = int(headers["content-length"])
+            while left > 0:
+                chunk = await reader.read(min(left, _READ_CHUNK))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b"", left)
+                left -= len(chunk)
+                yield chunk
+        else:
+            while True:
+                chunk = await reader.read(_READ_CHUNK)
+                if not chunk:
+                    return
+                yield chunk
+
+
+def _is_chunked(headers: Dict[str, str]) -> bool:
+    return headers.get("transfer-encoding", "").lower() == "chunked"
@@ -0,0 +1,143 @@
+"""
+Tolerant parsing of model JSON replies.
+
+Gemini is asked for schema-constrained JSON, but a reply can still arrive
+wrapped in a code fence, followed by stray text, or cut off at
+``max_tokens``. Throwing such a reply away wastes a paid call, so
+``loads_lenient`` recovers what it can: it skips anything before the first
+``{``/``[``, ignores trailing text after a complete value, and closes a
+truncated value at the last point where everything before it was complete
+(an unfinished string, number, key or trailing element is dropped).
+
+``parse_model_json`` wraps it with per-call-type counters of clean,
+repaired and failed parses.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Truncation repair tries at most this many cut points, newest first.
+_MAX_REPAIR_ATTEMPTS = 64
+_CLOSERS = {"{": "}", "[": "]"}
+
+_DECODER = json.JSONDecoder()
+
+
+def _candidates(body: str) -> Iterator[str]:
+    """
+    Truncated ``body`` closed off at each cut point, longest first. Cuts fall
+    only after complete values, so a half-written string or number (a code
+    field missing its second half, a score of 1 that was going to be 10) is
+    dropped rather than passed on.
+    """
+    stack: List[str] = []
+    cuts: List[Tuple[int, str]] = []
+    in_string = escaped = False
+    for i, ch in enumerate(body):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                cuts.append((i + 1, "".join(reversed(stack))))
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+            cuts.append((i + 1, "".join(reversed(stack))))
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            cuts.append((i + 1, "".join(reversed(stack))))
+        elif ch == ",":
+            cuts.append((i, "".join(reversed(stack))))
+
+    for pos, closing in reversed(cuts[-_MAX_REPAIR_ATTEMPTS:]):
+        yield body[:pos] + closing
+
+
+def loads_lenient(text: str) -> Tuple[Any, bool]:
+    """
+    Parse ``text`` as JSON, repairing it if needed.
+    Returns ``(value, repaired)``; raises ``ValueError`` if nothing usable is left.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON value in reply")
+    body = text[min(starts):].strip()
+    if body.endswith("```"):
+        body = body[:-3].rstrip()
+    try:
+        return json.loads(body), False
+    except ValueError:
+        pass
+    try:
+        # A complete value followed by a closing fence or commentary.
+        return _DECODER.raw_decode(body)[0], True
+    except ValueError:
+        pass
+    for candidate in _candidates(body):
+        try:
+            return json.loads(candidate), True
+        except ValueError:
+            continue
+    raise ValueError("reply is not recoverable JSON")
+
+
+class ParseStats:
+    """Counts clean, repaired and failed parses per call type."""
+
+    OUTCOMES = ("ok", "repaired", "failed")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, kind: str, outcome: str) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(kind, dict.fromkeys(self.OUTCOMES, 0))
+            counts[outcome] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {kind: dict(counts) for kind, counts in self._counts.items()}
+
+
+PARSE_STATS = ParseStats()
+
+
+def parse_model_json(raw: Optional[str], kind: str, required: Iterable[str] = ()) -> Optional[Any]:
+    """
+    The JSON value of a model reply, or None if it cannot be recovered or an
+    object reply lacks any of the ``required`` keys. ``kind`` names the call
+    type for the counters.
+    """
+    if not raw:
+        return None
+    try:
+        value, repaired = loads_lenient(raw)
+    except ValueError as exc:
+        PARSE_STATS.record(kind, "failed")
+        logger.warning("Failed to parse %s reply: %s", kind, exc)
+        return None
+    missing = [k for k in required if not isinstance(value, dict) or k not in value]
+    if missing:
+        PARSE_STATS.record(kind, "failed")
+        logger.warning("%s reply is missing %s", kind, ", ".join(missing))
+        return None
+    if repaired:
+        logger.info("Repaired malformed %s reply", kind)
+    PARSE_STATS.record(kind, "repaired" if repaired else "ok")
+    return value
+
+
+def get_parse_stats() -> Dict[str, Dict[str, int]]:
+    return PARSE_STATS.stats()
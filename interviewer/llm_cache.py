@@ -0,0 +1,179 @@
+"""
+Content-addressed cache for LLM responses.
+
+Keys are a SHA-256 over the fully rendered prompts, the prompt template
+version and the generation parameters, so any change to what would be sent
+upstream produces a different key. Two tiers:
+
+  - ``MemoryTTLCache``: in-process LRU with per-entry TTL.
+  - ``SQLiteTTLCache``: persistent tier shared by every worker on the host.
+
+``TieredCache`` reads memory first, then disk (promoting disk hits into
+memory), and writes through to both.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(*parts: object) -> str:
+    """Hash the given request parts into a stable hex key."""
+    blob = json.dumps(parts, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class MemoryTTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 86400.0):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.stats["misses"] += 1
+                return None
+            expires_at, value = item
+            if expires_at < now:
+                del self._data[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteTTLCache:
+    """Persistent key/value tier backed by a single SQLite file."""
+
+    # Expired rows are swept every this many writes.
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, ttl: float = 86400.0):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            value, expires_at = row
+            if expires_at < time.time():
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                cur = self._conn.execute(
+                    "DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),)
+                )
+                self.stats["evictions"] += max(cur.rowcount, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+
+class TieredCache:
+    """Memory tier in front of an optional persistent tier."""
+
+    def __init__(self, memory: MemoryTTLCache, disk: Optional[SQLiteTTLCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None or self.disk is None:
+            return value
+        try:
+            value = self.disk.get(key)
+        except sqlite3.Error as exc:
+            logger.warning("LLM disk cache read failed: %s", exc)
+            return None
+        if value is not None:
+            self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except sqlite3.Error as exc:
+                logger.warning("LLM disk cache write failed: %s", exc)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        result = {"memory": dict(self.memory.stats, size=len(self.memory))}
+        if self.disk is not None:
+            result["disk"] = dict(self.disk.stats)
+        return result
+
+
+def build_cache(maxsize: int, ttl: float, path: Optional[str]) -> TieredCache:
+    """Build a tiered cache, running memory-only if the disk tier can't open."""
+    disk = None
+    if path:
+        try:
+            disk = SQLiteTTLCache(path, ttl=ttl)
+        except sqlite3.Error as exc:
+            logger.warning("LLM disk cache unavailable at %s: %s", path, exc)
+    return TieredCache(MemoryTTLCache(maxsize=maxsize, ttl=ttl), disk)
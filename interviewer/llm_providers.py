@@ -0,0 +1,380 @@
+"""
+LLM provider backends.
+
+Everything above the transport (caching, coalescing, the circuit breaker,
+retries, hedging and quota) lives in ``ai_service`` and is shared by every
+backend; a provider only encodes a request, sends it and decodes the reply.
+All backends speak the Gemini ``generateContent`` wire format.
+
+- ``GeminiProvider`` calls the Gemini REST API, or any server at
+  ``GEMINI_BASE_URL`` that speaks the same format.
+- ``FakeProvider`` answers in-process with deterministic canned replies after
+  a simulated latency, failing a configurable share of calls with HTTP 503.
+- ``serve_fake_gemini`` puts a ``FakeProvider`` behind a local HTTP server, so
+  the real HTTP path can be load-tested without a key
+  (``python manage.py fake_gemini``).
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from . import prompts
+from .http_pool import AsyncHTTPConnectionPool, HTTPConnectionPool, HTTPStatusError, PooledResponse
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# User prompts of ``ai_question_generator``'s batch variants.
+_BATCH_REQUEST = re.compile(r"Generate (\d+) different")
+
+
+class LLMProvider(abc.ABC):
+    """Transport for ``generateContent``-style requests."""
+
+    name = "base"
+
+    @property
+    def cache_namespace(self) -> str:
+        """Mixed into cache keys so replies from different backends never mix."""
+        return self.name
+
+    def ready(self) -> bool:
+        """False when the backend cannot be called (e.g. no API key)."""
+        return True
+
+    def encode(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int,
+        temperature: float,
+        schema: Optional[Dict] = None,
+    ) -> bytes:
+        config = {
+            "temperature": temperature,
+            "maxOutputTokens": max_tokens,
+            "response_mime_type": "application/json",
+        }
+        if schema is not None:
+            config["response_schema"] = schema
+        return json.dumps({
+            "system_instruction": {
+                "parts": [{"text": system_prompt}]
+            },
+            "contents": [
+                {
+                    "role": "user",
+                    "parts": [{"text": user_prompt}],
+                }
+            ],
+            "generationConfig": config,
+        }).encode("utf-8")
+
+    @staticmethod
+    def decode(resp: PooledResponse) -> Optional[str]:
+        """Pull the first candidate's text out of a ``generateContent`` response."""
+        body = json.loads(resp.body.decode("utf-8"))
+        candidates = body.get("candidates", [])
+        if candidates:
+            parts = candidates[0].get("content", {}).get("parts", [])
+            if parts:
+                return parts[0].get("text", "")
+        return None
+
+    @staticmethod
+    def decode_event(event: Dict) -> str:
+        """Text carried by one ``streamGenerateContent`` event."""
+        candidates = event.get("candidates", [])
+        if not candidates:
+            return ""
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts)
+
+    @abc.abstractmethod
+    def send(self, body: bytes, timeout: Optional[float] = None) -> PooledResponse:
+        """Send one ``generateContent`` request and return the reply."""
+
+    @abc.abstractmethod
+    async def asend(self, body: bytes, timeout: Optional[float] = None) -> PooledResponse:
+        """Async counterpart of ``send``."""
+
+    @abc.abstractmethod
+    def astream(self, body: bytes, timeout: Optional[float] = None) -> AsyncIterator[bytes]:
+        """Yield the raw SSE body of a streamed request; errors raise ``HTTPStatusError``."""
+
+    def stats(self) -> Dict[str, object]:
+        return {"provider": self.name}
+
+
+class GeminiProvider(LLMProvider):
+    """The Gemini REST API over the shared keep-alive pools."""
+
+    name = "gemini"
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        pool: HTTPConnectionPool,
+        async_pool: AsyncHTTPConnectionPool,
+        base_url: str = "https://generativelanguage.googleapis.com/v1beta",
+        model: str = "gemini-2.0-flash",
+    ):
+        self.api_key = api_key
+        self.pool = pool
+        self.async_pool = async_pool
+        self.url = f"{base_url.rstrip('/')}/models/{model}:generateContent"
+        self.stream_url = f"{base_url.rstrip('/')}/models/{model}:streamGenerateContent?alt=sse"
+
+    @property
+    def cache_namespace(self) -> str:
+        return self.url
+
+    def ready(self) -> bool:
+        return bool(self.api_key)
+
+    def send(self, body: bytes, timeout: Optional[float] = None) -> PooledResponse:
+        return self.pool.request(
+            "POST", f"{self.url}?key={self.api_key}", body=body, headers=_JSON_HEADERS, timeout=timeout
+        )
+
+    async def asend(self, body: bytes, timeout: Optional[float] = None) -> PooledResponse:
+        return await self.async_pool.request(
+            "POST", f"{self.url}?key={self.api_key}", body=body, headers=_JSON_HEADERS, timeout=timeout
+        )
+
+    def astream(self, body: bytes, timeout: Optional[float] = None) -> AsyncIterator[bytes]:
+        return self.async_pool.stream(
+            "POST", f"{self.stream_url}&key={self.api_key}", body=body, headers=_JSON_HEADERS, timeout=timeout
+        )
+
+
+# ═══════════════════════════════════
+#  OFFLINE BACKENDS
+# ═══════════════════════════════════
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """Log-normal latency described by its median and 99th percentile, in seconds."""
+
+    median: float = 0.0
+    p99: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0.0
+        sigma = math.log(max(self.p99, self.median) / self.median) / 2.326
+        return rng.lognormvariate(math.log(self.median), sigma)
+
+
+class FakeProvider(LLMProvider):
+    """
+    Deterministic in-process stand-in for Gemini.
+
+    Replies depend only on the request, so caching and coalescing behave as
+    they would against the real API. Latency and failures are random, drawn
+    from ``latency`` and ``error_rate`` (seed them for repeatable runs).
+    """
+
+    name = "fake"
+
+    # Share of the sampled latency spent before the first streamed chunk.
+    FIRST_CHUNK = 0.2
+    STREAM_CHUNK_CHARS = 48
+
+    def __init__(self, latency: LatencyModel = LatencyModel(), error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "errors": 0, "timeouts": 0}
+
+    def send(self, body: bytes, timeout: Optional[float] = None) -> PooledResponse:
+        delay, fail = self._draw()
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            self._bump("timeouts")
+            raise TimeoutError("fake provider timed out")
+        time.sleep(delay)
+        return self._respond(body, fail)
+
+    async def asend(self, body: bytes, timeout: Optional[float] = None) -> PooledResponse:
+        delay, fail = self._draw()
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            self._bump("timeouts")
+            raise TimeoutError("fake provider timed out")
+        await asyncio.sleep(delay)
+        return self._respond(body, fail)
+
+    async def astream(self, body: bytes, timeout: Optional[float] = None) -> AsyncIterator[bytes]:
+        delay, fail = self._draw()
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            self._bump("timeouts")
+            raise TimeoutError("fake provider timed out")
+        if fail:
+            await asyncio.sleep(delay * self.FIRST_CHUNK)
+            raise HTTPStatusError(self._respond(body, fail))
+
+        chunks = self.stream_events(self.reply_text(body))
+        await asyncio.sleep(delay * self.FIRST_CHUNK)
+        gap = delay * (1 - self.FIRST_CHUNK) / max(1, len(chunks) - 1)
+        for i, chunk in enumerate(chunks):
+            if i:
+                await asyncio.sleep(gap)
+            yield chunk
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            result: Dict[str, object] = dict(self._stats)
+        result["provider"] = self.name
+        return result
+
+    # ── Replies ──
+
+    def reply_text(self, body: bytes) -> str:
+        """The canned model output for a request body."""
+        request = json.loads(body.decode("utf-8"))
+        system = request["system_instruction"]["parts"][0]["text"]
+        user = request["contents"][0]["parts"][0]["text"]
+        digest = int(hashlib.sha256(user.encode("utf-8")).hexdigest()[:8], 16)
+
+        if system == prompts.EVALUATE_ANSWER_SYSTEM:
+            reply = {
+                "score": digest % 11,
+                "feedback": "Simulated evaluation from the offline provider.",
+                "matched_concepts": [],
+                "strengths": "Answer received.",
+                "improvement": "Run against the real API for genuine feedback.",
+            }
+        elif system == prompts.EVALUATE_CODE_SYSTEM:
+            reply = {
+                "score": digest % 11,
+                "passed_tests": digest % 4,
+                "total_tests": 3,
+                "feedback": "Simulated code review from the offline provider.",
+                "strengths": "Code received.",
+                "improvement": "Run against the real API for genuine feedback.",
+                "bugs_found": [],
+                "complexity_analysis": "Not analysed offline.",
+            }
+        elif _BATCH_REQUEST.match(user):
+            count = int(_BATCH_REQUEST.match(user).group(1))
+            reply = {"questions": [self._canned_question(system, digest + i) for i in range(count)]}
+        else:
+            reply = self._canned_question(system, digest)
+        return json.dumps(reply)
+
+    @staticmethod
+    def _canned_question(system: str, digest: int) -> Dict:
+        from . import ai_question_generator as gen
+
+        if system == prompts.GENERATE_DEBUG_QUESTION_SYSTEM:
+            bank = gen._FALLBACK_DEBUG["python"]
+        elif system == prompts.GENERATE_CODING_QUESTION_SYSTEM:
+            bank = gen._FALLBACK_CODING["python"]
+        elif system == prompts.GENERATE_LOGICAL_QUESTION_SYSTEM:
+            bank = gen._FALLBACK_LOGICAL
+        else:
+            return {}
+        return dict(bank[digest % len(bank)])
+
+    def stream_events(self, text: str) -> list:
+        """Split a reply into ``streamGenerateContent`` SSE events."""
+        step = self.STREAM_CHUNK_CHARS
+        return [
+            b"data: " + json.dumps(_candidate(text[i:i + step])).encode("utf-8") + b"\r\n\r\n"
+            for i in range(0, len(text), step)
+        ]
+
+    def _respond(self, body: bytes, fail: bool) -> PooledResponse:
+        if fail:
+            payload = {"error": {"code": 503, "message": "Simulated overload", "status": "UNAVAILABLE"}}
+            return PooledResponse(503, dict(_JSON_HEADERS), json.dumps(payload).encode("utf-8"))
+        payload = _candidate(self.reply_text(body))
+        return PooledResponse(200, dict(_JSON_HEADERS), json.dumps(payload).encode("utf-8"))
+
+    def _draw(self) -> Tuple[float, bool]:
+        with self._lock:
+            self._stats["calls"] += 1
+            delay = self.latency.sample(self._rng)
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self._stats["errors"] += 1
+        return delay, fail
+
+    def _bump(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+def _candidate(text: str) -> Dict:
+    return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+
+
+class _FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    provider: FakeProvider
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = self.path.split("?", 1)[0]
+        if path.endswith(":generateContent"):
+            resp = self.provider.send(body)
+            self._reply(resp.status, resp.body)
+        elif path.endswith(":streamGenerateContent"):
+            self._stream(body)
+        else:
+            self._reply(404, b'{"error": {"code": 404, "message": "Unknown method"}}')
+
+    def _reply(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, body: bytes) -> None:
+        delay, fail = self.provider._draw()
+        time.sleep(delay * FakeProvider.FIRST_CHUNK)
+        if fail:
+            self._reply(503, self.provider._respond(body, True).body)
+            return
+        events = self.provider.stream_events(self.provider.reply_text(body))
+        gap = delay * (1 - FakeProvider.FIRST_CHUNK) / max(1, len(events) - 1)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, event in enumerate(events):
+            if i:
+                time.sleep(gap)
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_fake_gemini(
+    provider: FakeProvider, host: str = "127.0.0.1", port: int = 0
+) -> ThreadingHTTPServer:
+    """
+    Start a local ``generateContent`` server backed by ``provider`` on a daemon
+    thread. Point ``GEMINI_BASE_URL`` at ``http://host:port`` to use it.
+    """
+    handler = type("FakeGeminiHandler", (_FakeGeminiHandler,), {"provider": provider})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,35 +1,56 @@
 import random
 from typing import Dict, List, Optional
 
-from .evaluation import compile_interview_report, evaluate_answer
-from .questions import get_question_bank
+from .deadline import Deadline
+from .evaluation import aevaluate_answer, compile_interview_report, evaluate_answer
+from .questions import Question, get_question_bank, get_question_bank_version
+from .state_codec import KIND_INTERVIEW, decode_state, encode_state
 
 INTERVIEW_QUESTION_COUNT = 25
 
 
 class InterviewSession:
-    def __init__(self, questions=None, index=0, responses=None, selected_qids: Optional[List[int]] = None):
-        bank = get_question_bank()
-        by_qid = {question.qid: question for question in bank}
-
-        if questions is not None:
-            self.questions = questions
-        elif selected_qids:
-            self.questions = [by_qid[qid] for qid in selected_qids if qid in by_qid]
-        else:
-            count = min(INTERVIEW_QUESTION_COUNT, len(bank))
-            self.questions = random.sample(bank, count)
+    """
+    A theory interview. The question order is drawn from the bank with
+    ``seed``, so state only holds the seed, the bank version, the position
+    and the scores. Questions and responses are rebuilt when needed.
+    """
 
-        self.selected_qids = [question.qid for question in self.questions]
+    def __init__(self, seed: Optional[int] = None, index: int = 0, scores: Optional[List[int]] = None):
+        self.seed = random.getrandbits(32) if seed is None else seed
         self.index = index
-        self.responses = responses or []
+        self.scores: List[int] = scores or []
+        self._questions: Optional[List[Question]] = None
+
+    @property
+    def questions(self) -> List[Question]:
+        if self._questions is None:
+            bank = get_question_bank()
+            count = min(INTERVIEW_QUESTION_COUNT, len(bank))
+            self._questions = random.Random(self.seed).sample(bank, count)
+        return self._questions
+
+    @property
+    def responses(self) -> List[Dict[str, object]]:
+        return [
+            {"qid": q.qid, "topic": q.topic, "question": q.prompt, "score": score}
+            for q, score in zip(self.questions, self.scores)
+        ]
 
     def get_current_question(self):
         return self.questions[self.index]
 
-    def save_response(self, response: str) -> Dict[str, object]:
+    def save_response(self, response: str, deadline: Optional[Deadline] = None) -> Dict[str, object]:
+        question = self.get_current_question()
+        evaluation = evaluate_answer(question, response, deadline)
+        return self._record_response(question, response, evaluation)
+
+    async def asave_response(self, response: str, deadline: Optional[Deadline] = None) -> Dict[str, object]:
         question = self.get_current_question()
-        evaluation = evaluate_answer(question, response)
+        evaluation = await aevaluate_answer(question, response, deadline)
+        return self._record_response(question, response, evaluation)
+
+    def _record_response(self, question, response: str, evaluation: Dict[str, object]) -> Dict[str, object]:
         payload = {
             "qid": question.qid,
             "topic": question.topic,
@@ -41,7 +62,7 @@ class InterviewSession:
             "strengths": evaluation.get("strengths", ""),
             "improvement": evaluation.get("improvement", ""),
         }
-        self.responses.append(payload)
+        self.scores.append(evaluation["score"])
         self.index += 1
         return payload
 
@@ -49,28 +70,31 @@ class InterviewSession:
         return self.index >= len(self.questions)
 
     def to_dict(self) -> Dict[str, object]:
-        mini_responses = []
-        for r in self.responses:
-            mini_responses.append({
-                "qid": r.get("qid"),
-                "topic": r.get("topic"),
-                "question": r.get("question"),
-                "answer": r.get("answer"),
-                "score": r.get("score", 0),
-            })
         return {
+            "seed": self.seed,
+            "bank_version": get_question_bank_version(),
             "index": self.index,
-            "responses": mini_responses,
-            "selected_qids": self.selected_qids,
+            "scores": self.scores,
         }
 
     @classmethod
     def from_dict(cls, data: Dict[str, object]):
+        """The saved session, or a new one if there is none or it was drawn from another bank version."""
+        if "seed" not in data or data.get("bank_version") != get_question_bank_version():
+            return cls()
         return cls(
+            seed=int(data["seed"]),
             index=int(data.get("index", 0)),
-            responses=list(data.get("responses", [])),
-            selected_qids=[int(qid) for qid in data.get("selected_qids", [])],
+            scores=list(data.get("scores", [])),
         )
 
+    def to_bytes(self) -> bytes:
+        """``to_dict()`` in the compact ``state_codec`` form."""
+        return encode_state(KIND_INTERVIEW, self.to_dict())
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "InterviewSession":
+        return cls.from_dict(decode_state(blob, KIND_INTERVIEW))
+
     def final_report(self) -> Dict[str, object]:
         return compile_interview_report(self.responses)
@@ -0,0 +1,105 @@
+import json
+import time
+import zlib
+
+from django.core.management.base import BaseCommand
+
+from interviewer import advanced_logic
+from interviewer.advanced_logic import AdvancedSession
+from interviewer.aptitude_logic import AptitudeSession
+from interviewer.logic import InterviewSession
+from interviewer.question_bank import get_local_bank
+
+
+def _advanced_session(mode: str, answered: int) -> AdvancedSession:
+    """A mid-round session built from the local banks, without any model calls."""
+    s = AdvancedSession(mode=mode, lang="python")
+    bank = get_local_bank()
+    language = "python" if mode == "debug" else None
+    # Questions are generated one ahead of the answers.
+    while len(s.questions) <= answered:
+        q = bank.draw(s.bank_cursor, (), [q["title"] for q in s.questions], type=mode, language=language)
+        if q is None:
+            break
+        s.index = len(s.questions)
+        s._accept_question(q)
+    s.index = 0
+    for q in s.questions[:answered]:
+        evaluation = {
+            "score": 7, "passed_tests": 2, "total_tests": 3,
+            "feedback": "The fix addresses the main bug but misses the empty-input case.",
+            "strengths": "Found the off-by-one quickly.", "improvement": "Check boundary conditions.",
+            "bugs_found": ["Loop bound excludes the last element"], "complexity_analysis": "O(n) time, O(1) space",
+        }
+        s._record_evaluation(q, q.get("fixed_code") or q.get("buggy_code", ""), evaluation, 95.5)
+    return s
+
+
+def _interview_session(answered: int) -> InterviewSession:
+    s = InterviewSession()
+    for question in s.questions[:answered]:
+        s._record_response(question, "A process owns resources; threads share its address space.", {
+            "score": 6, "feedback": "", "matched_keywords": ["process", "thread"],
+        })
+    return s
+
+
+def _aptitude_session(answered: int) -> AptitudeSession:
+    s = AptitudeSession()
+    for _ in range(answered):
+        s.evaluate_answer("B")
+    return s
+
+
+def _time(fn, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds * 1e6
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the session state codec with the JSON dict form (as the signed-cookie "
+        "session serializes and compresses it): encoded size and encode/decode time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=2000)
+        parser.add_argument(
+            "--question-refs", choices=("on", "off"),
+            help="Save advanced questions by question-store ref (default: INTERVIEW_QUESTION_REFS).",
+        )
+
+    def handle(self, *args, **options):
+        rounds = options["rounds"]
+        if options["question_refs"]:
+            advanced_logic.QUESTION_REFS = options["question_refs"] == "on"
+        sessions = [
+            ("interview, 10 answered", _interview_session(10)),
+            ("aptitude, 8 answered", _aptitude_session(8)),
+            ("debug, 1 answered", _advanced_session("debug", 1)),
+            ("debug, 4 answered", _advanced_session("debug", 4)),
+            ("logical, 2 answered", _advanced_session("logical", 2)),
+        ]
+        self.stdout.write(
+            f"{'session':<24}{'json B':>8}{'json+zlib B':>13}{'codec B':>9}"
+            f"{'json enc us':>13}{'codec enc us':>14}{'json dec us':>13}{'codec dec us':>14}"
+        )
+        for label, session in sessions:
+            data = session.to_dict()
+            cls = type(session)
+
+            def json_encode():
+                return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+            text = json.dumps(data, separators=(",", ":")).encode("utf-8")
+            packed = json_encode()
+            blob = session.to_bytes()
+            assert cls.from_bytes(blob).to_dict() == data
+            self.stdout.write(
+                f"{label:<24}{len(text):>8}{len(packed):>13}{len(blob):>9}"
+                f"{_time(json_encode, rounds):>13.1f}{_time(session.to_bytes, rounds):>14.1f}"
+                f"{_time(lambda: cls.from_dict(json.loads(zlib.decompress(packed))), rounds):>13.1f}"
+                f"{_time(lambda: cls.from_bytes(blob), rounds):>14.1f}"
+            )
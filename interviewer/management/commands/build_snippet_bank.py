@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from interviewer.snippet_loader import SNIPPET_BANK_PATH, build_snippet_bank
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-format the JSON code snippets into the binary snippet bank that is "
+        "memory-mapped at startup. Re-run whenever a *_code_snippets.json file changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=SNIPPET_BANK_PATH)
+
+    def handle(self, *args, **options):
+        count = build_snippet_bank(options["output"])
+        self.stdout.write(f"Wrote {count} snippets to {options['output']}")
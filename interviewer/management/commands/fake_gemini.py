@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from interviewer.llm_providers import FakeProvider, LatencyModel, serve_fake_gemini
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the Gemini generateContent API with simulated "
+        "latency and errors. Point GEMINI_BASE_URL at it to load-test offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency-median", type=float, default=0.8, help="seconds")
+        parser.add_argument("--latency-p99", type=float, default=4.0, help="seconds")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="share of calls answered with 503")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        provider = FakeProvider(
+            LatencyModel(options["latency_median"], options["latency_p99"]),
+            error_rate=options["error_rate"],
+            seed=options["seed"],
+        )
+        server = serve_fake_gemini(provider, options["host"], options["port"])
+        host, port = server.server_address[:2]
+        self.stdout.write(f"Fake Gemini listening; set GEMINI_BASE_URL=http://{host}:{port} and any GEMINI_API_KEY")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            server.server_close()
+            self.stdout.write(str(provider.stats()))
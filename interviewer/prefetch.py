@@ -0,0 +1,130 @@
+"""
+Speculative prefetch of a session's next question.
+
+When a question is served, the session schedules generation of the next one
+on a worker thread. The result is parked here under (session id, question
+number) until the answer or skip request that needs it picks it up; if the
+generation is still running at that point, the request waits on it (within
+its deadline) instead of starting a second one.
+
+Parked work is process-local. A request that lands on another worker simply
+misses and generates as before. Entries are cancelled when the interview
+ends and expire after ``ttl`` seconds if nobody collects them.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_ENABLED = os.environ.get("QUESTION_PREFETCH", "true").lower() in ("1", "true", "yes")
+PREFETCH_WORKERS = int(os.environ.get("QUESTION_PREFETCH_WORKERS", "4"))
+# Longest a request waits on an in-flight prefetch when it has no deadline.
+PREFETCH_MAX_WAIT = float(os.environ.get("QUESTION_PREFETCH_MAX_WAIT", "10"))
+# Uncollected results are dropped after this many seconds.
+PREFETCH_TTL = float(os.environ.get("QUESTION_PREFETCH_TTL", "900"))
+
+
+class Prefetcher:
+    """Runs speculative work on threads and parks the results by key."""
+
+    def __init__(self, max_workers: int = 4, ttl: float = 900.0, enabled: bool = True):
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: Dict[Tuple[str, int], Tuple[float, Future]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {"scheduled": 0, "used": 0, "missed": 0, "cancelled": 0, "expired": 0}
+
+    def schedule(self, session_id: str, qnum: int, fn: Callable[[], Optional[Dict]]) -> bool:
+        """Start ``fn`` for question ``qnum`` of a session unless already parked."""
+        if not self.enabled:
+            return False
+        key = (session_id, qnum)
+        with self._lock:
+            self._expire(time.monotonic())
+            if key in self._entries:
+                return False
+            # Anything parked for earlier questions of this session is stale.
+            for stale in [k for k in self._entries if k[0] == session_id and k[1] < qnum]:
+                self._entries.pop(stale)[1].cancel()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="question-prefetch"
+                )
+            self._entries[key] = (time.monotonic(), self._executor.submit(fn))
+            self._stats["scheduled"] += 1
+        return True
+
+    def take(self, session_id: str, qnum: int, timeout: float) -> Optional[Dict]:
+        """Collect the parked result, waiting up to ``timeout`` if it is still running."""
+        future = self._pop(session_id, qnum)
+        if future is None:
+            return None
+        try:
+            return self._used(future.result(timeout=max(0.0, timeout)))
+        except (FutureTimeout, CancelledError):
+            future.cancel()
+        except Exception as exc:
+            logger.warning("Question prefetch failed: %s", exc)
+        return self._used(None)
+
+    async def atake(self, session_id: str, qnum: int, timeout: float) -> Optional[Dict]:
+        """Async counterpart of ``take``."""
+        future = self._pop(session_id, qnum)
+        if future is None:
+            return None
+        if future.cancelled():
+            return self._used(None)
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), max(0.0, timeout)
+            )
+            return self._used(result)
+        except asyncio.TimeoutError:
+            future.cancel()
+        except Exception as exc:
+            logger.warning("Question prefetch failed: %s", exc)
+        return self._used(None)
+
+    def cancel(self, session_id: str) -> None:
+        """Drop everything parked for a session (interview over)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == session_id]:
+                self._entries.pop(key)[1].cancel()
+                self._stats["cancelled"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, parked=len(self._entries))
+
+    def _pop(self, session_id: str, qnum: int) -> Optional[Future]:
+        with self._lock:
+            entry = self._entries.pop((session_id, qnum), None)
+        return entry[1] if entry else None
+
+    def _used(self, result: Optional[Dict]) -> Optional[Dict]:
+        with self._lock:
+            self._stats["used" if result else "missed"] += 1
+        return result
+
+    def _expire(self, now: float) -> None:
+        # Call with self._lock held.
+        for key in [k for k, (at, _) in self._entries.items() if now - at > self.ttl]:
+            self._entries.pop(key)[1].cancel()
+            self._stats["expired"] += 1
+
+
+PREFETCHER = Prefetcher(max_workers=PREFETCH_WORKERS, ttl=PREFETCH_TTL, enabled=PREFETCH_ENABLED)
+
+
+def get_prefetch_stats() -> Dict[str, int]:
+    return PREFETCHER.stats()
@@ -2,6 +2,10 @@
 Centralized system prompts for the AI evaluation and question generation.
 """
 
+# Bump whenever any template below changes so cached LLM responses
+# rendered from the old wording are no longer served.
+PROMPT_VERSION = 1
+
 # ═══════════════════════════════════════════════
 #  THEORY ANSWER EVALUATION
 # ═══════════════════════════════════════════════
@@ -156,6 +160,47 @@ Requirements:
 Respond with JSON only."""
 
 
+# ═══════════════════════════════════════════════
+#  BATCH QUESTION GENERATION
+#  Sent with the matching single-question system prompt.
+# ═══════════════════════════════════════════════
+
+GENERATE_DEBUG_BATCH_USER = """Generate {count} different debugging questions in {language}, one per line below (difficulty - topic):
+{items}
+
+Requirements for every question:
+- The code must be a complete, realistic DSA implementation (not a toy example)
+- The bug should be subtle but identifiable
+- Include proper {language} syntax with correct indentation
+- Code should be 10-25 lines
+- Previously used topics to avoid: {used_topics}
+
+Respond with ONLY a JSON object {{"questions": [...]}} holding one question object per line above, in the same order, each in the format given in the system prompt."""
+
+GENERATE_CODING_BATCH_USER = """Generate {count} different coding problems in {language}, one per line below (difficulty - topic):
+{items}
+
+Requirements for every problem:
+- Must be a complete, well-defined DSA problem
+- Include a clear function signature as starter code
+- Include 3+ test cases including edge cases
+- The problem should be solvable in 10-30 lines of code
+- Use proper {language} syntax
+- Previously used topics to avoid: {used_topics}
+
+Respond with ONLY a JSON object {{"questions": [...]}} holding one question object per line above, in the same order, each in the format given in the system prompt."""
+
+GENERATE_LOGICAL_BATCH_USER = """Generate {count} different logical reasoning or puzzle questions, one per line below (difficulty - topic):
+{items}
+
+Requirements for every question:
+- Must test logic, math, system design reasoning, or algorithmic thinking without requiring code.
+- Provide a clear and unambiguous correct answer in the 'correct_answer' field.
+- Previously used topics to avoid: {used_topics}
+
+Respond with ONLY a JSON object {{"questions": [...]}} holding one question object per line above, in the same order, each in the format given in the system prompt."""
+
+
 # ═══════════════════════════════════════════════
 #  CODE SUBMISSION EVALUATION
 # ═══════════════════════════════════════════════
@@ -225,3 +270,104 @@ DIFFICULTY_WEIGHTS = {
     "Medium": 0.50,
     "Hard": 0.25,
 }
+
+
+# ═══════════════════════════════════════════════
+#  RESPONSE SCHEMAS
+#  Sent as ``generationConfig.responseSchema`` so Gemini returns bare JSON
+#  of the right shape; mirrors the formats in the prompts above.
+# ═══════════════════════════════════════════════
+
+def _object(properties, required):
+    return {
+        "type": "OBJECT",
+        "properties": properties,
+        "required": list(required),
+        "propertyOrdering": list(properties),
+    }
+
+
+_STRING = {"type": "STRING"}
+_INTEGER = {"type": "INTEGER"}
+_STRINGS = {"type": "ARRAY", "items": _STRING}
+_TEST_CASES = {
+    "type": "ARRAY",
+    "items": _object({"input": _STRING, "expected": _STRING}, ["input", "expected"]),
+}
+
+ANSWER_EVAL_SCHEMA = _object(
+    {
+        "score": _INTEGER,
+        "feedback": _STRING,
+        "matched_concepts": _STRINGS,
+        "strengths": _STRING,
+        "improvement": _STRING,
+    },
+    ["score", "feedback"],
+)
+
+CODE_EVAL_SCHEMA = _object(
+    {
+        "score": _INTEGER,
+        "passed_tests": _INTEGER,
+        "total_tests": _INTEGER,
+        "feedback": _STRING,
+        "strengths": _STRING,
+        "improvement": _STRING,
+        "bugs_found": _STRINGS,
+        "complexity_analysis": _STRING,
+    },
+    ["score", "feedback"],
+)
+
+DEBUG_QUESTION_SCHEMA = _object(
+    {
+        "topic": _STRING,
+        "title": _STRING,
+        "difficulty": _STRING,
+        "description": _STRING,
+        "buggy_code": _STRING,
+        "bug_explanation": _STRING,
+        "fixed_code": _STRING,
+        "hints": _STRINGS,
+        "test_cases": _TEST_CASES,
+    },
+    ["topic", "title", "description", "buggy_code", "bug_explanation", "fixed_code", "test_cases"],
+)
+
+CODING_QUESTION_SCHEMA = _object(
+    {
+        "topic": _STRING,
+        "title": _STRING,
+        "difficulty": _STRING,
+        "description": _STRING,
+        "examples": {
+            "type": "ARRAY",
+            "items": _object({"input": _STRING, "output": _STRING, "explanation": _STRING}, ["input", "output"]),
+        },
+        "constraints": _STRINGS,
+        "starter_code": _STRING,
+        "solution_code": _STRING,
+        "test_cases": _TEST_CASES,
+        "time_complexity": _STRING,
+        "space_complexity": _STRING,
+    },
+    ["topic", "title", "description", "starter_code", "solution_code", "test_cases"],
+)
+
+LOGICAL_QUESTION_SCHEMA = _object(
+    {
+        "topic": _STRING,
+        "title": _STRING,
+        "difficulty": _STRING,
+        "description": _STRING,
+        "hints": _STRINGS,
+        "correct_answer": _STRING,
+    },
+    ["topic", "title", "description", "correct_answer"],
+)
+
+
+def batch_schema(question_schema):
+    """Schema for the ``{"questions": [...]}`` reply of a batch prompt."""
+    return _object({"questions": {"type": "ARRAY", "items": question_schema}}, ["questions"])
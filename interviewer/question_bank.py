@@ -0,0 +1,162 @@
+"""
+Immutable, indexed engine over the local question banks.
+
+``QuestionBank`` is built once per process from a fixed list of question
+dicts. Every item is filed under each combination of (type, language,
+difficulty, topic) with any of the four left open, so a lookup for any
+filter is a single dict access returning a compact ``array`` of item ids;
+nothing is filtered or copied per request apart from the question handed out.
+
+``BankCursor`` gives a session its own shuffled walk through each bucket
+without storing a permutation: position ``i`` maps to ``(a * i + b) % n``
+with ``a`` coprime to ``n``, which visits every item exactly once before a
+new (a, b) is drawn. The state is a few integers per bucket, small enough to
+live in the signed-cookie session.
+"""
+from __future__ import annotations
+
+import math
+import random
+from array import array
+from functools import lru_cache
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .advanced_questions import AdvancedQuestion, get_full_advanced_bank
+
+FIELDS = ("type", "language", "difficulty", "topic")
+
+Key = Tuple[Optional[str], ...]
+
+
+class BankCursor:
+    """Per-session position in a pseudo-random permutation of each bucket."""
+
+    def __init__(self, state: Optional[Dict[str, List[int]]] = None, rng: Optional[random.Random] = None):
+        # bucket key -> [a, b, position, size]
+        self.state: Dict[str, List[int]] = {k: list(v) for k, v in (state or {}).items()}
+        self._rng = rng or random
+
+    def next_offset(self, bucket: str, size: int) -> int:
+        """Next offset in ``range(size)``; every offset comes up once per cycle."""
+        entry = self.state.get(bucket)
+        if entry is None or entry[3] != size or entry[2] >= size:
+            entry = self.state[bucket] = [self._coprime(size), self._rng.randrange(size), 0, size]
+        a, b, pos, _ = entry
+        entry[2] = pos + 1
+        return (a * pos + b) % size
+
+    def remaining(self, bucket: str, size: int) -> int:
+        """Offsets left in the current cycle before a new permutation is drawn."""
+        entry = self.state.get(bucket)
+        if entry is None or entry[3] != size:
+            return 0
+        return max(0, size - entry[2])
+
+    def to_dict(self) -> Dict[str, List[int]]:
+        return {k: list(v) for k, v in self.state.items()}
+
+    def _coprime(self, size: int) -> int:
+        if size <= 2:
+            return 1
+        while True:
+            a = self._rng.randrange(1, size)
+            if math.gcd(a, size) == 1:
+                return a
+
+
+class QuestionBank:
+    """Read-only question store indexed by every subset of ``FIELDS``."""
+
+    def __init__(self, items: Iterable[Dict]):
+        self._items: Tuple[Dict, ...] = tuple(items)
+        # Group by the full key first, then merge each group into its
+        # wildcard buckets, so the per-item work is one dict lookup.
+        exact: Dict[Key, array] = {}
+        for i, item in enumerate(self._items):
+            key = tuple(item.get(field, "") for field in FIELDS)
+            bucket = exact.get(key)
+            if bucket is None:
+                bucket = exact[key] = array("I")
+            bucket.append(i)
+        index: Dict[Key, array] = {}
+        masks = list(product((False, True), repeat=len(FIELDS)))
+        for key, ids in exact.items():
+            for mask in masks:
+                partial = tuple(v if keep else None for v, keep in zip(key, mask))
+                index.setdefault(partial, array("I")).extend(ids)
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def count(self, **filters: Optional[str]) -> int:
+        return len(self._index.get(self._key(filters), ()))
+
+    def draw(
+        self,
+        cursor: Optional[BankCursor] = None,
+        exclude_topics: Iterable[str] = (),
+        exclude_titles: Iterable[str] = (),
+        **filters: Optional[str],
+    ) -> Optional[Dict]:
+        """
+        A copy of the next item matching ``filters`` (``type``, ``language``,
+        ``difficulty``, ``topic``; None means any), skipping excluded topics
+        and titles. With a cursor the session walks its own shuffled order;
+        without one the start is random. None if nothing qualifies.
+        """
+        key = self._key(filters)
+        bucket = self._index.get(key)
+        if not bucket:
+            return None
+        size = len(bucket)
+        skip_topics, skip_titles = set(exclude_topics), set(exclude_titles)
+        name = "|".join("*" if v is None else v for v in key)
+        # Finish the current cycle, then one full new permutation: every item is
+        # seen at least once, so a match is never missed.
+        cursor = cursor or BankCursor()
+        for _ in range(cursor.remaining(name, size) + size):
+            offset = cursor.next_offset(name, size)
+            item = self._items[bucket[offset]]
+            if item.get("topic") in skip_topics or item.get("title") in skip_titles:
+                continue
+            return dict(item)
+        return None
+
+    @staticmethod
+    def _key(filters: Dict[str, Optional[str]]) -> Key:
+        unknown = set(filters) - set(FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown bank filter(s): {', '.join(sorted(unknown))}")
+        return tuple(filters.get(field) for field in FIELDS)
+
+
+def _from_advanced(q: AdvancedQuestion) -> Dict:
+    """An ``AdvancedQuestion`` in the shape the AI generator returns."""
+    return {
+        "type": q.question_type,
+        "topic": q.topic,
+        "title": q.prompt.split("\n", 1)[0].strip()[:80],
+        "difficulty": q.difficulty,
+        "description": q.prompt,
+        "buggy_code": q.code_snippet,
+        "bug_explanation": q.correct_answer,
+        "fixed_code": "",
+        "hints": list(q.hints),
+        "test_cases": [],
+        "language": q.language,
+    }
+
+
+@lru_cache(maxsize=1)
+def get_local_bank() -> QuestionBank:
+    """The built-in, snippet and fallback banks as one engine, built once per process."""
+    from .ai_question_generator import _FALLBACK_CODING, _FALLBACK_DEBUG, _FALLBACK_LOGICAL
+
+    items: List[Dict] = [_from_advanced(q) for q in get_full_advanced_bank()]
+    for bank in (_FALLBACK_DEBUG, _FALLBACK_CODING):
+        for questions in bank.values():
+            items.extend(questions)
+    items.extend(dict(q, language="") for q in _FALLBACK_LOGICAL)
+    return QuestionBank(items)
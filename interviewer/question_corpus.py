@@ -0,0 +1,258 @@
+"""
+Persistent corpus of AI-generated questions.
+
+Every question that comes back from the model is stored in a SQLite file
+keyed by (mode, language, difficulty, topic), so later sessions can be served
+from it instead of paying for another generation call. A MinHash signature
+over the question text is banded into an LSH index; an insert whose estimated
+Jaccard similarity to an existing question of the same mode and language
+reaches ``threshold`` is rejected as a near-duplicate (the tenth "Two Sum"
+variant adds nothing).
+
+Sampling prefers the least-served questions on topics the session has not
+used yet, and only starts once a (mode, language, difficulty) bucket holds
+``min_size`` questions, so a young corpus does not hand out the same handful
+of questions over and over.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# SQLite file for the corpus; an empty string disables it.
+QUESTION_CORPUS_PATH = os.environ.get(
+    "QUESTION_CORPUS_PATH", os.path.join(tempfile.gettempdir(), "mock_interviewer_questions.sqlite3")
+)
+# Estimated Jaccard similarity at which a new question counts as a repeat.
+QUESTION_CORPUS_THRESHOLD = float(os.environ.get("QUESTION_CORPUS_THRESHOLD", "0.6"))
+# Questions a (mode, language, difficulty) bucket needs before it is sampled.
+QUESTION_CORPUS_MIN_SIZE = int(os.environ.get("QUESTION_CORPUS_MIN_SIZE", "20"))
+
+_PRIME = (1 << 61) - 1
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class MinHasher:
+    """MinHash signatures over word shingles, with LSH band keys."""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, text: str) -> List[int]:
+        tokens = _TOKEN.findall(text.lower())
+        k = self.shingle
+        shingles = {" ".join(tokens[i:i + k]) for i in range(max(1, len(tokens) - k + 1))}
+        hashes = [_hash64(s) for s in shingles]
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms]
+
+    def band_keys(self, signature: List[int], scope: str) -> List[str]:
+        """One bucket key per band; ``scope`` keeps unrelated questions apart."""
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(
+                f"{scope}|{band}|{rows}".encode("utf-8"), digest_size=8
+            ).hexdigest()
+            keys.append(digest)
+        return keys
+
+    @staticmethod
+    def similarity(a: List[int], b: List[int]) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(x == y for x, y in zip(a, b)) / max(len(a), 1)
+
+
+def question_text(question: Dict) -> str:
+    """The text that identifies a question for near-duplicate checks."""
+    return " ".join(
+        str(question.get(field, ""))
+        for field in ("title", "description", "buggy_code", "starter_code", "correct_answer")
+    )
+
+
+class QuestionCorpus:
+    """SQLite-backed store of generated questions with an LSH duplicate index."""
+
+    def __init__(
+        self,
+        path: str,
+        threshold: float = 0.6,
+        min_size: int = 20,
+        hasher: Optional[MinHasher] = None,
+    ):
+        self.path = path
+        self.threshold = threshold
+        self.min_size = min_size
+        self.hasher = hasher or MinHasher()
+        self._lock = threading.Lock()
+        self._stats = {"inserted": 0, "duplicates": 0, "served": 0, "misses": 0}
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS questions ("
+            " id INTEGER PRIMARY KEY, mode TEXT NOT NULL, language TEXT NOT NULL,"
+            " difficulty TEXT NOT NULL, topic TEXT NOT NULL, body TEXT NOT NULL,"
+            " signature BLOB NOT NULL, served INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS questions_key"
+            " ON questions (mode, language, difficulty, served)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS question_bands ("
+            " bucket TEXT NOT NULL, question_id INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS question_bands_bucket ON question_bands (bucket)"
+        )
+
+    def add(self, question: Dict) -> bool:
+        """Store a generated question; False if it near-duplicates a stored one."""
+        mode = str(question.get("type", ""))
+        language = str(question.get("language", "")) if mode != "logical" else ""
+        signature = self.hasher.signature(question_text(question))
+        buckets = self.hasher.band_keys(signature, f"{mode}|{language}")
+        with self._lock:
+            if self._find_duplicate(signature, buckets) is not None:
+                self._stats["duplicates"] += 1
+                return False
+            cur = self._conn.execute(
+                "INSERT INTO questions (mode, language, difficulty, topic, body, signature, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    mode,
+                    language,
+                    str(question.get("difficulty", "")).capitalize(),
+                    str(question.get("topic", "")),
+                    json.dumps(question),
+                    array("Q", signature).tobytes(),
+                    time.time(),
+                ),
+            )
+            self._conn.executemany(
+                "INSERT INTO question_bands (bucket, question_id) VALUES (?, ?)",
+                [(bucket, cur.lastrowid) for bucket in buckets],
+            )
+            self._stats["inserted"] += 1
+        return True
+
+    def sample(
+        self, mode: str, language: str, difficulty: str, used_topics: Iterable[str] = ()
+    ) -> Optional[Dict]:
+        """A least-served question on an unused topic, or None if the bucket is too small."""
+        language = language if mode != "logical" else ""
+        used = list(set(used_topics))
+        with self._lock:
+            (size,) = self._conn.execute(
+                "SELECT COUNT(*) FROM questions WHERE mode = ? AND language = ? AND difficulty = ?",
+                (mode, language, difficulty),
+            ).fetchone()
+            row = None
+            if size >= self.min_size:
+                row = self._conn.execute(
+                    "SELECT id, body FROM questions"
+                    " WHERE mode = ? AND language = ? AND difficulty = ?"
+                    f" AND topic NOT IN ({', '.join('?' * len(used))})"
+                    " ORDER BY served, RANDOM() LIMIT 1",
+                    (mode, language, difficulty, *used),
+                ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE questions SET served = served + 1 WHERE id = ?", (row[0],))
+            self._stats["served"] += 1
+        return json.loads(row[1])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()
+            return dict(self._stats, size=size)
+
+    def _find_duplicate(self, signature: List[int], buckets: List[str]) -> Optional[int]:
+        # Call with self._lock held.
+        rows = self._conn.execute(
+            "SELECT DISTINCT q.id, q.signature FROM question_bands b"
+            " JOIN questions q ON q.id = b.question_id"
+            f" WHERE b.bucket IN ({', '.join('?' * len(buckets))})",
+            buckets,
+        ).fetchall()
+        for question_id, blob in rows:
+            if self.hasher.similarity(signature, list(array("Q", blob))) >= self.threshold:
+                return question_id
+        return None
+
+
+_corpus: Optional[QuestionCorpus] = None
+_corpus_failed = False
+_corpus_lock = threading.Lock()
+
+
+def get_corpus() -> Optional[QuestionCorpus]:
+    """The shared corpus, or None when disabled or the file can't be opened."""
+    global _corpus, _corpus_failed
+    if _corpus is None and not _corpus_failed and QUESTION_CORPUS_PATH:
+        with _corpus_lock:
+            if _corpus is None and not _corpus_failed:
+                try:
+                    _corpus = QuestionCorpus(
+                        QUESTION_CORPUS_PATH,
+                        threshold=QUESTION_CORPUS_THRESHOLD,
+                        min_size=QUESTION_CORPUS_MIN_SIZE,
+                    )
+                except sqlite3.Error as exc:
+                    logger.warning("Question corpus unavailable at %s: %s", QUESTION_CORPUS_PATH, exc)
+                    _corpus_failed = True
+    return _corpus
+
+
+def remember_question(question: Optional[Dict]) -> None:
+    """Add a freshly generated question to the corpus, if there is one."""
+    corpus = get_corpus()
+    if corpus is None or not question:
+        return
+    try:
+        corpus.add(question)
+    except sqlite3.Error as exc:
+        logger.warning("Question corpus write failed: %s", exc)
+
+
+def sample_question(
+    mode: str, language: str, difficulty: str, used_topics: Iterable[str] = ()
+) -> Optional[Dict]:
+    """A stored question for the slot, or None."""
+    corpus = get_corpus()
+    if corpus is None:
+        return None
+    try:
+        return corpus.sample(mode, language, difficulty, used_topics)
+    except sqlite3.Error as exc:
+        logger.warning("Question corpus read failed: %s", exc)
+        return None
+
+
+def get_corpus_stats() -> Dict[str, int]:
+    corpus = get_corpus()
+    return corpus.stats() if corpus is not None else {}
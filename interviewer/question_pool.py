@@ -0,0 +1,299 @@
+"""
+Warm pool of pre-generated advanced-round questions.
+
+A background thread keeps up to ``depth`` validated questions ready for
+every (mode, language, difficulty, topic) slot, drawing topics from
+``DSA_TOPICS`` and ``LOGICAL_TOPICS``. Sessions pop a ready question instead
+of waiting on a live Gemini call, and only generate live when the matching
+slots are empty. Generation runs at background priority, so it never
+competes with candidate-facing calls for quota, and fills up to ``batch_size``
+slots of one (mode, language) per call.
+
+Only questions that passed ``code_validation``'s execution check (or have
+nothing to execute) are pooled. Entries older than ``max_age`` are evicted
+when they are next looked at.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from . import ai_service
+from .code_validation import is_verified
+from .ai_question_generator import (
+    generate_debug_question,
+    generate_debug_questions,
+    generate_logical_question,
+    generate_logical_questions,
+)
+from .prompts import DSA_DIFFICULTIES, DSA_TOPICS, LOGICAL_TOPICS
+from .quota_scheduler import PRIORITY_BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+# Ready questions kept per slot; 0 disables the pool.
+QUESTION_POOL_DEPTH = int(os.environ.get("QUESTION_POOL_DEPTH", "1"))
+# Upper bound on background generations per minute.
+QUESTION_POOL_REFILL_PER_MIN = float(os.environ.get("QUESTION_POOL_REFILL_PER_MIN", "6"))
+# Seconds before a pooled question is considered stale.
+QUESTION_POOL_MAX_AGE = float(os.environ.get("QUESTION_POOL_MAX_AGE", str(6 * 3600)))
+# Questions requested per background generation call.
+QUESTION_POOL_BATCH = int(os.environ.get("QUESTION_POOL_BATCH", "4"))
+QUESTION_POOL_LANGUAGES = [
+    lang.strip()
+    for lang in os.environ.get("QUESTION_POOL_LANGUAGES", "python,java,cpp").split(",")
+    if lang.strip()
+]
+
+Group = Tuple[str, str, str]  # (mode, language, difficulty); language is "" for logical
+Slot = Tuple[str, str, str, str]  # group + topic
+
+
+def _group(mode: str, lang: str, difficulty: str) -> Group:
+    return (mode, lang if mode == "debug" else "", difficulty)
+
+
+class QuestionPool:
+    """Bounded per-slot queues of ready questions plus a background filler."""
+
+    def __init__(
+        self,
+        depth: int = 1,
+        refill_per_minute: float = 6.0,
+        max_age: float = 6 * 3600,
+        languages: Iterable[str] = ("python",),
+        batch_size: int = 1,
+    ):
+        self.depth = depth
+        self.batch_size = batch_size
+        self.refill_per_minute = refill_per_minute
+        self.max_age = max_age
+        self.languages = list(languages)
+        # group -> topic -> (created_at, question), oldest first
+        self._groups: Dict[Group, Dict[str, Deque[Tuple[float, Dict]]]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stats = {"hits": 0, "misses": 0, "generated": 0, "failed": 0, "unverified": 0, "stale_evicted": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.depth > 0
+
+    def slots(self) -> List[Slot]:
+        """Every slot the filler keeps warm."""
+        result = [
+            ("debug", lang, difficulty, topic)
+            for lang in self.languages
+            for difficulty in DSA_DIFFICULTIES
+            for topic in DSA_TOPICS
+        ]
+        result.extend(
+            ("logical", "", difficulty, topic)
+            for difficulty in DSA_DIFFICULTIES
+            for topic in LOGICAL_TOPICS
+        )
+        return result
+
+    def take(self, mode: str, lang: str, difficulty: str, used_topics: Iterable[str] = ()) -> Optional[Dict]:
+        """Pop a fresh question for a topic not in ``used_topics``, or None."""
+        if not self.enabled:
+            return None
+        used = set(used_topics)
+        now = time.monotonic()
+        with self._lock:
+            topics = self._groups.get(_group(mode, lang, difficulty), {})
+            candidates = [t for t, queue in topics.items() if queue and t not in used]
+            random.shuffle(candidates)
+            for topic in candidates:
+                queue = topics[topic]
+                self._evict_stale(queue, now)
+                if queue:
+                    self._stats["hits"] += 1
+                    return queue.popleft()[1]
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, slot: Slot, question: Dict) -> bool:
+        """Add a ready question to ``slot``; False if the slot is already full."""
+        mode, lang, difficulty, topic = slot
+        with self._lock:
+            topics = self._groups.setdefault(_group(mode, lang, difficulty), {})
+            queue = topics.setdefault(topic, deque())
+            self._evict_stale(queue, time.monotonic())
+            if len(queue) >= self.depth:
+                return False
+            queue.append((time.monotonic(), question))
+            return True
+
+    def next_slot(self) -> Optional[Slot]:
+        """The emptiest slot below ``depth`` (ties broken at random), or None."""
+        now = time.monotonic()
+        best: List[Slot] = []
+        best_size = self.depth
+        with self._lock:
+            for slot in self.slots():
+                queue = self._groups.get(slot[:3], {}).get(slot[3])
+                if queue:
+                    self._evict_stale(queue, now)
+                size = len(queue) if queue else 0
+                if size < best_size:
+                    best, best_size = [slot], size
+                elif size == best_size and size < self.depth:
+                    best.append(slot)
+        return random.choice(best) if best else None
+
+    def next_slots(self, limit: int) -> List[Slot]:
+        """``next_slot`` plus up to ``limit - 1`` more under-filled slots of the
+        same mode and language, each with a different topic, emptiest first."""
+        first = self.next_slot()
+        if first is None:
+            return []
+        now = time.monotonic()
+        candidates = []
+        with self._lock:
+            for slot in self.slots():
+                if slot[:2] != first[:2] or slot[3] == first[3]:
+                    continue
+                queue = self._groups.get(slot[:3], {}).get(slot[3])
+                if queue:
+                    self._evict_stale(queue, now)
+                size = len(queue) if queue else 0
+                if size < self.depth:
+                    candidates.append((size, random.random(), slot))
+        chosen, topics = [first], {first[3]}
+        for _, _, slot in sorted(candidates):
+            if len(chosen) >= limit:
+                break
+            if slot[3] not in topics:
+                chosen.append(slot)
+                topics.add(slot[3])
+        return chosen
+
+    def fill_once(self, generate: Optional[Callable[[Slot], Optional[Dict]]] = None) -> bool:
+        """Generate one question for the emptiest slot. Returns True if one was added."""
+        slot = self.next_slot()
+        if slot is None:
+            return False
+        question = self._checked((generate or _generate_for_slot)(slot))
+        return bool(question) and self.put(slot, question)
+
+    def fill_batch(
+        self, generate: Optional[Callable[[List[Slot]], List[Optional[Dict]]]] = None
+    ) -> int:
+        """Generate questions for up to ``batch_size`` slots in one call. Returns how many were added."""
+        slots = self.next_slots(self.batch_size)
+        if not slots:
+            return 0
+        questions = (generate or _generate_for_slots)(slots)
+        added = 0
+        for slot, question in zip(slots, questions):
+            question = self._checked(question)
+            if question and self.put(slot, question):
+                added += 1
+        return added
+
+    def start(self, ready: Callable[[], bool]) -> None:
+        """Start the background filler once; it idles while ``ready()`` is False."""
+        if not self.enabled or self.refill_per_minute <= 0:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, args=(ready,), name="question-pool", daemon=True
+            )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            result: Dict[str, object] = dict(self._stats)
+            by_mode: Dict[str, int] = {}
+            for (mode, _, _), topics in self._groups.items():
+                by_mode[mode] = by_mode.get(mode, 0) + sum(len(q) for q in topics.values())
+        result["ready"] = sum(by_mode.values())
+        result["ready_by_mode"] = by_mode
+        result["capacity"] = len(self.slots()) * self.depth
+        result["running"] = self._thread is not None and self._thread.is_alive()
+        return result
+
+    def _run(self, ready: Callable[[], bool]) -> None:
+        interval = 60.0 / self.refill_per_minute
+        while not self._stop.is_set():
+            started = time.monotonic()
+            if ready():
+                try:
+                    if self.batch_size > 1:
+                        self.fill_batch()
+                    else:
+                        self.fill_once()
+                except Exception as exc:
+                    logger.warning("Question pool refill failed: %s", exc)
+            self._stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    def _checked(self, question: Optional[Dict]) -> Optional[Dict]:
+        """Count a generation outcome; only questions that passed execution are pooled."""
+        if question and not is_verified(question):
+            key, question = "unverified", None
+        else:
+            key = "generated" if question else "failed"
+        with self._lock:
+            self._stats[key] += 1
+        return question
+
+    def _evict_stale(self, queue: Deque[Tuple[float, Dict]], now: float) -> None:
+        # Call with self._lock held.
+        while queue and now - queue[0][0] > self.max_age:
+            queue.popleft()
+            self._stats["stale_evicted"] += 1
+
+
+def _generate_for_slot(slot: Slot) -> Optional[Dict]:
+    mode, lang, difficulty, topic = slot
+    if mode == "debug":
+        return generate_debug_question(
+            lang, [], priority=PRIORITY_BACKGROUND, topic=topic, difficulty=difficulty
+        )
+    return generate_logical_question(
+        [], priority=PRIORITY_BACKGROUND, topic=topic, difficulty=difficulty
+    )
+
+
+def _generate_for_slots(slots: List[Slot]) -> List[Optional[Dict]]:
+    # next_slots() only groups slots of one mode and language.
+    mode, lang = slots[0][:2]
+    specs = [(topic, difficulty) for _, _, difficulty, topic in slots]
+    if mode == "debug":
+        return generate_debug_questions(
+            lang, [], specs=specs, priority=PRIORITY_BACKGROUND, fallback=False
+        )
+    return generate_logical_questions(
+        [], specs=specs, priority=PRIORITY_BACKGROUND, fallback=False
+    )
+
+
+QUESTION_POOL = QuestionPool(
+    depth=QUESTION_POOL_DEPTH,
+    refill_per_minute=QUESTION_POOL_REFILL_PER_MIN,
+    max_age=QUESTION_POOL_MAX_AGE,
+    languages=QUESTION_POOL_LANGUAGES,
+    batch_size=QUESTION_POOL_BATCH,
+)
+
+
+def ensure_filler() -> None:
+    """Start the background filler if an LLM provider is configured."""
+    if ai_service.provider_ready():
+        QUESTION_POOL.start(ai_service.provider_ready)
+
+
+def get_question_pool_stats() -> Dict[str, object]:
+    return QUESTION_POOL.stats()
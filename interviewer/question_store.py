@@ -0,0 +1,95 @@
+"""
+Content-addressed store for question content referenced from session state.
+
+A question never changes once it has been served, yet ``AdvancedSession``
+state used to carry full copies of it (code, explanation, test cases) in
+``questions`` and again in every response, re-serialized on every request.
+With refs enabled a question is stored here once, under a short hash of its
+content, and state keeps only that hash. Sessions load the content back
+when they need it: the current question for grading or the client view,
+past ones for the final report.
+
+Storage reuses the ``llm_cache`` tiers: an in-process LRU in front of a
+SQLite file shared by every worker on the host. A ref is only resolvable
+where it was stored, so refs are on by default only with a server-side
+``INTERVIEW_STATE_BACKEND``, which already assumes a browser session keeps
+reaching the same host. ``INTERVIEW_QUESTION_REFS`` overrides that.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+from .llm_cache import TieredCache, build_cache, make_cache_key
+from .state_store import INTERVIEW_STATE_BACKEND
+
+logger = logging.getLogger(__name__)
+
+QUESTION_REFS = os.environ.get(
+    "INTERVIEW_QUESTION_REFS", "false" if INTERVIEW_STATE_BACKEND == "cookie" else "true"
+).lower() in ("1", "true", "yes")
+QUESTION_STORE_MAXSIZE = int(os.environ.get("QUESTION_STORE_MAXSIZE", "2048"))
+QUESTION_STORE_TTL = float(os.environ.get("QUESTION_STORE_TTL", str(7 * 24 * 60 * 60)))
+# Empty string keeps the store memory-only.
+QUESTION_STORE_PATH = os.environ.get(
+    "QUESTION_STORE_PATH", os.path.join(tempfile.gettempdir(), "mock_interviewer_question_store.sqlite3")
+)
+
+# Hex digits kept from the content hash; 64 bits is plenty for one host's questions.
+REF_LENGTH = 16
+
+# Per-session keys that are not part of a question's content.
+SESSION_KEYS = ("ref", "q_index", "q_start")
+
+
+def question_ref(question: Dict) -> str:
+    """Short hash of a question's content, ignoring ``SESSION_KEYS``."""
+    content = {k: v for k, v in question.items() if k not in SESSION_KEYS}
+    return make_cache_key(sorted(content.items()))[:REF_LENGTH]
+
+
+class QuestionStore:
+    """Question dicts by content ref, on top of a ``TieredCache``."""
+
+    def __init__(self, cache: TieredCache):
+        self.cache = cache
+
+    def put(self, question: Dict) -> str:
+        """Store ``question`` (without its session keys) and return its ref."""
+        ref = question_ref(question)
+        # Content is immutable, so a ref already in memory needs no rewrite.
+        if self.cache.memory.get(ref) is None:
+            content = {k: v for k, v in question.items() if k not in SESSION_KEYS}
+            self.cache.set(ref, json.dumps(content, ensure_ascii=False, separators=(",", ":")))
+        return ref
+
+    def get(self, ref: str) -> Optional[Dict]:
+        """A fresh copy of the question stored under ``ref``, or None if unknown here."""
+        raw = self.cache.get(ref)
+        return json.loads(raw) if raw is not None else None
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return self.cache.stats()
+
+
+_store: Optional[QuestionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_question_store() -> QuestionStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = QuestionStore(
+                    build_cache(QUESTION_STORE_MAXSIZE, QUESTION_STORE_TTL, QUESTION_STORE_PATH)
+                )
+    return _store
+
+
+def get_question_store_stats() -> Dict[str, Dict[str, int]]:
+    return get_question_store().stats()
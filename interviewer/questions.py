@@ -1,16 +1,76 @@
-﻿from dataclasses import dataclass
-from typing import List
+﻿import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Tuple
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Question:
     qid: int
     topic: str
     prompt: str
-    expected_keywords: List[str]
+    expected_keywords: Tuple[str, ...]
 
+    def __post_init__(self):
+        # Answers are matched lowercased, so keywords are normalised once here.
+        object.__setattr__(self, "expected_keywords", tuple(k.lower() for k in self.expected_keywords))
 
-def get_question_bank() -> List[Question]:
+
+@dataclass(frozen=True, slots=True)
+class QuestionIndex:
+    """The theory bank with its lookups, built once and shared read-only by every request."""
+
+    questions: Tuple[Question, ...]
+    by_qid: Mapping[int, Question]
+    by_topic: Mapping[str, Tuple[int, ...]]
+    topics: Tuple[str, ...]
+    # Checksum of ids, topics and prompts. Session plans drawn from another version are discarded.
+    version: int
+
+    @classmethod
+    def build(cls, questions: Iterable[Question]) -> "QuestionIndex":
+        questions = tuple(questions)
+        by_qid: Dict[int, Question] = {}
+        by_topic: Dict[str, List[int]] = {}
+        version = 0
+        for i, q in enumerate(questions):
+            if q.qid in by_qid:
+                raise ValueError(f"Duplicate theory question id {q.qid}")
+            by_qid[q.qid] = q
+            by_topic.setdefault(q.topic, []).append(q.qid)
+            if i:
+                version = zlib.crc32(b"\n", version)
+            version = zlib.crc32(f"{q.qid}|{q.topic}|{q.prompt}".encode("utf-8"), version)
+        topics = tuple(sorted(by_topic))
+        return cls(
+            questions=questions,
+            by_qid=MappingProxyType(by_qid),
+            by_topic=MappingProxyType({topic: tuple(by_topic[topic]) for topic in topics}),
+            topics=topics,
+            version=version,
+        )
+
+
+@lru_cache(maxsize=1)
+def get_question_index() -> QuestionIndex:
+    """The theory bank index, built on first use."""
+    return QuestionIndex.build(_theory_questions())
+
+
+def get_question_bank() -> Tuple[Question, ...]:
+    return get_question_index().questions
+
+
+def get_question_topics() -> Tuple[str, ...]:
+    return get_question_index().topics
+
+
+def get_question_bank_version() -> int:
+    return get_question_index().version
+
+
+def _theory_questions() -> List[Question]:
     return [
         Question(1, "DSA", "Explain the time and space complexity of binary search and when it works.", ["sorted", "log", "divide", "middle", "o(log n)"]),
         Question(2, "DSA", "How does a hash table handle collisions?", ["collision", "chaining", "open addressing", "rehashing"]),
@@ -58,7 +118,3 @@ def get_question_bank() -> List[Question]:
         Question(44, "Behavioral", "Give an example of mentoring or helping a teammate grow.", ["mentoring", "support", "feedback", "outcome"]),
         Question(45, "Behavioral", "Describe a decision you made with incomplete information.", ["tradeoff", "assumption", "risk", "result"]),
     ]
-
-
-def get_question_topics() -> List[str]:
-    return sorted({question.topic for question in get_question_bank()})
@@ -0,0 +1,218 @@
+"""
+Priority-aware upstream quota scheduler.
+
+Two token buckets (requests per minute and tokens per minute) guard a shared
+API quota. Callers queue by priority class; within a class they are served
+first come, first served. Before queueing, a caller gets an estimate of how
+long it would wait, and gives up at once (so it can use its fallback) if that
+exceeds its limit, instead of sitting in the queue.
+
+A limit of 0 disables that bucket; with both disabled every call is granted
+immediately.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+PRIORITY_INTERACTIVE = 0  # grading an answer the candidate is waiting on
+PRIORITY_GENERATION = 1   # generating the next question
+PRIORITY_BACKGROUND = 2   # warm pools, prefetch and batch work
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_GENERATION: "generation",
+    PRIORITY_BACKGROUND: "background",
+}
+
+# Longest async poll between re-checks; sync waiters are woken on release.
+_ASYNC_POLL = 0.05
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``per_minute / 60`` per second."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def refill(self, now: float) -> None:
+        if self.unlimited:
+            return
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until ``amount`` tokens are available (assumes refill() was called)."""
+        if self.unlimited:
+            return 0.0
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def take(self, amount: float) -> None:
+        if not self.unlimited:
+            self.tokens -= min(amount, self.capacity)
+
+
+class QuotaScheduler:
+    """Grants upstream calls against RPM/TPM buckets in priority order."""
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_wait: Optional[Dict[int, float]] = None,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_wait = {
+            PRIORITY_INTERACTIVE: 5.0,
+            PRIORITY_GENERATION: 3.0,
+            PRIORITY_BACKGROUND: 60.0,
+        }
+        self.max_wait.update(max_wait or {})
+        self._queue: List[Tuple[int, int, float]] = []  # (priority, seq, tokens)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stats = {
+            name: {"granted": 0, "rejected": 0, "wait_seconds": 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
+
+    @property
+    def unlimited(self) -> bool:
+        return self.requests.unlimited and self.tokens.unlimited
+
+    def estimate_wait(self, tokens: float, priority: int = PRIORITY_GENERATION) -> float:
+        """Seconds a new call of this priority would wait before being granted."""
+        if self.unlimited:
+            return 0.0
+        with self._cond:
+            return self._estimate_locked(tokens, priority)
+
+    def acquire(
+        self,
+        tokens: float,
+        priority: int = PRIORITY_GENERATION,
+        max_wait: Optional[float] = None,
+    ) -> bool:
+        """Block until the call may proceed. Returns False if it should fall back."""
+        if self.unlimited:
+            return True
+        limit = self.max_wait.get(priority, 0.0) if max_wait is None else max_wait
+        started = time.monotonic()
+        with self._cond:
+            ticket = self._enqueue(tokens, priority, limit)
+            if ticket is None:
+                return False
+            while True:
+                wait = self._try_grant(ticket)
+                if wait is None:
+                    self._granted(priority, started)
+                    return True
+                remaining = limit - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._abandon(ticket, priority)
+                    return False
+                self._cond.wait(min(wait, remaining))
+
+    async def aacquire(
+        self,
+        tokens: float,
+        priority: int = PRIORITY_GENERATION,
+        max_wait: Optional[float] = None,
+    ) -> bool:
+        """Async counterpart of ``acquire``."""
+        if self.unlimited:
+            return True
+        limit = self.max_wait.get(priority, 0.0) if max_wait is None else max_wait
+        started = time.monotonic()
+        with self._cond:
+            ticket = self._enqueue(tokens, priority, limit)
+        if ticket is None:
+            return False
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_grant(ticket)
+                    if wait is None:
+                        self._granted(priority, started)
+                        return True
+                    remaining = limit - (time.monotonic() - started)
+                    if remaining <= 0:
+                        self._abandon(ticket, priority)
+                        return False
+                await asyncio.sleep(min(wait, remaining, _ASYNC_POLL))
+        except asyncio.CancelledError:
+            with self._cond:
+                if ticket in self._queue:
+                    self._abandon(ticket, priority)
+            raise
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                "queued": len(self._queue),
+                "requests_available": None if self.requests.unlimited else round(self.requests.tokens, 1),
+                "tokens_available": None if self.tokens.unlimited else round(self.tokens.tokens),
+                "by_priority": {k: dict(v) for k, v in self._stats.items()},
+            }
+
+    # ── Internals (call with self._cond held) ──
+
+    def _estimate_locked(self, tokens: float, priority: int) -> float:
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        ahead = [t for t in self._queue if t[0] <= priority]
+        need_requests = len(ahead) + 1
+        need_tokens = sum(t[2] for t in ahead) + tokens
+        return max(self.requests.time_until(need_requests), self.tokens.time_until(need_tokens))
+
+    def _enqueue(self, tokens: float, priority: int, limit: float) -> Optional[Tuple[int, int, float]]:
+        if self._estimate_locked(tokens, priority) > limit:
+            self._stats[PRIORITY_NAMES[priority]]["rejected"] += 1
+            return None
+        ticket = (priority, next(self._seq), tokens)
+        heapq.heappush(self._queue, ticket)
+        return ticket
+
+    def _try_grant(self, ticket: Tuple[int, int, float]) -> Optional[float]:
+        """Grant ``ticket`` if it is at the head and both buckets allow; else return wait."""
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        wait = max(self.requests.time_until(1), self.tokens.time_until(ticket[2]))
+        if self._queue[0] != ticket:
+            return max(wait, _ASYNC_POLL)
+        if wait > 0:
+            return wait
+        heapq.heappop(self._queue)
+        self.requests.take(1)
+        self.tokens.take(ticket[2])
+        self._cond.notify_all()
+        return None
+
+    def _abandon(self, ticket: Tuple[int, int, float], priority: int) -> None:
+        self._queue.remove(ticket)
+        heapq.heapify(self._queue)
+        self._stats[PRIORITY_NAMES[priority]]["rejected"] += 1
+        self._cond.notify_all()
+
+    def _granted(self, priority: int, started: float) -> None:
+        entry = self._stats[PRIORITY_NAMES[priority]]
+        entry["granted"] += 1
+        entry["wait_seconds"] = round(entry["wait_seconds"] + time.monotonic() - started, 3)
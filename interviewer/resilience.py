@@ -0,0 +1,181 @@
+"""
+Failure handling for upstream API calls: a rolling outcome window,
+a circuit breaker built on it, and a jittered exponential retry policy.
+
+The breaker trips when recent calls fail (or run slower than
+``slow_call_seconds``) too often. While open, callers skip the upstream
+entirely and go straight to their fallback. After ``reset_timeout`` it lets
+a few probe requests through (half-open); one success closes it again,
+one failure re-opens it.
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LatencyWindow:
+    """Thread-safe record of (timestamp, latency, ok) for recent calls."""
+
+    def __init__(self, window_seconds: float = 60.0, maxlen: int = 512):
+        self.window_seconds = window_seconds
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), latency, ok))
+
+    def samples(self) -> list:
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            return list(self._samples)
+
+    def count(self) -> int:
+        return len(self.samples())
+
+    def error_rate(self) -> float:
+        samples = self.samples()
+        if not samples:
+            return 0.0
+        return sum(1 for _, _, ok in samples if not ok) / len(samples)
+
+    def percentile(self, pct: float, successes_only: bool = True) -> Optional[float]:
+        """Latency at the given percentile (0-100), or None with no samples."""
+        latencies = sorted(lat for _, lat, ok in self.samples() if ok or not successes_only)
+        if not latencies:
+            return None
+        rank = min(len(latencies) - 1, max(0, int(round(pct / 100.0 * len(latencies))) - 1))
+        return latencies[rank]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker driven by a rolling outcome window."""
+
+    def __init__(
+        self,
+        failure_ratio: float = 0.5,
+        min_calls: int = 5,
+        window_seconds: float = 60.0,
+        reset_timeout: float = 30.0,
+        half_open_probes: int = 1,
+        slow_call_seconds: float = 10.0,
+    ):
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = max(1, half_open_probes)
+        self.slow_call_seconds = slow_call_seconds
+        self.window = LatencyWindow(window_seconds)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+        self._stats = {"rejected": 0, "opened": 0, "probes": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may go upstream now."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                self._stats["probes"] += 1
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def release(self) -> None:
+        """Give back a slot from ``allow()`` when the call was never sent."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def record(self, ok: bool, latency: float) -> None:
+        """Record the outcome of a call that ``allow()`` let through."""
+        healthy = ok and latency < self.slow_call_seconds
+        self.window.add(latency, ok)
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if healthy:
+                    self._state = CLOSED
+                    self.window.clear()
+                else:
+                    self._trip()
+                return
+            if self._state == CLOSED and not healthy:
+                samples = self.window.samples()
+                bad = sum(
+                    1 for _, lat, sample_ok in samples
+                    if not sample_ok or lat >= self.slow_call_seconds
+                )
+                if len(samples) >= self.min_calls and bad / len(samples) >= self.failure_ratio:
+                    self._trip()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._probes_in_flight = 0
+        self.window.clear()
+
+    def stats(self) -> Dict[str, object]:
+        result: Dict[str, object] = {"state": self.state}
+        with self._lock:
+            result.update(self._stats)
+        result["recent_calls"] = self.window.count()
+        result["error_rate"] = round(self.window.error_rate(), 3)
+        result["p50_latency"] = self.window.percentile(50)
+        result["p95_latency"] = self.window.percentile(95)
+        return result
+
+    def _trip(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+        self._stats["opened"] += 1
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient upstream errors."""
+
+    max_attempts: int = 3
+    base_delay: float = 0.25
+    max_delay: float = 2.0
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to wait before retry number ``attempt`` (0-based)."""
+        if retry_after:
+            try:
+                return min(self.max_delay, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
@@ -0,0 +1,144 @@
+"""
+Choose where the next advanced question comes from.
+
+``SourceRouter`` keeps a rolling window of live question generations
+(latency and whether a usable question came back). When the predicted time
+of another generation, a high percentile of recent successes stretched by
+the recent failure rate, would not fit in the request's budget, the session
+is served from the local banks instead: the built-in advanced bank, the JSON
+snippet bank and the static fallback questions. Once the slow samples age
+out of the window the router goes back to live generation.
+
+Background work (prefetch, pool refills) has no request deadline and is
+always routed live.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+from .deadline import Deadline
+from .question_bank import BankCursor, get_local_bank
+from .resilience import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+# Longest a live generation may be predicted to take on a request path.
+QUESTION_ROUTER_BUDGET = float(os.environ.get("QUESTION_ROUTER_BUDGET", "6"))
+QUESTION_ROUTER_PERCENTILE = float(os.environ.get("QUESTION_ROUTER_PERCENTILE", "90"))
+QUESTION_ROUTER_WINDOW = float(os.environ.get("QUESTION_ROUTER_WINDOW", "300"))
+QUESTION_ROUTER_MIN_SAMPLES = int(os.environ.get("QUESTION_ROUTER_MIN_SAMPLES", "5"))
+# Above this failure rate live generation is skipped regardless of latency.
+QUESTION_ROUTER_MAX_ERROR_RATE = float(os.environ.get("QUESTION_ROUTER_MAX_ERROR_RATE", "0.5"))
+
+SOURCE_LIVE = "live"
+SOURCE_LOCAL = "local"
+
+
+class SourceRouter:
+    """Predicts live generation time from recent outcomes and picks a source."""
+
+    def __init__(
+        self,
+        budget: float = 6.0,
+        percentile: float = 90.0,
+        window_seconds: float = 300.0,
+        min_samples: int = 5,
+        max_error_rate: float = 0.5,
+    ):
+        self.budget = budget
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.window = LatencyWindow(window_seconds)
+        self._lock = threading.Lock()
+        self._stats = {SOURCE_LIVE: 0, SOURCE_LOCAL: 0}
+
+    def record(self, latency: float, ok: bool) -> None:
+        """Feed back the outcome of one live generation."""
+        self.window.add(latency, ok)
+
+    def predicted_latency(self) -> Optional[float]:
+        """Expected seconds until a live generation yields a question; None while warming up."""
+        if self.window.count() < self.min_samples:
+            return None
+        error_rate = self.window.error_rate()
+        if error_rate >= 1.0:
+            return float("inf")
+        latency = self.window.percentile(self.percentile) or 0.0
+        return latency / (1.0 - error_rate)
+
+    def choose(self, deadline: Optional[Deadline] = None) -> str:
+        """``SOURCE_LIVE`` or ``SOURCE_LOCAL`` for a question needed by ``deadline``."""
+        source = SOURCE_LIVE
+        if deadline is not None:
+            budget = min(self.budget, deadline.upstream_timeout() or 0.0)
+            predicted = self.predicted_latency()
+            # Like the latency prediction, the error-rate cutoff needs a few samples first.
+            failing = (
+                self.window.count() >= self.min_samples
+                and self.window.error_rate() > self.max_error_rate
+            )
+            if budget <= 0 or failing:
+                source = SOURCE_LOCAL
+            elif predicted is not None and predicted > budget:
+                source = SOURCE_LOCAL
+        with self._lock:
+            self._stats[source] += 1
+        return source
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            result: Dict[str, object] = dict(self._stats)
+        result["samples"] = self.window.count()
+        result["error_rate"] = round(self.window.error_rate(), 3)
+        result["predicted_latency"] = self.predicted_latency()
+        return result
+
+
+QUESTION_ROUTER = SourceRouter(
+    budget=QUESTION_ROUTER_BUDGET,
+    percentile=QUESTION_ROUTER_PERCENTILE,
+    window_seconds=QUESTION_ROUTER_WINDOW,
+    min_samples=QUESTION_ROUTER_MIN_SAMPLES,
+    max_error_rate=QUESTION_ROUTER_MAX_ERROR_RATE,
+)
+
+
+def get_router_stats() -> Dict[str, object]:
+    return QUESTION_ROUTER.stats()
+
+
+def local_question(
+    mode: str,
+    lang: str,
+    difficulty: str,
+    used_topics: Iterable[str] = (),
+    seen_titles: Iterable[str] = (),
+    cursor: Optional[BankCursor] = None,
+) -> Optional[Dict]:
+    """
+    A local question the session has not seen, preferring an unused topic and
+    the requested difficulty. ``cursor`` keeps the session's own shuffled
+    order across requests. Returns a copy, or None if the bank is empty.
+    """
+    bank = get_local_bank()
+    language = lang if mode == "debug" else ""
+    if not bank.count(type=mode, language=language):
+        language = "python"
+    used, seen = set(used_topics), set(seen_titles)
+    for difficulty_filter, exclude_topics, exclude_titles in (
+        (difficulty, used, seen),
+        (None, used, seen),
+        (None, (), seen),
+        (None, (), ()),
+    ):
+        q = bank.draw(
+            cursor, exclude_topics, exclude_titles,
+            type=mode, language=language, difficulty=difficulty_filter,
+        )
+        if q is not None:
+            return q
+    return None
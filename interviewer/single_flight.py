@@ -0,0 +1,133 @@
+"""
+Single-flight request coalescing.
+
+When several callers ask for the same key at the same time, only the first
+(the leader) runs the work; the rest wait for it and share its result or
+exception. Followers give up after ``max_wait`` seconds with
+``SingleFlightTimeout`` rather than piling a second request on upstream.
+
+``SingleFlight`` coordinates threads; ``AsyncSingleFlight`` coordinates
+tasks on the same event loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlightTimeout(Exception):
+    """A follower waited longer than ``max_wait`` for the leader's result, or its leader task was cancelled."""
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key across threads."""
+
+    def __init__(self, max_wait: float = 30.0):
+        self.max_wait = max_wait
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "coalesced": 0, "timeouts": 0}
+
+    def do(self, key: str, fn: Callable[[], T], max_wait: Optional[float] = None) -> T:
+        """Run ``fn`` or join the in-flight call for ``key``; followers wait up to ``max_wait``."""
+        wait_limit = self.max_wait if max_wait is None else min(self.max_wait, max_wait)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["leaders"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if leader:
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as exc:
+                call.error = exc
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+
+        if not call.done.wait(wait_limit):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise SingleFlightTimeout(key)
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent coroutine calls with the same key on one event loop."""
+
+    def __init__(self, max_wait: float = 30.0):
+        self.max_wait = max_wait
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "coalesced": 0, "timeouts": 0}
+
+    async def do(
+        self, key: str, fn: Callable[[], Awaitable[T]], max_wait: Optional[float] = None
+    ) -> T:
+        wait_limit = self.max_wait if max_wait is None else min(self.max_wait, max_wait)
+        loop = asyncio.get_running_loop()
+        calls = self._loops.setdefault(loop, {})
+        fut = calls.get(key)
+
+        if fut is None:
+            self._bump("leaders")
+            fut = calls[key] = loop.create_future()
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                # Followers belong to other requests: let them fall back rather than cancelling them too.
+                fut.set_exception(SingleFlightTimeout(key))
+                fut.exception()
+                raise
+            except BaseException as exc:
+                fut.set_exception(exc)
+                fut.exception()  # mark retrieved when there are no followers
+                raise
+            else:
+                fut.set_result(result)
+                return result
+            finally:
+                calls.pop(key, None)
+
+        self._bump("coalesced")
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), wait_limit)
+        except asyncio.TimeoutError:
+            self._bump("timeouts")
+            raise SingleFlightTimeout(key) from None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _bump(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
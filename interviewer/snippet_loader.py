@@ -4,16 +4,28 @@ and converts them into AdvancedQuestion objects for the advanced interview.
 
 Python snippets already have proper newlines and indentation in the JSON.
 Java/C++ snippets are on single lines and need brace-based reformatting.
+
+That formatting is done ahead of time by ``build_snippet_bank``, which writes
+a compact binary bank (offset table plus string blob). At runtime the bank is
+memory-mapped, so startup costs a header check and the pages are shared by
+every worker process; entries are decoded when first read.
 """
 from __future__ import annotations
 
+import hashlib
 import json
+import logging
+import mmap
 import os
 import re
-from typing import List
+import struct
+from collections.abc import Sequence
+from typing import List, Optional, Tuple
 
 from .advanced_questions import AdvancedQuestion
 
+logger = logging.getLogger(__name__)
+
 _SNIPPET_DIR = os.path.dirname(os.path.abspath(__file__))
 _SNIPPET_FILES = [
     "python_code_snippets.json",
@@ -21,7 +33,10 @@ _SNIPPET_FILES = [
     "cpp_code_snippets.json",
 ]
 
-_cached_snippets: List[AdvancedQuestion] | None = None
+# Built by ``manage.py build_snippet_bank``; used instead of the JSON when current.
+SNIPPET_BANK_PATH = os.environ.get("SNIPPET_BANK_PATH", os.path.join(_SNIPPET_DIR, "snippet_bank.bin"))
+
+_cached_snippets: Optional[Sequence] = None
 
 
 def _format_c_style(raw: str) -> str:
@@ -92,13 +107,12 @@ def _format_snippet(raw: str, language: str) -> str:
     return raw
 
 
-def load_snippet_questions() -> List[AdvancedQuestion]:
-    """Load all code snippet questions from JSON files and return as AdvancedQuestion list."""
-    global _cached_snippets
-    if _cached_snippets is not None:
-        return _cached_snippets
+SnippetRow = Tuple[int, str, str, str, str]  # qid, language, topic, question, formatted snippet
+
 
-    questions: List[AdvancedQuestion] = []
+def _parse_json_snippets() -> List[SnippetRow]:
+    """Read the JSON files and format every snippet (the slow path)."""
+    rows: List[SnippetRow] = []
     qid_offset = 1000  # Start from 1000 to avoid collision with existing qids
 
     for filename in _SNIPPET_FILES:
@@ -112,26 +126,128 @@ def load_snippet_questions() -> List[AdvancedQuestion]:
         language = data.get("language", "python")
         for item in data.get("questions", []):
             snippet = _format_snippet(item["snippet"], language)
-
-            qid = qid_offset + item["id"]
-            q = AdvancedQuestion(
-                qid=qid,
-                topic=item["topic"],
-                difficulty="Medium",
-                question_type="debug",
-                prompt=f"{item['question']}\n\nFind and fix the bugs in the code below. Submit the corrected code.",
-                code_snippet=snippet,
-                language=language,
-                expected_output="Corrected code",
-                hints=[
-                    "Read the code carefully line by line",
-                    "Check edge cases and off-by-one errors",
-                ],
-                correct_answer=f"Review the algorithm for {item['question']} and fix any logical errors.",
-            )
-            questions.append(q)
+            rows.append((qid_offset + item["id"], language, item["topic"], item["question"], snippet))
 
         qid_offset += 100  # Next language starts at next offset
 
+    return rows
+
+
+def _to_question(qid: int, language: str, topic: str, question: str, snippet: str) -> AdvancedQuestion:
+    return AdvancedQuestion(
+        qid=qid,
+        topic=topic,
+        difficulty="Medium",
+        question_type="debug",
+        prompt=f"{question}\n\nFind and fix the bugs in the code below. Submit the corrected code.",
+        code_snippet=snippet,
+        language=language,
+        expected_output="Corrected code",
+        hints=[
+            "Read the code carefully line by line",
+            "Check edge cases and off-by-one errors",
+        ],
+        correct_answer=f"Review the algorithm for {question} and fix any logical errors.",
+    )
+
+
+# ═══════════════════════════════════════════════
+#  PRECOMPILED BANK
+#
+#  header  : magic, version, entry count, SHA-256 of the source JSON files
+#  entries : qid plus (offset, length) of language, topic, question, snippet
+#  blob    : UTF-8 strings the entries point into
+# ═══════════════════════════════════════════════
+
+_HEADER = struct.Struct("<4sHI32s")
+_ENTRY = struct.Struct("<I8I")
+_BANK_MAGIC = b"MISB"
+_BANK_VERSION = 1
+
+
+def _source_digest() -> bytes:
+    digest = hashlib.sha256()
+    for filename in _SNIPPET_FILES:
+        filepath = os.path.join(_SNIPPET_DIR, filename)
+        if os.path.exists(filepath):
+            digest.update(filename.encode("utf-8"))
+            with open(filepath, "rb") as f:
+                digest.update(f.read())
+    return digest.digest()
+
+
+def build_snippet_bank(path: str = SNIPPET_BANK_PATH) -> int:
+    """Pre-format every snippet and write the binary bank. Returns the entry count."""
+    rows = _parse_json_snippets()
+    blob = bytearray()
+    entries = bytearray()
+    base = _HEADER.size + _ENTRY.size * len(rows)
+    for qid, *fields in rows:
+        spans = []
+        for text in fields:
+            data = text.encode("utf-8")
+            spans.extend((base + len(blob), len(data)))
+            blob += data
+        entries += _ENTRY.pack(qid, *spans)
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_BANK_MAGIC, _BANK_VERSION, len(rows), _source_digest()))
+        f.write(entries)
+        f.write(blob)
+    os.replace(tmp, path)
+    return len(rows)
+
+
+class SnippetBank(Sequence):
+    """Memory-mapped view of a built bank; entries are decoded on first access."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, digest = _HEADER.unpack_from(self._map, 0)
+        if magic != _BANK_MAGIC or version != _BANK_VERSION:
+            raise ValueError(f"{path} is not a version {_BANK_VERSION} snippet bank")
+        if digest != _source_digest():
+            raise ValueError(f"{path} is older than the snippet JSON files")
+        self._decoded: List[Optional[AdvancedQuestion]] = [None] * count
+
+    def __len__(self) -> int:
+        return len(self._decoded)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        q = self._decoded[index]
+        if q is None:
+            q = self._decoded[index] = self._decode(index % len(self))
+        return q
+
+    def _decode(self, index: int) -> AdvancedQuestion:
+        qid, *spans = _ENTRY.unpack_from(self._map, _HEADER.size + index * _ENTRY.size)
+        fields = [
+            self._map[offset:offset + length].decode("utf-8")
+            for offset, length in zip(spans[::2], spans[1::2])
+        ]
+        return _to_question(qid, *fields)
+
+
+def load_snippet_questions() -> Sequence[AdvancedQuestion]:
+    """
+    All code snippet questions as AdvancedQuestions: from the precompiled bank
+    when it is present and current, else parsed and formatted from the JSON files.
+    """
+    global _cached_snippets
+    if _cached_snippets is not None:
+        return _cached_snippets
+
+    try:
+        questions: Sequence[AdvancedQuestion] = SnippetBank(SNIPPET_BANK_PATH)
+    except FileNotFoundError:
+        questions = [_to_question(*row) for row in _parse_json_snippets()]
+    except (OSError, ValueError, struct.error) as exc:
+        logger.warning("Snippet bank unusable, parsing JSON instead: %s", exc)
+        questions = [_to_question(*row) for row in _parse_json_snippets()]
+
     _cached_snippets = questions
     return questions
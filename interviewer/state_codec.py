@@ -0,0 +1,275 @@
+"""
+Compact binary encoding of interview session state.
+
+``InterviewSession``, ``AdvancedSession`` and ``AptitudeSession`` state is
+saved on every request. As JSON it repeats every key and most topic and
+difficulty names each time. This codec writes the same data as:
+
+- a 3-byte header: format version, session kind and flags;
+- top-level fields by position, in the order listed for the format version;
+- values as tagged items: zigzag varints for integers, 8-byte doubles,
+  length-prefixed UTF-8 strings, and one- or two-byte references into a
+  fixed table of common strings (dict keys, topics, difficulties, modes);
+- the body zlib-compressed against a preset dictionary of typical content,
+  when that makes it smaller.
+
+``decode_state`` returns exactly the dict that was encoded. The string
+table, field lists and preset dictionary belong to a format version. Never
+edit them in place: add a new version and keep decoding the old ones.
+"""
+from __future__ import annotations
+
+import struct
+import zlib
+from typing import Dict, Tuple
+
+VERSION = 2
+
+KIND_INTERVIEW = 1
+KIND_ADVANCED = 2
+KIND_APTITUDE = 3
+
+_FLAG_ZLIB = 1
+
+# Top-level fields per kind, written by position.
+_FIELDS_V1 = {
+    KIND_INTERVIEW: ("index", "responses", "selected_qids"),
+    KIND_ADVANCED: (
+        "mode", "lang", "index", "responses", "questions", "start_time", "ended",
+        "used_topics", "fallback_idx", "session_id", "bank_cursor",
+    ),
+    KIND_APTITUDE: (
+        "mode", "total_questions", "start_time", "duration_seconds", "index", "responses", "finished",
+    ),
+}
+
+# Version 2: theory and aptitude sessions save a seeded plan and per-question scores.
+_FIELDS_V2 = {
+    KIND_INTERVIEW: ("seed", "bank_version", "index", "scores"),
+    KIND_ADVANCED: _FIELDS_V1[KIND_ADVANCED],
+    KIND_APTITUDE: (
+        "mode", "seed", "bank_version", "total_questions", "start_time", "duration_seconds",
+        "index", "answers", "scores", "finished",
+    ),
+}
+
+# Version 1 string table. Append-only within a new version.
+_STRINGS_V1 = (
+    # dict keys
+    "qid", "topic", "question", "answer", "score", "skipped", "type", "title", "difficulty",
+    "description", "buggy_code", "bug_explanation", "fixed_code", "hints", "test_cases", "input",
+    "expected", "output", "explanation", "language", "examples", "constraints", "starter_code",
+    "solution_code", "time_complexity", "space_complexity", "correct_answer", "validation",
+    "status", "reason", "runtime_ms", "passed", "total", "feedback", "strengths", "improvement",
+    "bugs_found", "passed_tests", "total_tests", "q_index", "time_taken", "matched_keywords",
+    "complexity_analysis", "prompt", "options", "id", "code_snippet",
+    # modes, languages, difficulties, statuses
+    "debug", "coding", "logical", "aptitude", "python", "java", "cpp", "javascript",
+    "Easy", "Medium", "Hard", "easy", "medium", "hard",
+    "verified", "failed", "unrunnable", "unsupported", "",
+    # topics
+    "Arrays", "Strings", "Linked Lists", "Stacks", "Queues", "Trees", "Binary Search Trees",
+    "Heaps", "Graphs", "Hash Tables", "Sorting", "Binary Search", "Dynamic Programming",
+    "Recursion", "Backtracking", "Greedy Algorithms", "Trie", "Union Find", "Sliding Window",
+    "Two Pointers", "Probability", "Math Puzzles", "Concurrency", "System Design Basics",
+    "Algorithmic Reasoning", "Brainteasers", "Logic Gates", "Combinatorics",
+    "Behavioral", "CN", "DSA", "OS",
+    "Quantitative Aptitude", "Logical Reasoning", "Verbal Reasoning",
+    # fixed feedback texts
+    "Skipped question.", "Question skipped.", "Attempt every question to maximize your score.",
+    "Response evaluated using basic comparison.", "Submitted a response for evaluation.",
+    "Provide more detailed reasoning.", "Correctly answered!", "Incorrect answer.",
+)
+
+# Preset zlib dictionary: text that typically recurs in saved state, most
+# common last (zlib prefers nearby matches).
+_ZDICT_V1 = (
+    "    def __init__(self):\n        self.\n    return \n    for i in range(len(\n"
+    "    while left <= right:\n        mid = (left + right) // 2\n"
+    "if not \n        if \n            return \n        else:\n"
+    "public static int \npublic class Solution {\n    public \n#include <vector>\nstd::vector<int> \n"
+    "The code \nThe bug is that \nThe candidate \nThe solution \nConsider \nedge case \n"
+    "time complexity O(n) space complexity O(1) O(n log n) O(n^2) "
+    "Good attempt. Correct. Incorrect. The answer is \n"
+    "def \nreturn \nnums, target\n"
+).encode("utf-8")
+
+_REFS_V1 = {s: i for i, s in enumerate(_STRINGS_V1)}
+_VERSIONS = {
+    1: (_FIELDS_V1, _STRINGS_V1, _REFS_V1, _ZDICT_V1),
+    2: (_FIELDS_V2, _STRINGS_V1, _REFS_V1, _ZDICT_V1),
+}
+
+# Item tags.
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _REF, _LIST, _DICT = range(9)
+_DOUBLE = struct.Struct("<d")
+
+
+def _write_varint(out: bytearray, n: int) -> None:
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    n = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+class _Writer:
+    def __init__(self, refs: Dict[str, int]):
+        self.refs = refs
+        self.out = bytearray()
+
+    def value(self, v) -> None:
+        out = self.out
+        if v is None:
+            out.append(_NONE)
+        elif v is True:
+            out.append(_TRUE)
+        elif v is False:
+            out.append(_FALSE)
+        elif isinstance(v, int):
+            out.append(_INT)
+            _write_varint(out, v << 1 if v >= 0 else ((-v) << 1) - 1)
+        elif isinstance(v, float):
+            out.append(_FLOAT)
+            out += _DOUBLE.pack(v)
+        elif isinstance(v, str):
+            self.string(v)
+        elif isinstance(v, (list, tuple)):
+            out.append(_LIST)
+            _write_varint(out, len(v))
+            for item in v:
+                self.value(item)
+        elif isinstance(v, dict):
+            out.append(_DICT)
+            _write_varint(out, len(v))
+            for key, item in v.items():
+                if not isinstance(key, str):
+                    raise TypeError(f"state dict keys must be strings, not {type(key).__name__}")
+                self.string(key)
+                self.value(item)
+        else:
+            raise TypeError(f"cannot encode {type(v).__name__} in session state")
+
+    def string(self, s: str) -> None:
+        ref = self.refs.get(s)
+        if ref is not None:
+            self.out.append(_REF)
+            _write_varint(self.out, ref)
+            return
+        data = s.encode("utf-8")
+        self.out.append(_STR)
+        _write_varint(self.out, len(data))
+        self.out += data
+
+
+class _Reader:
+    def __init__(self, buf: bytes, strings: Tuple[str, ...]):
+        self.buf = buf
+        self.strings = strings
+        self.pos = 0
+
+    def value(self):
+        tag = self.buf[self.pos]
+        self.pos += 1
+        if tag == _NONE:
+            return None
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _INT:
+            n, self.pos = _read_varint(self.buf, self.pos)
+            return n >> 1 if not n & 1 else -((n + 1) >> 1)
+        if tag == _FLOAT:
+            (f,) = _DOUBLE.unpack_from(self.buf, self.pos)
+            self.pos += _DOUBLE.size
+            return f
+        if tag in (_STR, _REF):
+            self.pos -= 1
+            return self.string()
+        if tag == _LIST:
+            n, self.pos = _read_varint(self.buf, self.pos)
+            return [self.value() for _ in range(n)]
+        if tag == _DICT:
+            n, self.pos = _read_varint(self.buf, self.pos)
+            result = {}
+            for _ in range(n):
+                key = self.string()
+                result[key] = self.value()
+            return result
+        raise ValueError(f"unknown state tag {tag}")
+
+    def string(self) -> str:
+        tag = self.buf[self.pos]
+        n, self.pos = _read_varint(self.buf, self.pos + 1)
+        if tag == _REF:
+            return self.strings[n]
+        if tag != _STR:
+            raise ValueError(f"expected a string, got tag {tag}")
+        s = self.buf[self.pos:self.pos + n].decode("utf-8")
+        self.pos += n
+        return s
+
+
+def encode_state(kind: int, data: Dict) -> bytes:
+    """Encode a session's ``to_dict()`` output. Keys outside the kind's fields raise ``ValueError``."""
+    all_fields, _, refs, zdict = _VERSIONS[VERSION]
+    fields = all_fields[kind]
+    extra = set(data) - set(fields)
+    if extra:
+        raise ValueError(f"unexpected state field(s): {', '.join(sorted(extra))}")
+    writer = _Writer(refs)
+    # Absent fields are written as a flag byte so they stay absent on decode.
+    for name in fields:
+        if name in data:
+            writer.out.append(1)
+            writer.value(data[name])
+        else:
+            writer.out.append(0)
+    body = bytes(writer.out)
+    flags = 0
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, zdict)
+    packed = compressor.compress(body) + compressor.flush()
+    if len(packed) < len(body):
+        body, flags = packed, flags | _FLAG_ZLIB
+    return bytes((VERSION, kind, flags)) + body
+
+
+def decode_state(blob: bytes, kind: int) -> Dict:
+    """Inverse of ``encode_state``; raises ``ValueError`` on foreign or corrupt data."""
+    if len(blob) < 3:
+        raise ValueError("state blob too short")
+    version, found, flags = blob[0], blob[1], blob[2]
+    if version not in _VERSIONS:
+        raise ValueError(f"unknown state format version {version}")
+    if found != kind:
+        raise ValueError(f"state blob holds kind {found}, expected {kind}")
+    fields, strings, _, zdict = _VERSIONS[version]
+    body = blob[3:]
+    try:
+        if flags & _FLAG_ZLIB:
+            decompressor = zlib.decompressobj(-15, zdict)
+            body = decompressor.decompress(body) + decompressor.flush()
+        reader = _Reader(body, strings)
+        result: Dict = {}
+        for name in fields[kind]:
+            present = reader.buf[reader.pos]
+            reader.pos += 1
+            if present:
+                result[name] = reader.value()
+    except (IndexError, zlib.error, UnicodeDecodeError) as exc:
+        raise ValueError(f"corrupt state blob: {exc}") from exc
+    if reader.pos != len(body):
+        raise ValueError("trailing bytes in state blob")
+    return result
+
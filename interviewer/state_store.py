@@ -0,0 +1,388 @@
+"""
+Server-side storage for interview state.
+
+Interview state is stored as ``state_codec`` bytes. By default it rides in
+the signed-cookie session (base64-encoded), so every request uploads and
+re-signs the whole thing. With ``INTERVIEW_STATE_BACKEND`` set, the cookie
+only carries a random state id and the state itself lives in one of:
+
+- ``memory``: an in-process dict, a stand-in for a shared key-value store
+  (values are stored serialized, as they would be over the wire);
+- ``file``: one file per key under ``INTERVIEW_STATE_PATH``;
+- ``sqlite``: a single SQLite file at ``INTERVIEW_STATE_PATH``.
+
+Entries expire ``INTERVIEW_STATE_TTL`` seconds after their last write.
+Expired entries are never returned, and a background sweeper deletes them
+every ``INTERVIEW_STATE_SWEEP_INTERVAL`` seconds.
+
+``memory``, ``file`` and ``sqlite`` are local to one host: only use them
+where every request for a browser session reaches the same machine.
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+import secrets
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from django.http import HttpRequest
+
+logger = logging.getLogger(__name__)
+
+# "cookie" (state in the signed session cookie), "memory", "file" or "sqlite".
+INTERVIEW_STATE_BACKEND = os.environ.get("INTERVIEW_STATE_BACKEND", "cookie").strip().lower()
+INTERVIEW_STATE_PATH = os.environ.get("INTERVIEW_STATE_PATH", "")
+INTERVIEW_STATE_TTL = float(os.environ.get("INTERVIEW_STATE_TTL", str(6 * 60 * 60)))
+INTERVIEW_STATE_SWEEP_INTERVAL = float(os.environ.get("INTERVIEW_STATE_SWEEP_INTERVAL", "300"))
+
+# Session key holding the state id when a server-side backend is in use.
+STATE_ID_KEY = "state_id"
+
+_EXPIRY = struct.Struct("<d")
+
+
+class StateStore(abc.ABC):
+    """Key -> encoded session state (bytes) with per-entry expiry."""
+
+    name = "base"
+
+    def __init__(self, ttl: float = 6 * 60 * 60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {"reads": 0, "misses": 0, "writes": 0, "deletes": 0, "expired": 0}
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self._read(key, time.time())
+        self._bump("reads" if value is not None else "misses")
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        self._write(key, value, time.time() + self.ttl)
+        self._bump("writes")
+
+    def delete(self, key: str) -> None:
+        self._remove(key)
+        self._bump("deletes")
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: bytes) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    async def adelete(self, key: str) -> None:
+        await asyncio.to_thread(self.delete, key)
+
+    def sweep(self) -> int:
+        """Delete expired entries; returns how many were removed."""
+        removed = self._sweep(time.time())
+        self._bump("expired", removed)
+        return removed
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            result: Dict[str, object] = dict(self._stats)
+        result["backend"] = self.name
+        return result
+
+    def _bump(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += n
+
+    # Backends implement these.
+
+    @abc.abstractmethod
+    def _read(self, key: str, now: float) -> Optional[bytes]:
+        """The value for ``key`` unless missing or expired at ``now``."""
+
+    @abc.abstractmethod
+    def _write(self, key: str, value: bytes, expires_at: float) -> None:
+        """Store ``value`` under ``key`` until ``expires_at``."""
+
+    @abc.abstractmethod
+    def _remove(self, key: str) -> None:
+        """Drop ``key`` if present."""
+
+    @abc.abstractmethod
+    def _sweep(self, now: float) -> int:
+        """Delete entries expired at ``now``; returns how many were removed."""
+
+
+class MemoryStateStore(StateStore):
+    """In-process store with the semantics of a shared key-value service."""
+
+    name = "memory"
+
+    def __init__(self, ttl: float = 6 * 60 * 60):
+        super().__init__(ttl)
+        self._data: Dict[str, tuple] = {}
+        self._data_lock = threading.Lock()
+
+    # No I/O, so the async variants run inline.
+    async def aget(self, key: str) -> Optional[bytes]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: bytes) -> None:
+        self.set(key, value)
+
+    async def adelete(self, key: str) -> None:
+        self.delete(key)
+
+    def _read(self, key: str, now: float) -> Optional[bytes]:
+        with self._data_lock:
+            entry = self._data.get(key)
+        return entry[1] if entry and entry[0] > now else None
+
+    def _write(self, key: str, value: bytes, expires_at: float) -> None:
+        with self._data_lock:
+            self._data[key] = (expires_at, value)
+
+    def _remove(self, key: str) -> None:
+        with self._data_lock:
+            self._data.pop(key, None)
+
+    def _sweep(self, now: float) -> int:
+        with self._data_lock:
+            stale = [k for k, (expires_at, _) in self._data.items() if expires_at <= now]
+            for key in stale:
+                del self._data[key]
+        return len(stale)
+
+
+class FileStateStore(StateStore):
+    """One file per key, starting with the expiry time as a double."""
+
+    name = "file"
+
+    def __init__(self, directory: str, ttl: float = 6 * 60 * 60):
+        super().__init__(ttl)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".state")
+
+    def _read(self, key: str, now: float) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as fh:
+                (expires_at,) = _EXPIRY.unpack(fh.read(_EXPIRY.size))
+                return fh.read() if expires_at > now else None
+        except (OSError, struct.error):
+            return None
+
+    def _write(self, key: str, value: bytes, expires_at: float) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(_EXPIRY.pack(expires_at) + value)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _remove(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _sweep(self, now: float) -> int:
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".state"):
+                continue
+            try:
+                with open(entry.path, "rb") as fh:
+                    (expires_at,) = _EXPIRY.unpack(fh.read(_EXPIRY.size))
+                if expires_at <= now:
+                    os.unlink(entry.path)
+                    removed += 1
+            except (OSError, struct.error):
+                continue
+        return removed
+
+
+class SQLiteStateStore(StateStore):
+    """All keys in one SQLite table."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, ttl: float = 6 * 60 * 60):
+        super().__init__(ttl)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS interview_state ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS interview_state_expiry ON interview_state (expires_at)"
+        )
+        self._conn_lock = threading.Lock()
+
+    def _read(self, key: str, now: float) -> Optional[bytes]:
+        with self._conn_lock:
+            row = self._conn.execute(
+                "SELECT value FROM interview_state WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def _write(self, key: str, value: bytes, expires_at: float) -> None:
+        with self._conn_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO interview_state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+
+    def _remove(self, key: str) -> None:
+        with self._conn_lock:
+            self._conn.execute("DELETE FROM interview_state WHERE key = ?", (key,))
+
+    def _sweep(self, now: float) -> int:
+        with self._conn_lock:
+            return self._conn.execute(
+                "DELETE FROM interview_state WHERE expires_at <= ?", (now,)
+            ).rowcount
+
+
+def build_state_store(backend: str, path: str = "", ttl: float = 6 * 60 * 60) -> Optional[StateStore]:
+    """The configured backend, or None to keep state in the session cookie."""
+    if backend == "memory":
+        return MemoryStateStore(ttl)
+    if backend == "file":
+        return FileStateStore(path or os.path.join(tempfile.gettempdir(), "mock_interviewer_state"), ttl)
+    if backend == "sqlite":
+        return SQLiteStateStore(
+            path or os.path.join(tempfile.gettempdir(), "mock_interviewer_state.sqlite3"), ttl
+        )
+    if backend != "cookie":
+        logger.warning("Unknown INTERVIEW_STATE_BACKEND %r; keeping state in the cookie", backend)
+    return None
+
+
+class StateSweeper:
+    """Background thread that periodically drops expired state."""
+
+    def __init__(self, store: StateStore, interval: float = 300.0):
+        self.store = store
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="state-sweeper", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                removed = self.store.sweep()
+                if removed:
+                    logger.info("Swept %d expired interview states", removed)
+            except Exception as exc:
+                logger.warning("Interview state sweep failed: %s", exc)
+
+
+_store: Optional[StateStore] = None
+_store_ready = False
+_store_lock = threading.Lock()
+
+
+def get_state_store() -> Optional[StateStore]:
+    """The process-wide store (starting its sweeper), or None for cookie state."""
+    global _store, _store_ready
+    if not _store_ready:
+        with _store_lock:
+            if not _store_ready:
+                _store = build_state_store(INTERVIEW_STATE_BACKEND, INTERVIEW_STATE_PATH, INTERVIEW_STATE_TTL)
+                if _store is not None:
+                    StateSweeper(_store, INTERVIEW_STATE_SWEEP_INTERVAL).start()
+                _store_ready = True
+    return _store
+
+
+# ── Request helpers used by the views ──
+
+def _count(request: HttpRequest, op: str) -> None:
+    """Per-request read/write counts, kept on the request for logging and tests."""
+    counts = getattr(request, "state_io", None)
+    if counts is None:
+        counts = request.state_io = {"reads": 0, "writes": 0}
+    counts[op] += 1
+
+
+def _new_state_id() -> str:
+    return secrets.token_urlsafe(16)
+
+
+def _from_cookie(value) -> Optional[bytes]:
+    # Values saved before the binary codec were plain dicts; they read as no state.
+    return base64.b64decode(value) if isinstance(value, str) else None
+
+
+def _to_cookie(value: bytes) -> str:
+    return base64.b64encode(value).decode("ascii")
+
+
+def load_state(request: HttpRequest, name: str) -> Optional[bytes]:
+    """The encoded state saved under ``name`` for this browser session, or None."""
+    _count(request, "reads")
+    store = get_state_store()
+    if store is None:
+        return _from_cookie(request.session.get(name))
+    state_id = request.session.get(STATE_ID_KEY)
+    return store.get(f"{state_id}:{name}") if state_id else None
+
+
+def save_state(request: HttpRequest, name: str, value: bytes) -> None:
+    _count(request, "writes")
+    store = get_state_store()
+    if store is None:
+        request.session[name] = _to_cookie(value)
+        request.session.modified = True
+        return
+    state_id = request.session.get(STATE_ID_KEY)
+    if not state_id:
+        state_id = request.session[STATE_ID_KEY] = _new_state_id()
+    store.set(f"{state_id}:{name}", value)
+
+
+async def aload_state(request: HttpRequest, name: str) -> Optional[bytes]:
+    """Async counterpart of ``load_state``."""
+    _count(request, "reads")
+    store = get_state_store()
+    if store is None:
+        return _from_cookie(await request.session.aget(name))
+    state_id = await request.session.aget(STATE_ID_KEY)
+    return await store.aget(f"{state_id}:{name}") if state_id else None
+
+
+async def asave_state(request: HttpRequest, name: str, value: bytes) -> None:
+    """Async counterpart of ``save_state``."""
+    _count(request, "writes")
+    store = get_state_store()
+    if store is None:
+        await request.session.aset(name, _to_cookie(value))
+        return
+    state_id = await request.session.aget(STATE_ID_KEY)
+    if not state_id:
+        state_id = _new_state_id()
+        await request.session.aset(STATE_ID_KEY, state_id)
+    await store.aset(f"{state_id}:{name}", value)
+
+
+def get_state_stats() -> Dict[str, object]:
+    store = get_state_store()
+    return store.stats() if store is not None else {"backend": "cookie"}
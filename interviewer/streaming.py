@@ -0,0 +1,98 @@
+"""
+Helpers for streaming model output to the browser.
+
+``JSONFieldStream`` pulls completed top-level members out of a JSON object
+while its text is still arriving, so a score can be shown before the model
+has finished writing the feedback. ``SSEDecoder`` splits a server-sent-event
+byte stream (what Gemini's ``streamGenerateContent?alt=sse`` returns) into
+``data`` payloads, and ``sse_event`` encodes one event for our own endpoints.
+"""
+from __future__ import annotations
+
+import json
+from typing import List, Tuple
+
+
+class JSONFieldStream:
+    """Incrementally yields ``(key, value)`` pairs of a top-level JSON object."""
+
+    def __init__(self):
+        self._member: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self.complete = False
+
+    def feed(self, text: str) -> List[Tuple[str, object]]:
+        """Consume more text; return the members that finished in it."""
+        fields: List[Tuple[str, object]] = []
+        for ch in text:
+            if self.complete:
+                break
+            if not self._started:
+                # Skip anything before the object, e.g. a ```json fence.
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+            if self._in_string:
+                self._member.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._flush(fields)
+                    self.complete = True
+                    continue
+            elif ch == "," and self._depth == 1:
+                self._flush(fields)
+                continue
+            self._member.append(ch)
+        return fields
+
+    def _flush(self, fields: List[Tuple[str, object]]) -> None:
+        member = "".join(self._member).strip()
+        self._member = []
+        if not member:
+            return
+        try:
+            fields.extend(json.loads("{" + member + "}").items())
+        except ValueError:
+            pass
+
+
+class SSEDecoder:
+    """Splits a server-sent-event byte stream into ``data`` payloads."""
+
+    def __init__(self):
+        self._buffer = b""
+
+    def feed(self, chunk: bytes) -> List[str]:
+        self._buffer = (self._buffer + chunk).replace(b"\r\n", b"\n")
+        events = []
+        while b"\n\n" in self._buffer:
+            raw, self._buffer = self._buffer.split(b"\n\n", 1)
+            data = [
+                line[5:].lstrip().decode("utf-8")
+                for line in raw.split(b"\n")
+                if line.startswith(b"data:")
+            ]
+            if data:
+                events.append("\n".join(data))
+        return events
+
+
+def sse_event(event: str, data: object) -> bytes:
+    """Encode one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
@@ -1,7 +1,58 @@
-from django.test import Client, SimpleTestCase
+import asyncio
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
+from django.test import AsyncClient, Client, SimpleTestCase
+
+from . import (
+    advanced_logic, ai_service, code_validation, prompts, question_corpus, question_store, snippet_loader, state_store,
+)
+from .ai_question_generator import generate_coding_question, generate_logical_question, generate_logical_questions
+from .code_validation import FAILED, UNRUNNABLE, UNSUPPORTED, VERIFIED, validate_question
+from .deadline import Deadline
+from .hedging import HedgePolicy
+from .http_pool import AsyncHTTPConnectionPool, HTTPConnectionPool, PooledResponse
+from .json_repair import PARSE_STATS, loads_lenient
+from .llm_cache import MemoryTTLCache, SQLiteTTLCache, TieredCache, build_cache
+from .llm_providers import FakeProvider, GeminiProvider, LatencyModel, LLMProvider, serve_fake_gemini
+from .prefetch import Prefetcher
+from .question_bank import BankCursor, QuestionBank, get_local_bank
+from .question_corpus import QuestionCorpus
+from .question_pool import QuestionPool
+from .quota_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, QuotaScheduler
+from .routing import SOURCE_LIVE, SOURCE_LOCAL, SourceRouter
+from .resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LatencyWindow
+from .single_flight import AsyncSingleFlight, SingleFlight, SingleFlightTimeout
+from .state_codec import KIND_ADVANCED, KIND_APTITUDE, KIND_INTERVIEW, decode_state, encode_state
+from .state_store import FileStateStore, MemoryStateStore, SQLiteStateStore, StateStore
+from .streaming import JSONFieldStream, SSEDecoder
+from .aptitude_logic import HARDCODED_QUESTIONS, AptitudeSession, _bank_version
 from .logic import InterviewSession
-from .questions import get_question_bank
+from .questions import Question, QuestionIndex, get_question_bank, get_question_index
+
+
+_CORPUS_PATCHES = (
+    mock.patch.object(question_corpus, "QUESTION_CORPUS_PATH", ""),
+    mock.patch.object(question_corpus, "_corpus", None),
+)
+
+
+def setUpModule():
+    # Generated questions must neither land in nor be served from the shared corpus file;
+    # QuestionCorpusTests builds its own in a temp dir.
+    for patch in _CORPUS_PATCHES:
+        patch.start()
+
+
+def tearDownModule():
+    for patch in reversed(_CORPUS_PATCHES):
+        patch.stop()
 
 
 class InterviewFlowTests(SimpleTestCase):
@@ -76,3 +127,1068 @@ class InterviewFlowTests(SimpleTestCase):
         response = self.client.get("/dashboard/")
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Performance Dashboard")
+
+
+class QuestionIndexTests(SimpleTestCase):
+    def test_index_is_shared_frozen_and_precomputed(self):
+        index = get_question_index()
+        self.assertIs(get_question_bank(), index.questions)
+        self.assertIs(get_question_index(), index)
+        self.assertEqual(index.by_qid[16].topic, "OS")
+        self.assertTrue(all(index.by_qid[qid].topic == "CN" for qid in index.by_topic["CN"]))
+        self.assertEqual(index.topics, ("Behavioral", "CN", "DSA", "OS"))
+        self.assertIsInstance(index.by_qid[1].expected_keywords, tuple)
+        self.assertFalse(hasattr(index.by_qid[1], "__dict__"))
+        with self.assertRaises(AttributeError):
+            index.by_qid[1].topic = "CN"
+        with self.assertRaises(TypeError):
+            index.by_qid[99] = index.by_qid[1]
+
+    def test_build_lowercases_keywords_and_rejects_duplicate_ids(self):
+        index = QuestionIndex.build([Question(1, "OS", "Why?", ["Page Fault"])])
+        self.assertEqual(index.by_qid[1].expected_keywords, ("page fault",))
+        with self.assertRaises(ValueError):
+            QuestionIndex.build([Question(1, "OS", "a", []), Question(1, "CN", "b", [])])
+
+
+class SessionPlanTests(SimpleTestCase):
+    def test_seeded_plans_round_trip_with_scores_only(self):
+        theory = InterviewSession()
+        theory._record_response(theory.get_current_question(), "answer", {"score": 7, "feedback": "", "matched_keywords": []})
+        loaded = InterviewSession.from_bytes(theory.to_bytes())
+        self.assertEqual([q.qid for q in loaded.questions], [q.qid for q in theory.questions])
+        self.assertEqual(loaded.responses, theory.responses)
+        self.assertEqual(loaded.final_report()["overall_score"], 7)
+        self.assertLess(len(theory.to_bytes()), 40)
+
+        aptitude = AptitudeSession()
+        aptitude.evaluate_answer(aptitude.questions[0]["answer"])
+        aptitude.skip_question()
+        blob = aptitude.to_bytes()
+        loaded = AptitudeSession.from_bytes(blob)
+        self.assertEqual(loaded.get_current_question_for_client(), aptitude.get_current_question_for_client())
+        self.assertEqual(loaded.compile_report()["responses"], aptitude.compile_report()["responses"])
+        self.assertEqual([r["score"] for r in loaded.responses], [10, 0])
+        self.assertLess(len(blob), 80)
+
+    def test_plan_from_another_bank_version_is_discarded(self):
+        state = AptitudeSession().to_dict()
+        self.assertIsNone(AptitudeSession.from_dict(dict(state, bank_version=0)))
+        theory = InterviewSession(index=3, scores=[5, 5, 5])
+        fresh = InterviewSession.from_dict(dict(theory.to_dict(), bank_version=0))
+        self.assertEqual((fresh.index, fresh.scores), (0, []))
+
+    def test_bank_version_covers_prompts_and_options(self):
+        base = _bank_version(HARDCODED_QUESTIONS)
+        reworded = [dict(q) for q in HARDCODED_QUESTIONS]
+        reworded[0]["prompt"] += "?"
+        reordered = [dict(q) for q in HARDCODED_QUESTIONS]
+        reordered[0]["options"] = list(reversed(reordered[0]["options"]))
+        self.assertNotEqual(_bank_version(reworded), base)
+        self.assertNotEqual(_bank_version(reordered), base)
+
+
+class _EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HTTPConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _EchoHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/echo"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused_between_requests(self):
+        pool = HTTPConnectionPool(maxsize=2)
+        for i in range(3):
+            resp = pool.request("POST", self.url, body=str(i).encode())
+            self.assertEqual(resp.status, 200)
+            self.assertEqual(resp.body, str(i).encode())
+
+        stats = pool.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["idle"], 1)
+        pool.close()
+
+    def test_async_pool_reuses_connections_within_a_loop(self):
+        pool = AsyncHTTPConnectionPool(maxsize=2)
+
+        async def run():
+            bodies = []
+            for i in range(3):
+                resp = await pool.request("POST", self.url, body=str(i).encode())
+                bodies.append(resp.body)
+            return bodies, pool.stats()
+
+        bodies, stats = asyncio.run(run())
+        self.assertEqual(bodies, [b"0", b"1", b"2"])
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 2)
+
+    def test_async_stream_yields_body_and_returns_connection(self):
+        pool = AsyncHTTPConnectionPool(maxsize=1)
+
+        async def run():
+            streamed = [chunk async for chunk in pool.stream("POST", self.url, body=b"x" * 100_000)]
+            resp = await pool.request("POST", self.url, body=b"after")
+            return streamed, resp.body, pool.stats()
+
+        streamed, after, stats = asyncio.run(run())
+        self.assertGreater(len(streamed), 1)
+        self.assertEqual(b"".join(streamed), b"x" * 100_000)
+        self.assertEqual(after, b"after")
+        self.assertEqual(stats["hits"], 1)
+
+
+class AdvancedInterviewFlowTests(SimpleTestCase):
+    def test_debug_round_runs_through_async_views_with_fallbacks(self):
+        client = Client()
+        start = client.get("/api/adv/start/?mode=debug&lang=python")
+        self.assertEqual(start.status_code, 200)
+        self.assertEqual(start.json()["question"]["type"], "debug")
+
+        answer = client.post(
+            "/api/adv/answer/",
+            data='{"code":"def f():\\n    return 1"}',
+            content_type="application/json",
+        )
+        self.assertEqual(answer.status_code, 200)
+        payload = answer.json()
+        self.assertFalse(payload["finished"])
+        self.assertIn("score", payload["evaluation"])
+        self.assertEqual(payload["question_index"], 2)
+
+        end = client.post("/api/adv/end/")
+        self.assertTrue(end.json()["finished"])
+        self.assertEqual(end.json()["report"]["metrics"]["answered"], 1)
+
+
+class QuestionRefTests(SimpleTestCase):
+    def setUp(self):
+        self.store = question_store.QuestionStore(build_cache(64, 60, None))
+        for patch in (
+            mock.patch.object(question_store, "_store", self.store),
+            mock.patch.object(advanced_logic, "QUESTION_REFS", True),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _session(self):
+        s = advanced_logic.AdvancedSession(mode="debug", lang="python")
+        s._accept_question(get_local_bank().draw(type="debug", language="python"))
+        return s
+
+    def test_state_holds_refs_and_rehydrates_lazily(self):
+        s = self._session()
+        question = dict(s.questions[0])
+        s.evaluate_answer("pass")
+        s._accept_question(get_local_bank().draw(type="debug", language="python"))
+
+        state = s.to_dict()
+        self.assertEqual(set(state["questions"][0]), {"ref", "q_index", "q_start"})
+        self.assertNotIn("buggy_code", state["responses"][0])
+
+        loaded = advanced_logic.AdvancedSession.from_bytes(s.to_bytes())
+        self.assertEqual(loaded.get_current_question_for_client()["buggy_code"], s.questions[1]["buggy_code"])
+        self.assertIn("test_cases", loaded.questions[1])
+        report = loaded.compile_report()["responses"][0]
+        self.assertEqual(report["fixed_code"], question["fixed_code"])
+        self.assertEqual(report["description"], question["description"])
+
+    def test_unknown_ref_is_replaced_with_a_new_question(self):
+        s = self._session()
+        blob = s.to_bytes()
+        self.store.cache.clear()
+        loaded = advanced_logic.AdvancedSession.from_bytes(blob)
+        self.assertEqual(loaded.evaluate_answer("pass")["feedback"], "No question to evaluate.")
+        self.assertEqual(loaded.get_current_question()["q_index"], 1)
+        self.assertEqual(len(loaded.questions), 1)
+
+
+class StateStoreTests(SimpleTestCase):
+    def test_backends_round_trip_expire_and_sweep(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for store in (
+                MemoryStateStore(ttl=60),
+                FileStateStore(os.path.join(tmp, "files"), ttl=60),
+                SQLiteStateStore(os.path.join(tmp, "state.sqlite3"), ttl=60),
+            ):
+                store.set("a:interview", b"\x01\x02state")
+                self.assertEqual(store.get("a:interview"), b"\x01\x02state", store.name)
+                self.assertIsNone(store.get("b:interview"))
+
+                store.ttl = -1
+                store.set("c:interview", b"\x01")
+                self.assertIsNone(store.get("c:interview"), store.name)
+                self.assertEqual(store.sweep(), 1, store.name)
+                store.delete("a:interview")
+                self.assertIsNone(store.get("a:interview"))
+                stats = store.stats()
+                self.assertEqual((stats["reads"], stats["writes"], stats["expired"]), (1, 2, 1))
+
+    def test_backend_missing_a_hook_cannot_be_built(self):
+        class NoSweep(StateStore):
+            def _read(self, key, now):
+                return None
+
+            def _write(self, key, value, expires_at):
+                pass
+
+            def _remove(self, key):
+                pass
+
+        with self.assertRaises(TypeError):
+            NoSweep()
+
+    def test_cookie_carries_only_the_state_id(self):
+        store = MemoryStateStore()
+        with mock.patch.object(state_store, "_store", store), mock.patch.object(state_store, "_store_ready", True):
+            client = Client()
+            start = client.get("/api/adv/start/?mode=debug&lang=python")
+            self.assertEqual(start.status_code, 200)
+            self.assertLess(len(client.cookies["sessionid"].value), 120)
+
+            answer = client.post("/api/adv/answer/", data='{"code":"x = 1"}', content_type="application/json")
+            self.assertEqual(answer.json()["question_index"], 2)
+            self.assertEqual(answer.wsgi_request.state_io, {"reads": 1, "writes": 1})
+            self.assertEqual(store.stats()["writes"], 2)
+
+
+class StateCodecTests(SimpleTestCase):
+    def test_round_trips_exactly_and_beats_json(self):
+        advanced = advanced_logic.AdvancedSession(mode="debug", lang="python")
+        advanced.questions.append(get_local_bank().draw(type="debug", language="python"))
+        advanced.responses.append({
+            "q_index": 1, "score": -3, "time_taken": 12.25, "skipped": False, "answer": "naïve ✓",
+            "bugs_found": [], "validation": {"status": "verified", "runtime_ms": None}, "extra": 2**40,
+        })
+        for kind, data in (
+            (KIND_INTERVIEW, InterviewSession().to_dict()),
+            (KIND_ADVANCED, advanced.to_dict()),
+            (KIND_APTITUDE, {"index": 1, "answers": [None], "scores": [0], "finished": True}),
+        ):
+            blob = encode_state(kind, data)
+            self.assertEqual(decode_state(blob, kind), data)
+            self.assertLess(len(blob), len(json.dumps(data, separators=(",", ":"))))
+        self.assertEqual(advanced_logic.AdvancedSession.from_bytes(advanced.to_bytes()).to_dict(), advanced.to_dict())
+
+    def test_rejects_foreign_and_corrupt_blobs(self):
+        blob = encode_state(KIND_INTERVIEW, InterviewSession().to_dict())
+        for bad, kind in ((blob, KIND_APTITUDE), (b"\x09" + blob[1:], KIND_INTERVIEW), (blob[:-4], KIND_INTERVIEW)):
+            with self.assertRaises(ValueError):
+                decode_state(bad, kind)
+        with self.assertRaises(ValueError):
+            encode_state(KIND_INTERVIEW, {"index": 0, "surprise": 1})
+
+
+def _gemini_response(text):
+    body = {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+    return PooledResponse(status=200, headers={}, body=json.dumps(body).encode())
+
+
+class LLMResponseCacheTests(SimpleTestCase):
+    def test_memory_tier_evicts_lru_and_expires(self):
+        cache = MemoryTTLCache(maxsize=2, ttl=60)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.stats["evictions"], 1)
+
+        cache.ttl = -1
+        cache.set("d", "4")
+        self.assertIsNone(cache.get("d"))
+        self.assertEqual(cache.stats["expired"], 1)
+
+    def test_disk_hits_are_promoted_to_memory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite3")
+            SQLiteTTLCache(path).set("k", "v")
+            cache = TieredCache(MemoryTTLCache(), SQLiteTTLCache(path))
+
+            self.assertEqual(cache.get("k"), "v")
+            self.assertEqual(cache.get("k"), "v")
+            stats = cache.stats()
+            self.assertEqual(stats["disk"]["hits"], 1)
+            self.assertEqual(stats["memory"]["hits"], 1)
+
+    def test_repeated_evaluation_is_served_from_cache(self):
+        cache = TieredCache(MemoryTTLCache())
+        reply = _gemini_response('{"score": 7, "feedback": "ok"}')
+        with mock.patch.object(ai_service._PROVIDER, "api_key", "test"), \
+                mock.patch.object(ai_service, "_response_cache", cache), \
+                mock.patch.object(ai_service._HTTP_POOL, "request", return_value=reply) as upstream:
+            first = ai_service.evaluate_with_ai("OS", "What is a thread?", "a unit of execution")
+            second = ai_service.evaluate_with_ai("OS", "What is a thread?", "a unit of execution  ")
+
+        self.assertEqual(first, second)
+        self.assertEqual(first["score"], 7)
+        self.assertEqual(upstream.call_count, 1)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_trips_on_failures_then_half_opens_and_recovers(self):
+        breaker = CircuitBreaker(failure_ratio=0.5, min_calls=3, reset_timeout=60)
+        for _ in range(3):
+            self.assertTrue(breaker.allow())
+            breaker.record(False, 0.1)
+
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+
+        breaker._opened_at -= 61
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # only one probe at a time
+        breaker.record(True, 0.1)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_slow_calls_count_against_the_circuit(self):
+        breaker = CircuitBreaker(min_calls=2, slow_call_seconds=1.0)
+        breaker.record(True, 5.0)
+        breaker.record(True, 5.0)
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_transient_errors_are_retried_and_open_circuit_skips_upstream(self):
+        unavailable = PooledResponse(status=503, headers={}, body=b"")
+        replies = [unavailable, _gemini_response('{"score": 4}')]
+        breaker = CircuitBreaker(min_calls=100)
+        with mock.patch.object(ai_service._PROVIDER, "api_key", "test"), \
+                mock.patch.object(ai_service, "_BREAKER", breaker), \
+                mock.patch.object(ai_service.time, "sleep") as sleep, \
+                mock.patch.object(ai_service._HTTP_POOL, "request", side_effect=replies) as upstream:
+            self.assertEqual(ai_service._call_gemini("sys", "user"), '{"score": 4}')
+            self.assertEqual(upstream.call_count, 2)
+            sleep.assert_called_once()
+
+            breaker._trip()
+            self.assertIsNone(ai_service._call_gemini("sys", "user"))
+            self.assertEqual(upstream.call_count, 2)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_threads_share_one_call(self):
+        flight = SingleFlight(max_wait=5)
+        release = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            release.wait(5)
+            return "shared"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.do("k", work)))
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        while flight.stats()["coalesced"] < 3:
+            pass
+        release.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["shared"] * 4)
+
+    def test_followers_time_out_after_max_wait(self):
+        flight = SingleFlight(max_wait=0.01)
+        release = threading.Event()
+        leader = threading.Thread(target=lambda: flight.do("k", lambda: release.wait(5)))
+        leader.start()
+        while flight.stats()["in_flight"] == 0:
+            pass
+        with self.assertRaises(SingleFlightTimeout):
+            flight.do("k", lambda: "unused")
+        release.set()
+        leader.join()
+
+    def test_async_tasks_share_one_call(self):
+        flight = AsyncSingleFlight(max_wait=5)
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "shared"
+
+        async def run():
+            return await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(run()), ["shared"] * 5)
+        self.assertEqual(len(calls), 1)
+
+
+    def test_cancelled_async_leader_does_not_cancel_followers(self):
+        flight = AsyncSingleFlight(max_wait=5)
+
+        async def run():
+            leader = asyncio.ensure_future(flight.do("k", lambda: asyncio.sleep(5)))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do("k", lambda: asyncio.sleep(0)))
+            await asyncio.sleep(0)
+            leader.cancel()
+            with self.assertRaises(SingleFlightTimeout):
+                await follower
+
+        asyncio.run(run())
+
+class HedgePolicyTests(SimpleTestCase):
+    def _policy(self, **kwargs):
+        window = LatencyWindow()
+        for _ in range(5):
+            window.add(0.01, True)
+        return HedgePolicy(window, enabled=True, min_samples=5, **kwargs)
+
+    def test_slow_primary_is_hedged_and_hedge_wins(self):
+        policy = self._policy()
+        release = threading.Event()
+        calls = []
+
+        def call():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(5)
+                return "primary"
+            return "hedge"
+
+        self.assertEqual(policy.run(call), "hedge")
+        release.set()
+        stats = policy.stats()
+        self.assertEqual(stats["hedges"], 1)
+        self.assertEqual(stats["win_rate"], 1.0)
+
+    def test_failed_status_does_not_beat_pending_leg(self):
+        policy = self._policy()
+        calls = []
+
+        def call():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.2)
+                return 200
+            return 503
+
+        self.assertEqual(policy.run(call, accept=lambda status: status == 200), 200)
+        self.assertEqual(policy.stats()["hedge_wins"], 0)
+
+    def test_budget_caps_hedges_per_minute(self):
+        policy = self._policy(budget_per_minute=0)
+        self.assertEqual(policy.run(lambda: time.sleep(0.05) or "primary"), "primary")
+        self.assertEqual(policy.stats()["hedges"], 0)
+        self.assertEqual(policy.stats()["budget_exhausted"], 1)
+
+    def test_hedge_needs_admission(self):
+        quota = QuotaScheduler(requests_per_minute=1)
+        self.assertTrue(quota.acquire(1, PRIORITY_INTERACTIVE))
+        policy = self._policy()
+        result = policy.run(
+            lambda: time.sleep(0.05) or "primary",
+            admit=lambda: quota.acquire(1, PRIORITY_BACKGROUND, max_wait=0),
+        )
+        self.assertEqual(result, "primary")
+        self.assertEqual((policy.stats()["hedges"], policy.stats()["denied"]), (0, 1))
+
+    def test_async_loser_is_cancelled(self):
+        policy = self._policy()
+        cancelled = []
+        calls = []
+
+        async def call():
+            calls.append(1)
+            if len(calls) == 1:
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.append(1)
+                    raise
+            return "hedge"
+
+        async def run():
+            result = await policy.arun(call)
+            await asyncio.sleep(0)
+            return result
+
+        self.assertEqual(asyncio.run(run()), "hedge")
+        self.assertEqual(cancelled, [1])
+
+
+class QuotaSchedulerTests(SimpleTestCase):
+    def test_rejects_immediately_when_estimated_wait_exceeds_limit(self):
+        scheduler = QuotaScheduler(requests_per_minute=2)
+        self.assertTrue(scheduler.acquire(10, PRIORITY_INTERACTIVE))
+        self.assertTrue(scheduler.acquire(10, PRIORITY_INTERACTIVE))
+        self.assertGreater(scheduler.estimate_wait(10, PRIORITY_INTERACTIVE), 20)
+
+        started = time.monotonic()
+        self.assertFalse(scheduler.acquire(10, PRIORITY_INTERACTIVE, max_wait=1))
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(scheduler.stats()["by_priority"]["interactive"]["rejected"], 1)
+
+    def test_interactive_calls_jump_ahead_of_background(self):
+        scheduler = QuotaScheduler(requests_per_minute=600)
+        scheduler.requests.tokens = -1.0  # next grant in ~0.2s
+        order = []
+
+        def run(priority, name):
+            scheduler.acquire(1, priority, max_wait=5)
+            order.append(name)
+
+        background = threading.Thread(target=run, args=(PRIORITY_BACKGROUND, "background"))
+        background.start()
+        while scheduler.stats()["queued"] < 1:
+            time.sleep(0.001)
+        interactive = threading.Thread(target=run, args=(PRIORITY_INTERACTIVE, "interactive"))
+        interactive.start()
+        background.join()
+        interactive.join()
+
+        self.assertEqual(order, ["interactive", "background"])
+
+
+class DeadlineTests(SimpleTestCase):
+    def test_upstream_timeout_keeps_the_fallback_reserve(self):
+        deadline = Deadline.after(5)
+        self.assertAlmostEqual(deadline.upstream_timeout(reserve=1), 4, delta=0.1)
+        self.assertIsNone(Deadline.after(0.3).upstream_timeout(reserve=0.5))
+        self.assertTrue(Deadline.after(-1).expired())
+
+    def test_spent_budget_skips_upstream_and_timeout_is_passed_down(self):
+        with mock.patch.object(ai_service._PROVIDER, "api_key", "test"), \
+                mock.patch.object(ai_service, "_BREAKER", CircuitBreaker()), \
+                mock.patch.object(
+                    ai_service._HTTP_POOL, "request", return_value=_gemini_response("ok")
+                ) as upstream:
+            self.assertIsNone(ai_service._call_gemini("sys", "user", deadline=Deadline.after(0.1)))
+            upstream.assert_not_called()
+
+            self.assertEqual(ai_service._call_gemini("sys", "user", deadline=Deadline.after(3)), "ok")
+            self.assertLessEqual(upstream.call_args.kwargs["timeout"], 3)
+
+    def test_retry_is_skipped_when_backoff_would_overrun_the_budget(self):
+        unavailable = PooledResponse(status=503, headers={"retry-after": "2"}, body=b"")
+        with mock.patch.object(ai_service._PROVIDER, "api_key", "test"), \
+                mock.patch.object(ai_service, "_BREAKER", CircuitBreaker(min_calls=100)), \
+                mock.patch.object(ai_service.time, "sleep") as sleep, \
+                mock.patch.object(ai_service._HTTP_POOL, "request", return_value=unavailable) as upstream:
+            self.assertIsNone(ai_service._call_gemini("sys", "user", deadline=Deadline.after(1.5)))
+            self.assertEqual(upstream.call_count, 1)
+            sleep.assert_not_called()
+
+
+class StreamingEvaluationTests(SimpleTestCase):
+    def test_fields_are_emitted_as_soon_as_they_complete(self):
+        stream = JSONFieldStream()
+        self.assertEqual(stream.feed('```json\n{"score": 7, "feed'), [("score", 7)])
+        self.assertEqual(stream.feed('back": "a, \\"b\\" {c}", "bugs_found": ["x", '), [("feedback", 'a, "b" {c}')])
+        self.assertEqual(stream.feed('"y"]}\n```'), [("bugs_found", ["x", "y"])])
+        self.assertTrue(stream.complete)
+
+    def test_sse_decoder_handles_events_split_across_chunks(self):
+        decoder = SSEDecoder()
+        self.assertEqual(decoder.feed(b'data: {"a": 1}\r'), [])
+        self.assertEqual(decoder.feed(b'\n\r\ndata: {"b"'), ['{"a": 1}'])
+        self.assertEqual(decoder.feed(b': 2}\n\n'), ['{"b": 2}'])
+
+    async def test_stream_endpoint_emits_fields_and_primes_the_answer_cache(self):
+        reply = '{"score": 6, "passed_tests": 1, "total_tests": 2, "feedback": "close", "bugs_found": ["off by one"]}'
+        sse = b"".join(
+            b"data: " + json.dumps({"candidates": [{"content": {"parts": [{"text": piece}]}}]}).encode() + b"\r\n\r\n"
+            for piece in (reply[:20], reply[20:60], reply[60:])
+        )
+
+        async def fake_stream(*args, **kwargs):
+            for i in range(0, len(sse), 37):
+                yield sse[i:i + 37]
+
+        client = AsyncClient()
+        await client.get("/api/adv/start/?mode=debug&lang=python")
+        cache = TieredCache(MemoryTTLCache())
+        with mock.patch.object(ai_service._PROVIDER, "api_key", "test"), \
+                mock.patch.object(ai_service, "_BREAKER", CircuitBreaker()), \
+                mock.patch.object(ai_service, "_response_cache", cache), \
+                mock.patch.object(advanced_logic, "PREFETCHER", Prefetcher(enabled=False)), \
+                mock.patch.object(ai_service._ASYNC_HTTP_POOL, "stream", side_effect=fake_stream), \
+                mock.patch.object(ai_service._ASYNC_HTTP_POOL, "request", side_effect=ValueError("offline")):
+            response = await client.post(
+                "/api/adv/answer/stream/", data='{"code": "x = 1"}', content_type="application/json"
+            )
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+            answer = await client.post(
+                "/api/adv/answer/", data='{"code": "x = 1"}', content_type="application/json"
+            )
+
+        events = [line[len("event: "):] for line in body.splitlines() if line.startswith("event: ")]
+        self.assertEqual(
+            events, ["start", "score", "passed_tests", "total_tests", "feedback", "bugs_found", "done"]
+        )
+        self.assertEqual(answer.json()["evaluation"]["score"], 6)
+        self.assertEqual(cache.stats()["memory"]["hits"], 1)
+
+
+class LLMProviderTests(SimpleTestCase):
+    def test_fake_provider_is_deterministic_and_parses(self):
+        cache = TieredCache(MemoryTTLCache())
+        with mock.patch.object(ai_service, "_PROVIDER", FakeProvider(seed=1)), \
+                mock.patch.object(ai_service, "_BREAKER", CircuitBreaker()), \
+                mock.patch.object(ai_service, "_response_cache", cache):
+            first = ai_service.evaluate_with_ai("OS", "What is a thread?", "a unit of execution")
+            cache.memory.clear()
+            second = ai_service.evaluate_with_ai("OS", "What is a thread?", "a unit of execution")
+            question = generate_logical_question([], 1, 5)
+
+        self.assertEqual(first, second)
+        self.assertIn(first["score"], range(11))
+        self.assertEqual(question["type"], "logical")
+
+    def test_fake_errors_are_retried_like_upstream_errors(self):
+        provider = FakeProvider(error_rate=1.0, seed=1)
+        with mock.patch.object(ai_service, "_PROVIDER", provider), \
+                mock.patch.object(ai_service, "_BREAKER", CircuitBreaker(min_calls=100)), \
+                mock.patch.object(ai_service.time, "sleep"):
+            self.assertIsNone(ai_service._call_gemini("sys", "user"))
+        self.assertEqual(provider.stats()["errors"], ai_service._RETRY.max_attempts)
+
+    def test_incomplete_provider_cannot_be_created(self):
+        class SendOnly(LLMProvider):
+            def send(self, body, timeout=None):
+                return None
+
+        with self.assertRaises(TypeError):
+            SendOnly()
+
+    def test_http_stand_in_speaks_generate_content(self):
+        server = serve_fake_gemini(FakeProvider(LatencyModel(0.01, 0.02), seed=1))
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base_url = "http://%s:%d" % server.server_address[:2]
+        provider = GeminiProvider("key", HTTPConnectionPool(), AsyncHTTPConnectionPool(), base_url=base_url)
+        body = provider.encode(prompts.EVALUATE_CODE_SYSTEM, "code", 800, 0.1)
+
+        reply = json.loads(provider.decode(provider.send(body)))
+
+        async def stream():
+            return b"".join([chunk async for chunk in provider.astream(body)])
+
+        events = SSEDecoder().feed(asyncio.run(stream()))
+        streamed = "".join(provider.decode_event(json.loads(event)) for event in events)
+        self.assertEqual(json.loads(streamed), reply)
+        self.assertIn("bugs_found", reply)
+
+
+class QuestionPoolTests(SimpleTestCase):
+    def test_fill_take_and_stale_eviction(self):
+        pool = QuestionPool(depth=1, languages=["python"])
+        generated = []
+
+        def generate(slot):
+            generated.append(slot)
+            return {"topic": slot[3], "difficulty": slot[2]}
+
+        for _ in range(len(pool.slots())):
+            self.assertTrue(pool.fill_once(generate))
+        self.assertIsNone(pool.next_slot())
+        self.assertEqual(pool.stats()["ready"], pool.stats()["capacity"])
+
+        used = [t for t in prompts.DSA_TOPICS if t != "Heaps"]
+        q = pool.take("debug", "python", "Hard", used)
+        self.assertEqual(q, {"topic": "Heaps", "difficulty": "Hard"})
+        self.assertIsNone(pool.take("debug", "python", "Hard", used))
+
+        pool.max_age = -1
+        self.assertIsNone(pool.take("logical", "", "Easy"))
+        self.assertGreater(pool.stats()["stale_evicted"], 0)
+
+    def test_session_serves_pooled_question_without_llm_call(self):
+        pool = QuestionPool(depth=1)
+        for difficulty in prompts.DSA_DIFFICULTIES:
+            pool.put(("logical", "", difficulty, "Probability"), {"topic": "Probability", "title": "Pooled"})
+        with mock.patch.object(advanced_logic, "QUESTION_POOL", pool), \
+                mock.patch.object(advanced_logic, "PREFETCHER", Prefetcher(enabled=False)), \
+                mock.patch.object(advanced_logic, "generate_logical_question") as live:
+            q = advanced_logic.AdvancedSession(mode="logical").get_current_question()
+
+        live.assert_not_called()
+        self.assertEqual(q["title"], "Pooled")
+        self.assertEqual(pool.stats()["hits"], 1)
+
+
+class BatchGenerationTests(SimpleTestCase):
+    def test_items_are_validated_separately_and_fallbacks_fill_gaps(self):
+        good = {"topic": "Probability", "title": "Dice", "description": "Roll.", "correct_answer": "1/6"}
+        raw = json.dumps({"questions": [
+            good,
+            {"topic": "Math Puzzles", "title": "No answer", "description": "?"},
+            dict(good),  # duplicate of the first
+        ]})
+        specs = [("Probability", "Easy"), ("Math Puzzles", "Medium"), ("Combinatorics", "Hard")]
+        with mock.patch("interviewer.ai_question_generator._call_gemini", return_value=raw) as call:
+            strict = generate_logical_questions([], specs=specs, fallback=False)
+            filled = generate_logical_questions([], specs=specs)
+
+        self.assertEqual(call.call_count, 2)  # one upstream call per batch
+        self.assertIn("1. Easy - Probability", call.call_args.kwargs["user_prompt"])
+        self.assertEqual(strict[0]["title"], "Dice")
+        self.assertEqual(strict[1:], [None, None])
+        self.assertEqual(filled[0]["title"], "Dice")
+        self.assertTrue(all(filled))
+        self.assertEqual(len({q["title"] for q in filled}), 3)
+
+    def test_pool_fills_several_slots_per_call(self):
+        pool = QuestionPool(depth=1, languages=["python"], batch_size=4)
+        calls = []
+
+        def generate(slots):
+            calls.append(slots)
+            return [{"topic": slot[3]} for slot in slots[:-1]] + [None]
+
+        self.assertEqual(pool.fill_batch(generate), 3)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len({slot[:2] for slot in calls[0]}), 1)
+        self.assertEqual(len({slot[3] for slot in calls[0]}), 4)
+        self.assertEqual(pool.stats()["failed"], 1)
+
+
+class JSONRepairTests(SimpleTestCase):
+    def test_fences_trailing_text_and_truncation_are_recovered(self):
+        self.assertEqual(loads_lenient('```json\n{"a": 1}\n```'), ({"a": 1}, False))
+        self.assertEqual(loads_lenient('{"a": [1, 2]} -- done')[0], {"a": [1, 2]})
+        # Unfinished strings and numbers are dropped, never half-kept.
+        self.assertEqual(loads_lenient('{"score": 7, "feedback": "Go')[0], {"score": 7})
+        self.assertEqual(loads_lenient('{"tags": ["x", "y"], "score": 1')[0], {"tags": ["x", "y"]})
+        with self.assertRaises(ValueError):
+            loads_lenient("no json here")
+
+    def test_truncated_batch_keeps_complete_questions(self):
+        good = {"topic": "Probability", "title": "Dice", "description": "Roll.", "correct_answer": "1/6"}
+        raw = json.dumps({"questions": [good, dict(good, title="Coins")]})[:-40]
+        before = PARSE_STATS.stats().get("question_batch", {}).get("repaired", 0)
+        with mock.patch("interviewer.ai_question_generator._call_gemini", return_value=raw) as call:
+            got = generate_logical_questions(
+                [], specs=[("Probability", "Easy"), ("Probability", "Hard")], fallback=False
+            )
+
+        self.assertEqual(got[0]["title"], "Dice")
+        self.assertIsNone(got[1])
+        self.assertEqual(PARSE_STATS.stats()["question_batch"]["repaired"], before + 1)
+        schema = call.call_args.kwargs["schema"]
+        self.assertEqual(schema["properties"]["questions"]["items"], prompts.LOGICAL_QUESTION_SCHEMA)
+
+    def test_response_schema_is_sent_in_generation_config(self):
+        body = json.loads(FakeProvider().encode("s", "u", 64, 0.1, prompts.ANSWER_EVAL_SCHEMA))
+        self.assertEqual(body["generationConfig"]["response_schema"]["required"], ["score", "feedback"])
+        self.assertNotIn("response_schema", json.loads(FakeProvider().encode("s", "u", 64, 0.1))["generationConfig"])
+
+
+class CodeValidationTests(SimpleTestCase):
+    FIXED = "def second_largest(nums):\n    return sorted(set(nums))[-2]\n"
+    BUGGY = "def second_largest(nums):\n    return sorted(nums)[-2]\n"
+
+    def _debug(self, buggy, tests, language="python"):
+        return {"type": "debug", "language": language, "title": "Second Largest",
+                "buggy_code": buggy, "fixed_code": self.FIXED, "test_cases": tests}
+
+    def test_reference_must_pass_and_buggy_code_must_fail(self):
+        tests = [{"input": "nums=[1, 3, 2]", "expected": "2"}, {"input": "[5, 5, 4]", "expected": "4"}]
+        result = validate_question(self._debug(self.BUGGY, tests))
+        self.assertEqual(result["status"], VERIFIED)
+        self.assertEqual((result["passed"], result["total"]), (2, 2))
+        self.assertIn("runtime_ms", result)
+
+        # The tests never exercise the duplicate-maximum bug.
+        self.assertEqual(validate_question(self._debug(self.BUGGY, tests[:1]))["status"], FAILED)
+        wrong = [{"input": "[1, 3, 2]", "expected": "3"}]
+        self.assertIn("own tests", validate_question(self._debug(self.BUGGY, wrong))["reason"])
+        looping = self._debug(self.BUGGY, tests)
+        looping["fixed_code"] = "def second_largest(nums):\n    while True:\n        pass\n"
+        self.assertEqual(validate_question(looping, timeout=1)["reason"], "timed out")
+
+    def test_candidate_code_cannot_write_files_or_reach_the_network(self):
+        probes = {
+            "write": "def probe(x):\n    with open('out.txt', 'w') as f:\n        f.write('x' * 10)\n    return 1\n",
+            "network": "def probe(x):\n    import socket\n    socket.create_connection(('192.0.2.1', 80), 1)\n    return 1\n",
+        }
+        for name, code in probes.items():
+            if name == "network" and not code_validation._isolation():
+                continue
+            report = code_validation._run([{"code": code, "entry": "probe"}], [{"input": "0", "expected": "1"}], 5)
+            self.assertFalse(report[0]["results"][0]["ok"], name)
+
+    def test_unexecutable_questions_are_not_rejected(self):
+        prose = [{"input": "1->2->3", "expected": "3->2->1"}]
+        self.assertEqual(validate_question(self._debug(self.BUGGY, prose))["status"], UNRUNNABLE)
+        self.assertEqual(validate_question(self._debug(self.BUGGY, [], "java"))["status"], UNSUPPORTED)
+
+    def test_generated_question_with_broken_solution_is_dropped(self):
+        raw = json.dumps({"topic": "Arrays", "title": "Sum", "description": "Add them.",
+                          "starter_code": "def total(nums):\n    pass",
+                          "solution_code": "def total(nums):\n    return max(nums)",
+                          "test_cases": [{"input": "[1, 2, 3]", "expected": "6"}]})
+        fixed = raw.replace("max(nums)", "sum(nums)")
+        with mock.patch("interviewer.ai_question_generator._call_gemini", side_effect=[raw, fixed]), \
+                mock.patch.object(code_validation, "QUESTION_VALIDATION", "true"):
+            self.assertIsNone(generate_coding_question("python", []))
+            self.assertEqual(generate_coding_question("python", [])["validation"]["status"], VERIFIED)
+
+        pool = QuestionPool(depth=1, languages=["python"])
+        unverified = {"topic": "Arrays", "validation": {"status": UNRUNNABLE}}
+        self.assertFalse(pool.fill_once(lambda slot: unverified))
+        self.assertEqual(pool.stats()["unverified"], 1)
+
+
+class QuestionCorpusTests(SimpleTestCase):
+    def test_suite_runs_without_the_shared_corpus(self):
+        with mock.patch.object(question_corpus.QuestionCorpus, "add") as add:
+            question_corpus.remember_question(self._question("Two Sum", "Find two numbers."))
+        self.assertIsNone(question_corpus.get_corpus())
+        add.assert_not_called()
+
+    def _question(self, title, description, topic="Arrays"):
+        return {"type": "debug", "language": "python", "difficulty": "Easy", "topic": topic,
+                "title": title, "description": description, "buggy_code": "def f(nums): pass"}
+
+    def test_near_duplicates_are_rejected_and_sampling_waits_for_min_size(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus = QuestionCorpus(os.path.join(tmp, "corpus.sqlite3"), min_size=2)
+            two_sum = "Return the indices of the two numbers in the array that add up to the target value."
+            self.assertTrue(corpus.add(self._question("Two Sum", two_sum)))
+            self.assertFalse(corpus.add(self._question("Two Sum", two_sum + " Fix the bug.")))
+            self.assertIsNone(corpus.sample("debug", "python", "Easy"))
+
+            self.assertTrue(corpus.add(self._question(
+                "Cycle Detection", "Detect whether a singly linked list contains a cycle using two pointers.",
+                topic="Linked Lists",
+            )))
+            q = corpus.sample("debug", "python", "Easy", used_topics=["Arrays"])
+            self.assertEqual(q["title"], "Cycle Detection")
+            self.assertIsNone(corpus.sample("logical", "", "Easy"))
+            self.assertEqual(corpus.stats()["size"], 2)
+            self.assertEqual(corpus.stats()["duplicates"], 1)
+
+            # Least-served first.
+            self.assertEqual(corpus.sample("debug", "python", "Easy")["title"], "Two Sum")
+
+
+class SourceRouterTests(SimpleTestCase):
+    def test_slow_or_failing_upstream_routes_to_local_banks(self):
+        router = SourceRouter(budget=3.0, min_samples=3)
+        deadline = Deadline.after(9)
+        self.assertEqual(router.choose(deadline), SOURCE_LIVE)  # no history yet
+        for _ in range(3):
+            router.record(1.0, ok=True)
+        self.assertEqual(router.choose(deadline), SOURCE_LIVE)
+        for _ in range(3):
+            router.record(5.0, ok=True)
+        self.assertEqual(router.choose(deadline), SOURCE_LOCAL)
+        self.assertEqual(router.choose(None), SOURCE_LIVE)  # background work has no budget
+
+        failing = SourceRouter(budget=3.0, min_samples=3)
+        failing.record(0.5, ok=False)
+        self.assertEqual(failing.choose(deadline), SOURCE_LIVE)  # one failure is not a trend
+        for ok in (False, True):
+            failing.record(0.5, ok=ok)
+        self.assertEqual(failing.choose(deadline), SOURCE_LOCAL)
+        self.assertEqual(router.stats()[SOURCE_LOCAL], 1)
+
+    def test_session_serves_unseen_local_question_when_routed_away(self):
+        router = SourceRouter(budget=3.0, min_samples=1)
+        router.record(30.0, ok=True)
+        with mock.patch.object(advanced_logic, "QUESTION_ROUTER", router), \
+                mock.patch.object(advanced_logic, "QUESTION_POOL", QuestionPool(depth=0)), \
+                mock.patch.object(advanced_logic, "PREFETCHER", Prefetcher(enabled=False)), \
+                mock.patch.object(advanced_logic, "generate_debug_question") as live:
+            session = advanced_logic.AdvancedSession(mode="debug", lang="java")
+            titles = set()
+            for _ in range(3):
+                q = session.get_current_question(Deadline.after(9))
+                titles.add(q["title"])
+                session.skip_question()
+
+        live.assert_not_called()
+        self.assertEqual(len(titles), 3)
+        self.assertEqual(q["language"], "java")
+        self.assertEqual(len(set(session.used_topics)), 3)
+
+
+class QuestionBankTests(SimpleTestCase):
+    def _bank(self):
+        return QuestionBank(
+            {"type": "debug", "language": lang, "difficulty": diff, "topic": f"T{i % 5}", "title": f"{lang}-{diff}-{i}"}
+            for lang in ("python", "java") for diff in ("Easy", "Hard") for i in range(10)
+        )
+
+    def test_indexed_filters_and_exclusions(self):
+        bank = self._bank()
+        self.assertEqual(len(bank), 40)
+        self.assertEqual(bank.count(type="debug"), 40)
+        self.assertEqual(bank.count(language="java", difficulty="Hard"), 10)
+        self.assertEqual(bank.count(language="java", topic="T1"), 4)
+        q = bank.draw(language="python", difficulty="Easy", exclude_topics=["T0", "T1", "T2", "T3"])
+        self.assertEqual((q["language"], q["difficulty"], q["topic"]), ("python", "Easy", "T4"))
+        self.assertIsNone(bank.draw(language="cpp"))
+        with self.assertRaises(TypeError):
+            bank.count(lang="python")
+
+    def test_cursor_visits_every_item_once_per_cycle_and_survives_serialisation(self):
+        bank = self._bank()
+        cursor = BankCursor()
+        titles = [bank.draw(cursor, language="java")["title"] for _ in range(10)]
+        cursor = BankCursor(json.loads(json.dumps(cursor.to_dict())))
+        titles += [bank.draw(cursor, language="java")["title"] for _ in range(10)]
+        self.assertEqual(len(set(titles)), 20)
+        self.assertIn(bank.draw(cursor, language="java")["title"], titles)  # next cycle
+
+    def test_draw_finds_a_match_when_the_cycle_wraps(self):
+        bank = QuestionBank({"type": "debug", "topic": f"T{i}", "title": str(i)} for i in range(10))
+        for seed in range(200):
+            cursor = BankCursor(rng=random.Random(seed))
+            # Only a topic already served this cycle is allowed, so the match sits in the next cycle.
+            allowed = [bank.draw(cursor)["topic"] for _ in range(9)][0]
+            q = bank.draw(cursor, exclude_topics=[f"T{i}" for i in range(10) if f"T{i}" != allowed])
+            self.assertEqual(q["topic"], allowed, seed)
+
+    def test_local_bank_covers_builtin_snippet_and_fallback_questions(self):
+        bank = get_local_bank()
+        self.assertIs(bank, get_local_bank())
+        self.assertGreater(bank.count(type="debug", language="java"), 30)
+        self.assertGreater(bank.count(type="logical"), 0)
+        self.assertGreater(bank.count(type="coding", language="python"), 0)
+
+
+class SnippetBankTests(SimpleTestCase):
+    def test_built_bank_matches_json_and_rejects_stale_sources(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "snippets.bin")
+            count = snippet_loader.build_snippet_bank(path)
+            bank = snippet_loader.SnippetBank(path)
+            expected = [snippet_loader._to_question(*row) for row in snippet_loader._parse_json_snippets()]
+            self.assertEqual(len(bank), count)
+            self.assertEqual(bank[-1], expected[-1])
+            self.assertEqual(list(bank), expected)
+            self.assertIs(bank[3], bank[3])  # decoded once
+
+            with mock.patch.object(snippet_loader, "_source_digest", return_value=b"\0" * 32):
+                with self.assertRaises(ValueError):
+                    snippet_loader.SnippetBank(path)
+
+
+class PrefetchTests(SimpleTestCase):
+    def test_parked_results_are_collected_once_and_cancelled_on_end(self):
+        prefetcher = Prefetcher(max_workers=1)
+        gate = threading.Event()
+        self.assertTrue(prefetcher.schedule("s1", 2, lambda: {"title": "Q2"}))
+        self.assertFalse(prefetcher.schedule("s1", 2, lambda: {"title": "dup"}))
+        self.assertEqual(prefetcher.take("s1", 2, timeout=1), {"title": "Q2"})
+        self.assertIsNone(prefetcher.take("s1", 2, timeout=1))
+
+        prefetcher.schedule("s2", 2, gate.wait)
+        prefetcher.schedule("s2", 3, lambda: {"title": "Q3"})
+        self.assertEqual(prefetcher.stats()["parked"], 1)  # question 2 is superseded
+        prefetcher.cancel("s2")
+        gate.set()
+        self.assertIsNone(prefetcher.take("s2", 3, timeout=1))
+        self.assertEqual(prefetcher.stats()["cancelled"], 1)
+
+    def test_next_question_is_generated_while_the_current_one_is_served(self):
+        prefetcher = Prefetcher(max_workers=1)
+
+        def generate(used_topics, qnum, total, **kwargs):
+            return {"topic": f"T{qnum}", "title": f"Q{qnum}", "prefetched": threading.current_thread().name}
+
+        with mock.patch.object(advanced_logic, "PREFETCHER", prefetcher), \
+                mock.patch.object(ai_service._PROVIDER, "api_key", "test"), \
+                mock.patch.object(advanced_logic, "QUESTION_POOL", QuestionPool(depth=0)), \
+                mock.patch.object(advanced_logic, "generate_logical_question", side_effect=generate):
+            session = advanced_logic.AdvancedSession(mode="logical")
+            first = session.get_current_question()
+            session.skip_question()
+            second = session.get_current_question()
+            session.end_interview()
+
+        self.assertEqual(first["title"], "Q1")
+        self.assertEqual(second["title"], "Q2")
+        self.assertTrue(second["prefetched"].startswith("question-prefetch"))
+        self.assertEqual(prefetcher.stats()["used"], 1)
+
+
+class EvaluateAndAdvanceTests(SimpleTestCase):
+    async def test_evaluation_and_next_question_overlap(self):
+        async def slow_eval(*args, **kwargs):
+            await asyncio.sleep(0.3)
+            return {"score": 7, "feedback": "ok"}
+
+        async def slow_generate(used_topics, qnum, total, **kwargs):
+            await asyncio.sleep(0.3)
+            return {"topic": f"T{qnum}", "title": f"Q{qnum}"}
+
+        session = advanced_logic.AdvancedSession(mode="logical")
+        session._accept_question({"topic": "T1", "title": "Q1"})
+        with mock.patch.object(advanced_logic, "PREFETCHER", Prefetcher(enabled=False)), \
+                mock.patch.object(advanced_logic, "QUESTION_POOL", QuestionPool(depth=0)), \
+                mock.patch.object(advanced_logic, "aevaluate_with_ai", side_effect=slow_eval), \
+                mock.patch.object(advanced_logic, "agenerate_logical_question", side_effect=slow_generate):
+            started = time.monotonic()
+            result, nq = await session.aevaluate_and_advance("42")
+            elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(result["score"], 7)
+        self.assertEqual(nq["title"], "Q2")
+        self.assertEqual(session.index, 1)
+        self.assertEqual(session.questions[1]["q_index"], 2)
+        self.assertEqual(session.used_topics, ["T1", "T2"])
+
+    def test_worker_fetches_from_a_snapshot_and_cursor_copy(self):
+        session = advanced_logic.AdvancedSession(mode="logical")
+        session._accept_question({"topic": "T1", "title": "Q1"})
+        seen = {}
+
+        def generate(mode, lang, used, qnum, total, deadline=None, seen_titles=(), cursor=None, **kwargs):
+            seen.update(used=used, seen_titles=seen_titles, cursor=cursor)
+            cursor.next_offset("logical|easy", 5)
+            return {"topic": "T2", "title": "Q2"}
+
+        with mock.patch.object(advanced_logic, "PREFETCHER", Prefetcher(enabled=False)), \
+                mock.patch.object(advanced_logic, "evaluate_with_ai", return_value={"score": 6}), \
+                mock.patch.object(advanced_logic, "_generate_question", side_effect=generate):
+            result, nq = session.evaluate_and_advance("42")
+
+        self.assertEqual(nq["title"], "Q2")
+        self.assertEqual(seen["used"], ["T1"])
+        self.assertIsNot(seen["used"], session.used_topics)
+        self.assertEqual(seen["seen_titles"], ["Q1"])
+        self.assertIsNot(seen["cursor"], session.bank_cursor)
+        self.assertEqual(session.bank_cursor.to_dict(), seen["cursor"].to_dict())
+
+    def test_no_generation_after_the_last_question(self):
+        session = advanced_logic.AdvancedSession(mode="logical", index=4, questions=[None] * 4)
+        session._accept_question({"topic": "T5", "title": "Q5"})
+        with mock.patch.object(advanced_logic, "evaluate_with_ai", return_value={"score": 5}), \
+                mock.patch.object(advanced_logic, "generate_logical_question") as generate:
+            result, nq = session.evaluate_and_advance("done")
+        self.assertEqual(result["score"], 5)
+        self.assertIsNone(nq)
+        self.assertTrue(session.is_finished())
+        generate.assert_not_called()
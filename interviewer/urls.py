@@ -19,6 +19,7 @@ urlpatterns = [
     # ── Advanced Interview API ──
     path("api/adv/start/", views.adv_start),
     path("api/adv/answer/", views.adv_answer),
+    path("api/adv/answer/stream/", views.adv_answer_stream),
     path("api/adv/skip/", views.adv_skip),
     path("api/adv/end/", views.adv_end),
 
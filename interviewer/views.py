@@ -1,7 +1,7 @@
 import json
 import time
 
-from django.http import HttpRequest, HttpResponseBadRequest, JsonResponse
+from django.http import HttpRequest, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
 from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import ensure_csrf_cookie
@@ -10,6 +10,10 @@ from django.views.decorators.http import require_GET, require_POST
 from .logic import InterviewSession
 from .questions import get_question_bank, get_question_topics
 from .advanced_logic import AdvancedSession
+from .deadline import Deadline
+from .question_pool import ensure_filler
+from .state_store import aload_state, asave_state, load_state, save_state
+from .streaming import sse_event
 
 SESSION_KEY = "interview_state"
 ADV_SESSION_KEY = "advanced_interview_state"
@@ -24,12 +28,21 @@ def _serialize_question(question):
 
 
 def _load_session(request: HttpRequest) -> InterviewSession:
-    return InterviewSession.from_dict(request.session.get(SESSION_KEY, {}))
+    blob = load_state(request, SESSION_KEY)
+    return InterviewSession.from_bytes(blob) if blob else InterviewSession.from_dict({})
 
 
 def _save_session(request: HttpRequest, session: InterviewSession) -> None:
-    request.session[SESSION_KEY] = session.to_dict()
-    request.session.modified = True
+    save_state(request, SESSION_KEY, session.to_bytes())
+
+
+async def _aload_session(request: HttpRequest) -> InterviewSession:
+    blob = await aload_state(request, SESSION_KEY)
+    return InterviewSession.from_bytes(blob) if blob else InterviewSession.from_dict({})
+
+
+async def _asave_session(request: HttpRequest, session: InterviewSession) -> None:
+    await asave_state(request, SESSION_KEY, session.to_bytes())
 
 
 @require_GET
@@ -82,8 +95,9 @@ def start_interview(request: HttpRequest):
 
 
 @require_POST
-def submit_answer(request: HttpRequest):
-    session = _load_session(request)
+async def submit_answer(request: HttpRequest):
+    deadline = Deadline.for_request()
+    session = await _aload_session(request)
     if session.is_finished():
         report = session.final_report()
         return JsonResponse({"finished": True, "report": report})
@@ -96,14 +110,14 @@ def submit_answer(request: HttpRequest):
     answer = str(payload.get("answer", "")).strip()
     end_interview = bool(payload.get("end_interview", False))
     
-    evaluation = session.save_response(answer)
+    evaluation = await session.asave_response(answer, deadline)
     
     if end_interview:
         # Force finish
         session.index = len(session.questions)
 
     if session.is_finished():
-        _save_session(request, session)
+        await _asave_session(request, session)
         report = session.final_report()
         return JsonResponse(
             {
@@ -119,7 +133,7 @@ def submit_answer(request: HttpRequest):
         )
 
     next_question = session.get_current_question()
-    _save_session(request, session)
+    await _asave_session(request, session)
     return JsonResponse(
         {
             "finished": False,
@@ -140,14 +154,13 @@ def submit_answer(request: HttpRequest):
 #  ADVANCED INTERVIEW VIEWS
 # ═══════════════════════════════════
 
-def _adv_load(request):
-    data = request.session.get(ADV_SESSION_KEY)
-    return AdvancedSession.from_dict(data) if data else None
+async def _adv_load(request):
+    blob = await aload_state(request, ADV_SESSION_KEY)
+    return AdvancedSession.from_bytes(blob) if blob else None
 
 
-def _adv_save(request, s):
-    request.session[ADV_SESSION_KEY] = s.to_dict()
-    request.session.modified = True
+async def _adv_save(request, s):
+    await asave_state(request, ADV_SESSION_KEY, s.to_bytes())
 
 
 @never_cache
@@ -158,20 +171,22 @@ def advanced_interview_page(request):
 
 
 @require_GET
-def adv_start(request):
+async def adv_start(request):
+    deadline = Deadline.for_request()
     lang = request.GET.get("lang", "python")
     mode = request.GET.get("mode", "debug")  # "debug" or "logical"
 
     if mode not in ("debug", "logical"):
         mode = "debug"
 
+    ensure_filler()
     s = AdvancedSession(mode=mode, lang=lang)
-    q = s.get_current_question_for_client()
+    q = await s.aget_current_question_for_client(deadline)
 
     if not q:
         return JsonResponse({"error": "Failed to generate question"}, status=500)
 
-    _adv_save(request, s)
+    await _adv_save(request, s)
     return JsonResponse({
         "started": True,
         "mode": mode,
@@ -184,8 +199,9 @@ def adv_start(request):
 
 
 @require_POST
-def adv_answer(request):
-    s = _adv_load(request)
+async def adv_answer(request):
+    deadline = Deadline.for_request()
+    s = await _adv_load(request)
     if not s:
         return JsonResponse({"error": "No active session"}, status=400)
     if s.is_finished():
@@ -198,11 +214,12 @@ def adv_answer(request):
         return HttpResponseBadRequest("Invalid JSON")
 
     submitted_code = str(body.get("code", "")).strip()
-    eval_result = s.evaluate_answer(submitted_code)
+    # Evaluation and the next question run concurrently under one deadline.
+    eval_result, nq = await s.aevaluate_and_advance(submitted_code, deadline)
 
     if s.is_finished():
         s.end_interview()
-        _adv_save(request, s)
+        await _adv_save(request, s)
         report = s.compile_report()
         return JsonResponse({
             "finished": True,
@@ -218,9 +235,7 @@ def adv_answer(request):
             },
         })
 
-    # Generate next question
-    nq = s.get_current_question_for_client()
-    _adv_save(request, s)
+    await _adv_save(request, s)
 
     response_data = {
         "finished": False,
@@ -250,8 +265,43 @@ def adv_answer(request):
 
 
 @require_POST
-def adv_skip(request):
-    s = _adv_load(request)
+async def adv_answer_stream(request):
+    """
+    Stream the evaluation of a submission as server-sent events, one event per
+    field as soon as it is complete (score first). The session is not advanced:
+    the client then posts the same code to ``adv_answer``, which is served from
+    the response cache.
+    """
+    deadline = Deadline.for_request()
+    s = await _adv_load(request)
+    if not s:
+        return JsonResponse({"error": "No active session"}, status=400)
+    if s.is_finished() or s.question_at(s.index) is None:
+        return JsonResponse({"error": "No question to evaluate"}, status=400)
+
+    try:
+        body = json.loads(request.body.decode("utf-8")) if request.body else {}
+    except json.JSONDecodeError:
+        return HttpResponseBadRequest("Invalid JSON")
+
+    fields = s.astream_evaluation(str(body.get("code", "")).strip(), deadline)
+
+    async def events():
+        yield sse_event("start", {"question_index": s.index + 1})
+        async for name, value in fields:
+            yield sse_event(name, value)
+        yield sse_event("done", {})
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@require_POST
+async def adv_skip(request):
+    deadline = Deadline.for_request()
+    s = await _adv_load(request)
     if not s:
         return JsonResponse({"error": "No active session"}, status=400)
     if s.is_finished():
@@ -262,11 +312,11 @@ def adv_skip(request):
 
     if s.is_finished():
         s.end_interview()
-        _adv_save(request, s)
+        await _adv_save(request, s)
         return JsonResponse({"finished": True, "report": s.compile_report()})
 
-    nq = s.get_current_question_for_client()
-    _adv_save(request, s)
+    nq = await s.aget_current_question_for_client(deadline)
+    await _adv_save(request, s)
     return JsonResponse({
         "finished": False,
         "question_index": s.index + 1,
@@ -278,12 +328,12 @@ def adv_skip(request):
 
 
 @require_POST
-def adv_end(request):
-    s = _adv_load(request)
+async def adv_end(request):
+    s = await _adv_load(request)
     if not s:
         return JsonResponse({"error": "No active session"}, status=400)
     s.end_interview()
-    _adv_save(request, s)
+    await _adv_save(request, s)
     report = s.compile_report()
     return JsonResponse({"finished": True, "report": report})
 
@@ -292,13 +342,12 @@ from .aptitude_logic import AptitudeSession
 
 APT_SESSION_KEY = "aptitude_interview_state"
 
-def _apt_load(request):
-    data = request.session.get(APT_SESSION_KEY)
-    return AptitudeSession.from_dict(data) if data else None
+async def _apt_load(request):
+    blob = await aload_state(request, APT_SESSION_KEY)
+    return AptitudeSession.from_bytes(blob) if blob else None
 
-def _apt_save(request, s):
-    request.session[APT_SESSION_KEY] = s.to_dict()
-    request.session.modified = True
+async def _apt_save(request, s):
+    await asave_state(request, APT_SESSION_KEY, s.to_bytes())
 
 @never_cache
 @ensure_csrf_cookie
@@ -307,14 +356,14 @@ def aptitude_interview_page(request):
     return render(request, "interviewer/aptitude_interview.html")
 
 @require_GET
-def aptitude_start(request):
+async def aptitude_start(request):
     s = AptitudeSession(mode="aptitude", duration_minutes=30)
     q = s.get_current_question_for_client()
 
     if not q:
         return JsonResponse({"error": "Failed to generate question"}, status=500)
 
-    _apt_save(request, s)
+    await _apt_save(request, s)
     return JsonResponse({
         "started": True,
         "mode": "aptitude",
@@ -325,8 +374,8 @@ def aptitude_start(request):
     })
 
 @require_POST
-def aptitude_answer(request):
-    s = _apt_load(request)
+async def aptitude_answer(request):
+    s = await _apt_load(request)
     if not s:
         return JsonResponse({"error": "No active session"}, status=400)
     if s.is_finished():
@@ -343,7 +392,7 @@ def aptitude_answer(request):
 
     if s.is_finished():
         s.end_interview()
-        _apt_save(request, s)
+        await _apt_save(request, s)
         report = s.compile_report()
         return JsonResponse({
             "finished": True,
@@ -352,7 +401,7 @@ def aptitude_answer(request):
         })
 
     nq = s.get_current_question_for_client()
-    _apt_save(request, s)
+    await _apt_save(request, s)
 
     return JsonResponse({
         "finished": False,
@@ -364,8 +413,8 @@ def aptitude_answer(request):
     })
 
 @require_POST
-def aptitude_skip(request):
-    s = _apt_load(request)
+async def aptitude_skip(request):
+    s = await _apt_load(request)
     if not s:
         return JsonResponse({"error": "No active session"}, status=400)
     if s.is_finished():
@@ -376,11 +425,11 @@ def aptitude_skip(request):
 
     if s.is_finished():
         s.end_interview()
-        _apt_save(request, s)
+        await _apt_save(request, s)
         return JsonResponse({"finished": True, "report": s.compile_report()})
 
     nq = s.get_current_question_for_client()
-    _apt_save(request, s)
+    await _apt_save(request, s)
     return JsonResponse({
         "finished": False,
         "question_index": s.index + 1,
@@ -391,12 +440,12 @@ def aptitude_skip(request):
     })
 
 @require_POST
-def aptitude_end(request):
-    s = _apt_load(request)
+async def aptitude_end(request):
+    s = await _apt_load(request)
     if not s:
         return JsonResponse({"error": "No active session"}, status=400)
     s.end_interview()
-    _apt_save(request, s)
+    await _apt_save(request, s)
     report = s.compile_report()
     return JsonResponse({"finished": True, "report": report})
 